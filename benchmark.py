@@ -0,0 +1,251 @@
+"""成绩分析系统性能基准测试
+
+生成符合格式要求的模拟考试文件（A1为考试场次，第2行为表头），
+在无界面的情况下测量读取、合并、姓名搜索、学生查询、图表数据整理及快照读写的耗时，
+结果以JSON输出，便于不同版本之间对比。
+
+    python benchmark.py --students 400 --exams 12 --out result.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import contextlib
+
+import pandas as pd
+import openpyxl
+from openpyxl import Workbook
+
+import query_score as qs
+
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈"
+GIVEN_CHARS = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉萍红娥玲芬燕彬鹏辉浩宇轩然子涵欣怡梓晨思琪雨博文"
+TERMS = ["第一学期", "第二学期"]
+EXAM_KINDS = ["第一次月考", "期中考试", "第二次月考", "期末考试"]
+
+
+def make_names(count, rng):
+    """生成不重复的中文姓名"""
+    names, seen = [], set()
+    while len(names) < count:
+        name = rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN_CHARS) for _ in range(rng.choice((1, 2, 2))))
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def session_titles(count, start_year=2021):
+    """按时间顺序生成考试场次标题"""
+    titles = []
+    for idx in range(count):
+        year = start_year + idx // (len(TERMS) * len(EXAM_KINDS))
+        term = TERMS[idx // len(EXAM_KINDS) % len(TERMS)]
+        kind = EXAM_KINDS[idx % len(EXAM_KINDS)]
+        titles.append(f"{year}学年{term}{kind}")
+    return titles
+
+
+def generate_workbooks(out_dir, students=400, exams=10, classes=8, subjects=None, seed=0):
+    """在 out_dir 下生成 exams 个考试文件，每个文件 students 行，返回文件列表"""
+    rng = random.Random(seed)
+    subjects = subjects or qs.SUBJECT_SCHEMA[:6]
+    names = make_names(students, rng)
+    class_names = [f"高一({idx % classes + 1})班" for idx in range(students)]
+    ability = [rng.gauss(0, 1) for _ in range(students)]
+    header = (['姓名', '现班', '学号'] + [s.score for s in subjects] + ['总分']
+              + [s.rank for s in subjects] + ['班序', '级序'])
+
+    os.makedirs(out_dir, exist_ok=True)
+    files = []
+    for exam_idx, title in enumerate(session_titles(exams)):
+        scores = [[max(0, min(150, round(95 + 20*ability[i] + rng.gauss(0, 12)))) for _ in subjects]
+                  for i in range(students)]
+        totals = [sum(row) for row in scores]
+        subject_ranks = [rank_order([row[j] for row in scores]) for j in range(len(subjects))]
+        grade_ranks = rank_order(totals)
+        class_ranks = [0] * students
+        for class_name in set(class_names):
+            members = [i for i in range(students) if class_names[i] == class_name]
+            for i, rank in zip(members, rank_order([totals[i] for i in members])):
+                class_ranks[i] = rank
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append([title])
+        ws.append(header)
+        for i in range(students):
+            ws.append([names[i], class_names[i], 10000 + i] + scores[i] + [totals[i]]
+                      + [ranks[i] for ranks in subject_ranks] + [class_ranks[i], grade_ranks[i]])
+        path = os.path.join(out_dir, f"exam_{exam_idx:03d}.xlsx")
+        wb.save(path)
+        files.append(path)
+    return files
+
+
+def rank_order(values):
+    """按分数从高到低排名（并列取同一名次）"""
+    order = sorted(range(len(values)), key=lambda i: -values[i])
+    ranks = [0] * len(values)
+    for pos, i in enumerate(order):
+        ranks[i] = ranks[order[pos-1]] if pos and values[i] == values[order[pos-1]] else pos + 1
+    return ranks
+
+
+def time_call(func, repeat=5):
+    """多次运行并返回耗时统计（毫秒）"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - started) * 1000)
+    return {
+        'repeat': repeat,
+        'min_ms': round(min(times), 3),
+        'median_ms': round(statistics.median(times), 3),
+        'mean_ms': round(statistics.fmean(times), 3),
+        'max_ms': round(max(times), 3)
+    }
+
+
+def make_queries(names, count, rng):
+    """生成搜索词：完整姓名、姓名片段和输错一个字的姓名"""
+    queries = []
+    for name in rng.sample(names, min(count, len(names))):
+        kind = rng.randrange(3)
+        if kind == 1 and len(name) > 2:
+            name = name[:2]
+        elif kind == 2:
+            pos = rng.randrange(len(name))
+            name = name[:pos] + rng.choice(GIVEN_CHARS) + name[pos+1:]
+        queries.append(name)
+    return queries
+
+
+def run_benchmarks(data_folder, repeat=5, queries=200, workers=1, seed=0):
+    """运行各项基准测试，返回结果字典"""
+    rng = random.Random(seed)
+    files = qs.list_exam_files(data_folder)
+    results = {}
+
+    results['read_exam_file'] = time_call(lambda: qs.read_exam_file(files[0]), repeat)
+    results['read_exam_file']['rows'] = len(qs.read_exam_file(files[0]))
+    results['process_data'] = time_call(lambda: qs.process_data(data_folder, workers=workers), repeat)
+
+    cache_dir = tempfile.mkdtemp(prefix="bench_cache_")
+    try:
+        qs.process_data(data_folder, qs.ExamCache(cache_dir), workers)
+        results['process_data_cached'] = time_call(
+            lambda: qs.process_data(data_folder, qs.ExamCache(cache_dir), workers), repeat)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    exam_data = qs.process_data(data_folder, workers=workers)
+    names = list(exam_data['姓名'].unique())
+
+    results['build_indexes'] = time_call(
+        lambda: (qs.StudentIndex(exam_data), qs.NameSearchIndex(names), qs.ExamAggregates(exam_data)), repeat)
+    student_index = qs.StudentIndex(exam_data)
+    name_index = qs.NameSearchIndex(names)
+
+    search_terms = make_queries(names, queries, rng)
+    results['name_search'] = time_call(
+        lambda: [name_index.search(query, n=3, cutoff=0.6) for query in search_terms], repeat)
+    results['name_search']['queries'] = len(search_terms)
+
+    students = rng.sample(names, min(queries, len(names)))
+    results['student_lookup'] = time_call(
+        lambda: [exam_data.iloc[student_index.lookup(name)] for name in students], repeat)
+    results['student_lookup']['lookups'] = len(students)
+
+    records = [exam_data.iloc[student_index.lookup(name)] for name in students]
+    results['chart_data'] = time_call(lambda: [qs.prepare_chart_data(r) for r in records], repeat)
+    results['chart_data']['students'] = len(records)
+
+    snapshot_dir = tempfile.mkdtemp(prefix="bench_snapshot_")
+    try:
+        snapshot = os.path.join(snapshot_dir, "exams.arrow")
+        results['snapshot_export'] = time_call(
+            lambda: qs.export_snapshot(snapshot, exam_data, student_index), repeat)
+        results['snapshot_export']['bytes'] = os.path.getsize(snapshot)
+        results['snapshot_import'] = time_call(lambda: qs.import_snapshot(snapshot), repeat)
+        results['snapshot_import']['speedup_vs_process_data'] = round(
+            results['process_data']['median_ms'] / results['snapshot_import']['median_ms'], 1)
+    finally:
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+
+    results['dataset'] = {
+        'files': len(files),
+        'rows': len(exam_data),
+        'students': len(names),
+        'sessions': int(exam_data['考试场次'].nunique()),
+        'memory_mb': round(qs.memory_mb(exam_data), 2)
+    }
+    return results
+
+
+def environment():
+    """记录运行环境，便于比较结果"""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pandas': pd.__version__,
+        'openpyxl': openpyxl.__version__,
+        'pyarrow': qs.feather is not None,
+        'cpu_count': os.cpu_count()
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="成绩分析系统性能基准测试")
+    parser.add_argument('--data', help="使用已有的考试文件夹（不生成模拟数据）")
+    parser.add_argument('--students', type=int, default=400, help="每个考试文件的学生人数")
+    parser.add_argument('--exams', type=int, default=10, help="考试文件数量")
+    parser.add_argument('--classes', type=int, default=8, help="班级数量")
+    parser.add_argument('--subjects', type=int, default=6, help="科目数量（取 SUBJECT_SCHEMA 前若干科）")
+    parser.add_argument('--repeat', type=int, default=5, help="每项测试重复次数")
+    parser.add_argument('--queries', type=int, default=200, help="姓名搜索与学生查询次数")
+    parser.add_argument('--workers', type=int, default=1, help="并行解析进程数")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--keep', metavar='DIR', help="模拟数据保存到指定目录（默认使用临时目录并在结束后删除）")
+    parser.add_argument('--out', metavar='FILE', help="结果写入JSON文件（默认输出到标准输出）")
+    args = parser.parse_args(argv)
+
+    data_folder = args.data or args.keep or tempfile.mkdtemp(prefix="bench_exams_")
+    config = vars(args).copy()
+    try:
+        if not args.data:
+            started = time.perf_counter()
+            generate_workbooks(data_folder, args.students, args.exams, args.classes,
+                               qs.SUBJECT_SCHEMA[:args.subjects], args.seed)
+            config['generate_s'] = round(time.perf_counter() - started, 3)
+        # 加载过程中的日志输出到标准错误，保持标准输出为纯JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            results = run_benchmarks(data_folder, args.repeat, args.queries, args.workers, args.seed)
+        result = {
+            'version': 1,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'environment': environment(),
+            'config': config,
+            'results': results
+        }
+    finally:
+        if not (args.data or args.keep):
+            shutil.rmtree(data_folder, ignore_errors=True)
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
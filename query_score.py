@@ -1,77 +1,2558 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import os
+import io
+import re
+import json
+import time
+import argparse
+import queue
+import sqlite3
+import threading
+import heapq
+import bisect
+import hashlib
+import base64
+import zlib
+import cProfile
+import pstats
+from array import array
+from functools import lru_cache, wraps
+from collections import Counter, defaultdict, deque, namedtuple
 from glob import glob
+from fnmatch import fnmatchcase
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
-from difflib import get_close_matches
+from openpyxl import load_workbook
+from openpyxl.chartsheet import Chartsheet
+from difflib import SequenceMatcher
 
-def read_exam_file(file_path):
-    """安全读取考试文件"""
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow 为可选依赖：缺失时缓存退回 pickle，数据快照不可用
+    pa = feather = None
+
+CACHE_DIR_NAME = '.cache'
+LOAD_WORKERS = os.cpu_count() or 1
+SUGGEST_DELAY_MS = 150
+SUGGEST_LIMIT = 8
+WATCH_INTERVAL_MS = 3000
+REPORT_FORMATS = ('csv', 'json', 'html')
+AGGREGATE_PERCENTILES = (0.25, 0.75, 0.9)
+HIST_BIN_WIDTH = {'总分': 50}
+DEFAULT_BIN_WIDTH = 10
+SNAPSHOT_VERSION = 2
+STORE_VERSION = 2
+SNAPSHOT_META_KEY = b'score_snapshot'
+SNAPSHOT_NAME_ROWS = '__姓名行号'
+SNAPSHOT_KEY_ROWS = '__学生行号'
+SNAPSHOT_COMPRESSIONS = ('zstd', 'lz4', 'uncompressed')
+ARROW_MAGIC = b'ARROW1'
+PERF_ENV = 'SCORE_PERF'
+PERF_FILE_HISTORY = 500
+
+class PerfMonitor:
+    """可开关的性能计数器
+
+    记录各热点函数的调用次数、耗时直方图及读取文件的行数，可选用 cProfile
+    采集完整调用栈。关闭时每次调用只多一次属性判断。
+    设置环境变量 SCORE_PERF=1 可在启动时开启（进程池中的子进程同样生效）。
+    """
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.enabled = os.environ.get(PERF_ENV) == '1'
+        self.profiler = None
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空已记录的数据"""
+        with self.lock:
+            self.counters = Counter()
+            self.timings = {}
+            self.files = deque(maxlen=PERF_FILE_HISTORY)
+
+    def enable(self, profile=False):
+        """开启计数，profile=True 时同时启动（或在关闭后继续）cProfile 采集"""
+        self.enabled = True
+        os.environ[PERF_ENV] = '1'
+        if profile:
+            if self.profiler is None:
+                self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def disable(self):
+        """关闭计数并停止 cProfile"""
+        self.enabled = False
+        os.environ.pop(PERF_ENV, None)
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def record(self, name, seconds, **counts):
+        """记录一次耗时，counts 为附带的计数（如行数）"""
+        ms = seconds * 1000
+        with self.lock:
+            stat = self.timings.get(name)
+            if stat is None:
+                stat = self.timings[name] = {'count': 0, 'total_ms': 0.0, 'min_ms': ms, 'max_ms': ms,
+                                             'histogram': [0] * (len(self.BUCKETS_MS) + 1)}
+            stat['count'] += 1
+            stat['total_ms'] += ms
+            stat['min_ms'] = min(stat['min_ms'], ms)
+            stat['max_ms'] = max(stat['max_ms'], ms)
+            stat['histogram'][bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+            for key, value in counts.items():
+                self.counters[f"{name}.{key}"] += value
+
+    def count(self, name, value=1):
+        """累加计数器"""
+        with self.lock:
+            self.counters[name] += value
+
+    def record_file(self, file_path, seconds, rows):
+        """记录单个文件的读取耗时与行数"""
+        self.record('read_exam_file', seconds, rows=rows)
+        with self.lock:
+            self.files.append((os.path.basename(file_path), round(seconds * 1000, 3), rows))
+
+    def timed(self, name):
+        """装饰器：开启时记录函数耗时"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def drain(self):
+        """取出并清空本进程的记录（供进程池子进程回传）"""
+        with self.lock:
+            files, self.files = list(self.files), deque(maxlen=PERF_FILE_HISTORY)
+        return files
+
+    def merge(self, files):
+        """合并子进程回传的文件读取记录"""
+        for name, ms, rows in files:
+            self.record('read_exam_file', ms / 1000, rows=rows)
+            with self.lock:
+                self.files.append((name, ms, rows))
+
+    def snapshot(self):
+        """返回可序列化的统计数据"""
+        with self.lock:
+            timings = {}
+            for name, stat in self.timings.items():
+                timings[name] = dict(stat, mean_ms=stat['total_ms'] / stat['count'],
+                                     histogram=dict(zip([f"<={b}ms" for b in self.BUCKETS_MS] + ['>5000ms'],
+                                                        stat['histogram'])))
+            return {'timings': timings, 'counters': dict(self.counters),
+                    'files': [{'file': name, 'ms': ms, 'rows': rows} for name, ms, rows in self.files]}
+
+    def report(self, profile_lines=20):
+        """生成文字报告（调试面板与日志使用）"""
+        data = self.snapshot()
+        lines = [f"{'名称':<28}{'次数':>8}{'平均ms':>10}{'最小ms':>10}{'最大ms':>10}{'合计ms':>12}"]
+        for name, stat in sorted(data['timings'].items()):
+            lines.append(f"{name:<30}{stat['count']:>8}{stat['mean_ms']:>12.2f}{stat['min_ms']:>12.2f}"
+                         f"{stat['max_ms']:>12.2f}{stat['total_ms']:>14.1f}")
+            buckets = [f"{bucket}:{n}" for bucket, n in stat['histogram'].items() if n]
+            lines.append("    " + "  ".join(buckets))
+        if data['counters']:
+            lines.append("")
+            lines += [f"{name} = {value}" for name, value in sorted(data['counters'].items())]
+        if data['files']:
+            lines.append("")
+            lines += [f"{item['file']}　{item['ms']:.1f} ms　{item['rows']} 行" for item in data['files']]
+        if self.profiler is not None:
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats('cumulative').print_stats(profile_lines)
+            lines += ["", stream.getvalue()]
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """写出统计数据：.prof 为 cProfile 原始数据，.txt 为文字报告，其余为JSON"""
+        if path.endswith('.prof'):
+            if self.profiler is None:
+                raise ValueError("未开启 cProfile 采集")
+            self.profiler.dump_stats(path)
+        elif path.endswith('.txt'):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(self.report())
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+PERF = PerfMonitor()
+
+# 科目配置：成绩列、排名列及其表头别名（匹配时忽略空白字符）
+Subject = namedtuple('Subject', ['score', 'rank', 'score_aliases', 'rank_aliases'])
+SUBJECT_SCHEMA = [
+    Subject('语文', '语序', ('语文成绩',), ('语文排名', '语文名次')),
+    Subject('数学', '数序', ('数学成绩',), ('数学排名', '数学名次')),
+    Subject('英语', '英序', ('英语成绩', '外语'), ('英语排名', '英语名次', '外序')),
+    Subject('日语', '日序', ('日语成绩',), ('日语排名', '日语名次')),
+    Subject('物理', '物序', ('物理成绩',), ('物理排名', '物理名次')),
+    Subject('化学', '化序', ('化学成绩',), ('化学排名', '化学名次')),
+    Subject('生物', '生序', ('生物成绩',), ('生物排名', '生物名次')),
+    Subject('政治', '政序', ('政治成绩', '道德与法治', '道法'), ('政治排名', '政治名次', '道法序')),
+    Subject('历史', '历序', ('历史成绩',), ('历史排名', '历史名次')),
+    Subject('地理', '地序', ('地理成绩',), ('地理排名', '地理名次'))
+]
+TOTAL_ALIASES = {
+    '总分': ('总成绩',),
+    '班序': ('班级排名', '班名次', '班排'),
+    '级序': ('年级排名', '级名次', '级排', '校序')
+}
+REQUIRED_COLUMNS = ['姓名', '现班']
+
+SUBJECTS = [(subject.score, subject.rank) for subject in SUBJECT_SCHEMA]
+NUMERIC_COLS = [subject.score for subject in SUBJECT_SCHEMA] + ['总分']
+RANK_COLS = [subject.rank for subject in SUBJECT_SCHEMA] + ['班序', '级序']
+
+def header_key(name):
+    """表头匹配键：去除所有空白字符"""
+    return re.sub(r'\s+', '', name)
+
+def build_header_aliases():
+    """由科目配置生成 表头匹配键 -> (规范列名, 列类型)"""
+    aliases = {}
+    for subject in SUBJECT_SCHEMA:
+        for name in (subject.score,) + subject.score_aliases:
+            aliases[header_key(name)] = (subject.score, 'score')
+        for name in (subject.rank,) + subject.rank_aliases:
+            aliases[header_key(name)] = (subject.rank, 'rank')
+    for canonical, names in TOTAL_ALIASES.items():
+        kind = 'score' if canonical in NUMERIC_COLS else 'rank'
+        for name in (canonical,) + names:
+            aliases[header_key(name)] = (canonical, kind)
+    return aliases
+
+HEADER_ALIASES = build_header_aliases()
+SCHEMA_FINGERPRINT = hashlib.sha1(
+    json.dumps(sorted(HEADER_ALIASES.items()), ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+HeaderLayout = namedtuple('HeaderLayout', ['columns', 'kinds', 'missing'])
+
+@lru_cache(maxsize=None)
+def compile_header(header):
+    """将一种表头布局编译为规范列名与列类型，相同表头的文件直接复用"""
+    columns, kinds = [], []
+    for name in header:
+        canonical, kind = HEADER_ALIASES.get(header_key(name), (name, 'text'))
+        if kind != 'text' and canonical in columns:
+            # 同一科目出现多列时只取第一列，其余列按普通文本列保留
+            canonical, kind = f"{name}（重复）", 'text'
+        columns.append(canonical)
+        kinds.append(kind)
+    missing = tuple(col for col in REQUIRED_COLUMNS if col not in columns)
+    return HeaderLayout(tuple(columns), tuple(kinds), missing)
+
+def clean_text(value):
+    """清理单个文本单元格"""
+    return str(value).replace('\n', ' ').strip()
+
+def normalize_text_column(series):
+    """向量化清理文本列，空值保持不变"""
+    mask = series.notna()
+    result = series.astype(object)
+    result[mask] = series[mask].astype(str).str.replace('\n', ' ').str.strip()
+    return result.infer_objects()
+
+def to_number(value):
+    """将单元格值转换为浮点数，无法解析时返回NaN"""
+    if value is None or isinstance(value, bool):
+        return np.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except ValueError:
+        return np.nan
+
+INTEGER_TEXT = re.compile(r'\s*[+-]?\d+\s*$')
+
+def is_integer_cell(value):
+    """单元格是否为整数（与pandas.to_numeric的判断一致：整数或整数形式的文本）"""
+    if isinstance(value, str):
+        return INTEGER_TEXT.match(value) is not None
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def used_width(row):
+    """一行中最后一个非空单元格的列数"""
+    for idx in range(len(row) - 1, -1, -1):
+        if row[idx] is not None:
+            return idx + 1
+    return 0
+
+def read_sheet_rows(rows):
+    """从逐行迭代器读取一张考试表
+
+    第一行A1为考试场次，第二行为列标题，第三行起为学生数据。
+    列标题校验失败时立即停止，不再读取后续数据行；
+    成绩与排名列直接写入定长数值缓冲区。
+    列数按整张表（含数据行）的实际宽度计算；成绩列全部为整数时为int64，
+    有小数、缺失或无法解析的值时为float64，与按整表读取时的类型一致。
+    """
+    rows = iter(rows)
+    first_row = next(rows, None)
+    header_row = next(rows, None)
+    if header_row is None:
+        raise ValueError("文件行数不足3行")
+
+    header = list(header_row)
+    while header and header[-1] is None:
+        header.pop()
+    sheet_width = max(len(header), used_width(first_row or ()))
+
+    session_cell = first_row[0] if first_row and first_row[0] is not None else np.nan
+    exam_session = clean_text(session_cell)
+    layout = compile_header(tuple(clean_text(col if col is not None else np.nan) for col in header))
+    if layout.missing:
+        raise ValueError(f"缺少必要列: {', '.join(layout.missing)}")
+
+    columns, kinds = list(layout.columns), layout.kinds
+    width = len(columns)
+    buffers = [[] if kind == 'text' else array('d') for kind in kinds]
+    integral = [kind == 'score' for kind in kinds]
+
+    def append_row(row):
+        for idx in range(width):
+            value = row[idx] if idx < len(row) else None
+            if kinds[idx] == 'text':
+                buffers[idx].append(value)
+                continue
+            buffers[idx].append(to_number(value))
+            if integral[idx] and not is_integer_cell(value):
+                integral[idx] = False
+
+    # 中间的空行保留，末尾的空行丢弃
+    row_count = 0
+    pending_blank = 0
+    for row in rows:
+        if sheet_width < 5:
+            sheet_width = max(sheet_width, used_width(row))
+        if all(value is None for value in row[:width]):
+            pending_blank += 1
+            continue
+        for _ in range(pending_blank):
+            append_row(())
+        row_count += pending_blank + 1
+        pending_blank = 0
+        append_row(row)
+    
+    if row_count == 0:
+        raise ValueError("文件行数不足3行")
+    if sheet_width < 5:
+        raise ValueError("列数不足")
+
+    data = {}
+    for idx, (kind, buffer) in enumerate(zip(kinds, buffers)):
+        if kind == 'text':
+            data[idx] = normalize_text_column(pd.Series(buffer, dtype=object))
+            continue
+        values = pd.Series(np.frombuffer(buffer, dtype=np.float64)).fillna(0)
+        data[idx] = values.astype(np.int64) if kind == 'rank' or integral[idx] else values
+    
+    data_df = pd.DataFrame(data)
+    data_df.columns = columns
+    data_df.index = pd.RangeIndex(2, 2 + row_count)
+    data_df['考试场次'] = exam_session
+    return data_df
+
+def parse_sheet_spec(text):
+    """解析工作表选择：逗号分隔的序号（从1开始）或名称（支持*通配符），空表示全部"""
+    if not text:
+        return None
+    return tuple(part.strip() for part in str(text).split(',') if part.strip()) or None
+
+def select_sheets(workbook, sheets=None):
+    """按选择条件返回工作表列表（保持工作簿中的顺序）
+
+    序号按工作簿中全部表（含图表页）计算，与Excel中看到的顺序一致；图表页没有单元格，选中时跳过。
+    """
+    names = workbook.sheetnames
+    if sheets:
+        selected = set()
+        for spec in sheets:
+            if spec.isdigit():
+                if 1 <= int(spec) <= len(names):
+                    selected.add(int(spec) - 1)
+            else:
+                selected.update(idx for idx, name in enumerate(names) if fnmatchcase(name, spec))
+        names = [names[idx] for idx in sorted(selected)]
+    return [workbook[name] for name in names if not isinstance(workbook[name], Chartsheet)]
+
+def merge_sheet_frames(frames):
+    """合并同一工作簿中多个工作表的数据
+
+    按班级分表时直接拼接；按科目分组分表时同一学生出现在多个表中，
+    按 (姓名, 现班, 考试场次) 合并为一行（同表内的同名学生按出现顺序区分）。
+    """
+    if len(frames) == 1:
+        return frames[0]
+    keys = ['姓名', '现班', '考试场次']
+    combined = pd.concat(frames, ignore_index=True)
+    if not combined.duplicated(keys).any():
+        return combined
+    occurrence = pd.concat([df.groupby(keys, sort=False, dropna=False).cumcount() for df in frames],
+                           ignore_index=True)
+    return (combined.assign(_序号=occurrence)
+            .groupby(keys + ['_序号'], sort=False, dropna=False, as_index=False).first()
+            .drop(columns='_序号'))
+
+def read_exam_file(file_path, sheets=None):
+    """安全读取考试文件（只读模式逐行解析）
+
+    一次打开工作簿读取全部（或sheets选定的）工作表，每个工作表按同样的
+    A1场次/第2行表头规则解析，不符合格式的工作表跳过。
+    """
+    started = time.perf_counter()
     try:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"文件不存在: {file_path}")
         if os.path.getsize(file_path) == 0:
             raise ValueError("空文件")
         
-        df_raw = pd.read_excel(file_path, header=None, engine='openpyxl')
-        df_raw = df_raw.map(lambda x: str(x).replace('\n', ' ').strip() if pd.notnull(x) else x)
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            frames = []
+            for sheet in select_sheets(workbook, sheets):
+                try:
+                    frames.append(read_sheet_rows(sheet.iter_rows(values_only=True)))
+                except ValueError as e:
+                    print(f"[WARN] 跳过工作表: {os.path.basename(file_path)} [{sheet.title}] - {str(e)}")
+        finally:
+            workbook.close()
+        if not frames:
+            raise ValueError("没有符合格式的工作表")
+        df = merge_sheet_frames(frames)
+    
+    except Exception as e:
+        print(f"[ERROR] 文件加载失败: {os.path.basename(file_path)} - {str(e)}")
+        df = pd.DataFrame()
+    
+    if PERF.enabled:
+        PERF.record_file(file_path, time.perf_counter() - started, len(df))
+    return df
+
+def read_exam_file_traced(file_path, sheets=None):
+    """进程池中读取文件，同时带回子进程记录的耗时"""
+    return read_exam_file(file_path, sheets), PERF.drain()
+
+def write_frame(df, path_base):
+    """以列式二进制格式写出DataFrame，返回实际文件路径"""
+    if feather is not None:
+        path = path_base + '.feather'
+        try:
+            feather.write_feather(df.reset_index(drop=True), path)
+            return path
+        except Exception:
+            # 重复列名、混合类型列等无法写入Arrow时退回pickle
+            if os.path.exists(path):
+                os.remove(path)
+    path = path_base + '.pkl'
+    df.to_pickle(path)
+    return path
+
+def read_frame(path):
+    """读取write_frame写出的文件"""
+    if path.endswith('.feather'):
+        return feather.read_feather(path)
+    return pd.read_pickle(path)
+
+def file_sha1(file_path):
+    """计算文件内容哈希"""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ExamCache:
+    """考试文件解析缓存
+
+    以 路径+大小+修改时间 作为键保存read_exam_file的结果，
+    文件未变化时直接读取二进制缓存，跳过Excel解析。
+    use_hash=True 时修改时间变化但内容哈希一致的文件仍视为命中。
+    sheets 为读取的工作表选择，选择变化后缓存失效。
+    缓存只用于加速：目录无法创建或写入失败（只读文件夹、网络共享、磁盘已满）时
+    输出警告并停用写入，照常解析文件。
+    """
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, cache_dir, use_hash=False, sheets=None):
+        self.cache_dir = cache_dir
+        self.use_hash = use_hash
+        self.sheet_key = ','.join(sheets) if sheets else '*'
+        self.hits = 0
+        self.misses = 0
+        self.writable = True
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError as e:
+            self.disable(e)
+        self.manifest = self._load_manifest()
+
+    def disable(self, error):
+        """停用缓存写入，本次运行不再尝试"""
+        if self.writable:
+            print(f"[WARN] 缓存不可写，本次不保存解析结果: {self.cache_dir} - {str(error)}")
+        self.writable = False
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.cache_dir, self.MANIFEST), encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # 科目配置或工作表选择变化后旧缓存不再可靠：删除旧缓存文件，全部重新解析
+        if manifest.get('schema') != SCHEMA_FINGERPRINT or manifest.get('sheets') != self.sheet_key:
+            for entry in manifest.get('files', {}).values():
+                self._remove_file(entry['file'])
+            return {}
+        return manifest.get('files', {})
+
+    def save(self):
+        """写回缓存清单"""
+        if not self.writable:
+            return
+        path = os.path.join(self.cache_dir, self.MANIFEST)
+        try:
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'schema': SCHEMA_FINGERPRINT, 'sheets': self.sheet_key, 'files': self.manifest},
+                          f, ensure_ascii=False)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            self.disable(e)
+
+    def _lookup(self, file_path):
+        """返回仍然有效的缓存条目"""
+        entry = self.manifest.get(os.path.abspath(file_path))
+        if not entry:
+            return None
+        st = os.stat(file_path)
+        if entry['size'] != st.st_size:
+            return None
+        if entry['mtime'] == st.st_mtime_ns:
+            return entry
+        if self.use_hash and entry.get('sha1') == file_sha1(file_path):
+            entry['mtime'] = st.st_mtime_ns
+            return entry
+        return None
+
+    def get(self, file_path):
+        """读取缓存，未命中时返回None"""
+        try:
+            entry = self._lookup(file_path)
+            if entry is not None:
+                df = read_frame(os.path.join(self.cache_dir, entry['file']))
+                self.hits += 1
+                return df
+        except Exception as e:
+            print(f"[WARN] 缓存读取失败: {os.path.basename(file_path)} - {str(e)}")
+        self.misses += 1
+        return None
+
+    def put(self, file_path, df):
+        """写入解析结果，写入失败时停用缓存写入"""
+        if not self.writable:
+            return
+        key = os.path.abspath(file_path)
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        old = self.manifest.pop(key, None)
+        try:
+            if old:
+                self._remove_file(old['file'])
+            st = os.stat(file_path)
+            path = write_frame(df, os.path.join(self.cache_dir, name))
+            self.manifest[key] = {
+                'size': st.st_size,
+                'mtime': st.st_mtime_ns,
+                'sha1': file_sha1(file_path) if self.use_hash else None,
+                'file': os.path.basename(path)
+            }
+        except Exception as e:
+            for ext in ('.feather', '.pkl'):
+                self._remove_file(name + ext)
+            self.disable(e)
+
+    def prune(self, file_paths):
+        """清理已不存在的文件对应的缓存"""
+        keep = {os.path.abspath(p) for p in file_paths}
+        self.discard([k for k in self.manifest if k not in keep])
+
+    def discard(self, file_paths):
+        """删除指定文件的缓存"""
+        for path in file_paths:
+            entry = self.manifest.pop(os.path.abspath(path), None)
+            if entry:
+                self._remove_file(entry['file'])
+
+    def _remove_file(self, name):
+        try:
+            os.remove(os.path.join(self.cache_dir, name))
+        except OSError:
+            pass
+
+    def summary(self):
+        """缓存命中统计"""
+        summary = f"缓存命中 {self.hits} 个，重新解析 {self.misses} 个"
+        return summary if self.writable else summary + "（缓存不可写）"
+
+# 考试场次的时间先后：学年、学期及学期内的阶段
+SESSION_TERMS = ((re.compile(r'第一学期|上学期|秋季|秋学期'), 1),
+                 (re.compile(r'第二学期|下学期|春季|春学期'), 2))
+SESSION_STAGES = ((re.compile(r'开学|入学|摸底'), 5),
+                  (re.compile(r'期中'), 50),
+                  (re.compile(r'期末'), 90))
+CN_NUMBERS = {'一': 1, '二': 2, '三': 3, '四': 4, '五': 5, '六': 6, '七': 7, '八': 8, '九': 9, '十': 10}
+
+def parse_count(text):
+    """解析"第N次"中的阿拉伯或中文数字"""
+    return int(text) if text.isdigit() else CN_NUMBERS.get(text, 0)
+
+def date_session_key(year, month, day=1):
+    """由日期计算场次序：9月起为新学年第一学期，2月起为第二学期"""
+    school_year = year if month >= 8 else year - 1
+    term = 1 if month >= 8 or month == 1 else 2
+    offset = (month - 8) % 12 if term == 1 else month - 2
+    return school_year*1000 + term*100 + min(offset*16 + day//2, 99)
+
+@lru_cache(maxsize=None)
+def parse_session_key(title):
+    """从考试场次标题解析时间先后的序号（学年*1000 + 学期*100 + 学期内位置）
+
+    支持"2023学年第一学期期中考试"、"2024年春季第二次月考"、"2023.11.08 联考"
+    等写法；标题中没有年份时返回 None。
+    """
+    text = str(title)
+    date = re.search(r'(20\d{2})\s*[年.\-/]\s*(\d{1,2})(?:\s*[月.\-/]\s*(\d{1,2}))?', text)
+    if date and 1 <= int(date.group(2)) <= 12:
+        return date_session_key(int(date.group(1)), int(date.group(2)), int(date.group(3) or 1))
+    
+    year = re.search(r'(20\d{2})', text)
+    if year is None:
+        return None
+    term = next((value for pattern, value in SESSION_TERMS if pattern.search(text)), 0)
+    school_year = int(year.group(1))
+    if re.search(r'20\d{2}\s*届', text):
+        # "2025届"为毕业年份，对应2024学年
+        school_year -= 1
+    elif term == 2 and not re.search(r'20\d{2}\s*(?:-\s*20\d{2}\s*)?学年', text):
+        # "2024年春季"按自然年书写，属于2023学年
+        school_year -= 1
+    
+    position = next((value for pattern, value in SESSION_STAGES if pattern.search(text)), 0)
+    sequence = re.search(r'第([一二三四五六七八九十\d]+)次', text)
+    mock = re.search(r'([一二三四五六七八九十\d])模|第([一二三四五六七八九十\d]+)次模拟', text)
+    if mock:
+        # 高三模拟考试在第二学期
+        term = term or 2
+        position = 10 * parse_count(mock.group(1) or mock.group(2))
+    elif sequence and not position:
+        # 第一次月考在期中之前，其余在期中之后
+        count = parse_count(sequence.group(1))
+        position = 25 if count == 1 else min(50 + 10*(count - 1), 85)
+    return school_year*1000 + term*100 + position
+
+def session_sort_key(title, file_path=None):
+    """考试场次的排序键：依次尝试标题、文件名和文件修改时间，都无法识别时为0"""
+    key = parse_session_key(title)
+    if key is None and file_path is not None:
+        key = parse_session_key(os.path.splitext(os.path.basename(file_path))[0])
+        if key is None and os.path.exists(file_path):
+            modified = time.localtime(os.path.getmtime(file_path))
+            key = date_session_key(modified.tm_year, modified.tm_mon, modified.tm_mday)
+    return key or 0
+
+def tag_exam_frame(file, df):
+    """为单个文件的数据加上来源文件和场次序（每个考试场次只解析一次标题）"""
+    keys = {session: session_sort_key(session, file) for session in df['考试场次'].unique()}
+    return df.assign(来源文件=os.path.basename(file),
+                     场次序=df['考试场次'].map(keys).astype(np.int32))
+
+def chronological_order(data):
+    """每行记录的时间先后排序键：场次序相同（如无法识别日期）时按考试场次标题排序"""
+    sessions = data['考试场次']
+    if isinstance(sessions.dtype, pd.CategoricalDtype):
+        cats = sessions.cat.categories
+        lexical = np.empty(len(cats), dtype=np.int64)
+        lexical[cats.argsort()] = np.arange(len(cats))
+        ranks, count = lexical[sessions.cat.codes.to_numpy()], len(cats)
+    else:
+        codes, uniques = pd.factorize(sessions, sort=True)
+        ranks, count = codes.astype(np.int64), len(uniques)
+    if SESSION_ORDER_COL not in data.columns:
+        return ranks
+    return data[SESSION_ORDER_COL].to_numpy(dtype=np.int64) * max(count, 1) + ranks
+
+def sort_by_session(data, by=('姓名',)):
+    """按指定列及考试时间先后排序"""
+    keys = list(by) + [col for col in (SESSION_ORDER_COL, '考试场次') if col in data.columns]
+    return data.sort_values(keys, kind='stable')
+
+def parse_exam_files(files, workers=1, sheets=None):
+    """解析多个考试文件，按files的顺序逐个产出 (文件, DataFrame)
+
+    workers>1 时使用进程池并行解析，结果仍按提交顺序返回，合并后的行顺序固定；
+    单个文件失败只记录错误，不影响其余文件。
+    """
+    if workers <= 1 or len(files) <= 1:
+        for file in files:
+            yield file, read_exam_file(file, sheets)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        reader = read_exam_file_traced if PERF.enabled else read_exam_file
+        futures = [(file, pool.submit(reader, file, sheets)) for file in files]
+        for file, future in futures:
+            try:
+                df = future.result()
+                if reader is read_exam_file_traced:
+                    df, files_timed = df
+                    PERF.merge(files_timed)
+            except Exception as e:
+                print(f"[ERROR] 文件加载失败: {os.path.basename(file)} - {str(e)}")
+                df = pd.DataFrame()
+            yield file, df
+
+def list_exam_files(data_folder):
+    """列出数据文件夹中的考试文件（按文件名排序，跳过Excel的~$临时锁文件）"""
+    return sorted(file for file in glob(os.path.join(data_folder, "*.xlsx"))
+                  if not os.path.basename(file).startswith('~$'))
+
+def iter_exam_frames(files, cache=None, workers=1, prune=True, sheets=None):
+    """按files的顺序逐个产出 (文件, DataFrame)，缓存未命中的文件在进程池中并行解析
+
+    非空结果带有"来源文件"列，用于文件变化时定位对应的记录，
+    以及由考试场次标题解析出的"场次序"列，用于按时间先后排序；
+    prune=True 表示files为完整文件列表，同时清理其余文件的缓存。
+    """
+    cached, pending = {}, []
+    for file in files:
+        df = cache.get(file) if cache is not None else None
+        if df is None:
+            pending.append(file)
+        else:
+            cached[file] = df
+    
+    parsed = parse_exam_files(pending, workers, sheets)
+    for file in files:
+        if file in cached:
+            yield file, tag_exam_frame(file, cached.pop(file))
+            continue
+        _, df = next(parsed)
+        if cache is not None and not df.empty:
+            cache.put(file, df)
+        if not df.empty:
+            df = tag_exam_frame(file, df)
+        yield file, df
+    
+    if cache is not None:
+        if prune:
+            cache.prune(files)
+        cache.save()
+
+class FolderWatcher:
+    """轮询监视考试文件夹，按 (大小, 修改时间) 快照找出变化的文件"""
+
+    def __init__(self, data_folder):
+        self.data_folder = data_folder
+        self.snapshot = self.scan()
+
+    def scan(self):
+        """记录当前所有考试文件的大小与修改时间"""
+        snapshot = {}
+        for file in list_exam_files(self.data_folder):
+            try:
+                st = os.stat(file)
+            except OSError:
+                continue
+            snapshot[file] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def poll(self):
+        """返回自上次检查以来 (新增, 修改, 删除) 的文件"""
+        current = self.scan()
+        added = [file for file in current if file not in self.snapshot]
+        modified = [file for file in current
+                    if file in self.snapshot and current[file] != self.snapshot[file]]
+        removed = [file for file in self.snapshot if file not in current]
+        self.snapshot = current
+        return added, modified, removed
+
+CATEGORY_COLS = ['姓名', '现班', '学号', '考试场次', '来源文件']
+SESSION_ORDER_COL = '场次序'
+STUDENT_KEY = '学生标识'
+
+def memory_mb(df):
+    """DataFrame占用内存（MB）"""
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
+
+def downcast_scores(series):
+    """成绩列降为最小且不损失精度的类型"""
+    if series.notna().all() and (series % 1 == 0).all():
+        return pd.to_numeric(series, downcast='integer')
+    as_float32 = series.astype(np.float32)
+    if ((as_float32 == series) | series.isna()).all():
+        return as_float32
+    return series.astype(np.float64)
+
+def compact_exam_data(data):
+    """压缩合并后的考试数据
+
+    只保留界面使用的列；姓名/现班/考试场次转为分类类型，
+    成绩与排名降为最小安全类型（缺失排名按0处理，与单文件读取一致）。
+    """
+    keep = [col for col in CATEGORY_COLS + [SESSION_ORDER_COL] + NUMERIC_COLS + RANK_COLS if col in data.columns]
+    compact = data[keep].copy()
+    for col in keep:
+        compact[col] = compact_column(col, compact[col])
+    return compact
+
+def compact_column(col, series):
+    """按列的用途压缩单列"""
+    if col in CATEGORY_COLS:
+        return series.astype('category')
+    if col in NUMERIC_COLS:
+        return downcast_scores(series)
+    if col in RANK_COLS:
+        return pd.to_numeric(series.fillna(0).astype(np.int64), downcast='integer')
+    if col == SESSION_ORDER_COL:
+        return series.astype(np.int32)
+    return series
+
+def concat_compact(data, new_data):
+    """追加已压缩的数据，合并分类类型的类别以保持分类存储（不修改传入的DataFrame）
+
+    只在一方存在的列（如新文件多出某科）拼接后另一方为缺失值，按 compact_exam_data
+    的规则重新压缩：缺失排名按0处理，与一次性合并全部文件的结果一致。
+    """
+    old_cols, new_cols = {}, {}
+    for col in CATEGORY_COLS:
+        if col not in data.columns or col not in new_data.columns:
+            continue
+        old_cats = data[col].cat.categories
+        cats = old_cats.append(new_data[col].cat.categories.difference(old_cats))
+        old_cols[col] = data[col].cat.set_categories(cats)
+        new_cols[col] = new_data[col].cat.set_categories(cats)
+    combined = pd.concat([data.assign(**old_cols), new_data.assign(**new_cols)], ignore_index=True)
+    for col in set(data.columns).symmetric_difference(new_data.columns):
+        combined[col] = compact_column(col, combined[col])
+    return combined
+
+def combine_exam_frames(frames):
+    """合并多个考试文件的数据"""
+    combined = pd.concat(frames, ignore_index=True)
+    
+    combined['姓名'] = combined['姓名'].str.strip()
+    combined['考试场次'] = combined['考试场次'].str.replace('\n', ' ')
+    if '学号' in combined.columns:
+        combined['学号'] = normalize_student_ids(combined['学号'])
+    
+    return combined
+
+def normalize_student_ids(series):
+    """学号统一为文本：去掉空白及数字单元格带来的“.0”，空白学号为缺失值"""
+    ids = series.astype(object)
+    mask = ids.notna()
+    ids[mask] = ids[mask].astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    return ids.where(ids.notna() & (ids != ''), None)
+
+def student_keys(data):
+    """每条记录所属学生的标识，与姓名一起唯一确定一名学生
+
+    有学号时以学号区分；某姓名只对应一个学号时，该姓名缺少学号的记录也归于这个学号。
+    没有学号的记录按姓名归并（转班前后仍是同一人），只有同一场考试中出现多次的姓名
+    （同名学生）才以班级区分；其余学生的标识为空字符串。
+    """
+    names = pd.Series(data['姓名'].astype(object).to_numpy())
+    if '学号' in data.columns:
+        ids = pd.Series(data['学号'].astype(object).to_numpy())
+        ids = ids.where(ids.notna() & (ids != ''))
+        known = ids.notna()
+        per_name = ids[known].groupby(names[known]).agg(['nunique', 'first'])
+        ids = ids.where(known, names.map(per_name.loc[per_name['nunique'] == 1, 'first']))
+    else:
+        ids = pd.Series(np.nan, index=names.index, dtype=object)
+    
+    missing = ids.isna().to_numpy()
+    unnamed = pd.DataFrame({'姓名': names[missing], '考试场次': data['考试场次'].astype(object).to_numpy()[missing]})
+    homonyms = unnamed.loc[unnamed.duplicated(keep=False), '姓名'].unique()
+    classes = data['现班'].astype(object).fillna('').to_numpy()
+    keys = np.where(missing, np.where(names.isin(homonyms), classes, ''), ids.to_numpy())
+    return keys.astype(object)
+
+@PERF.timed('process_data')
+def process_data(data_folder, cache=None, workers=1, sheets=None):
+    """处理考试数据文件夹（结果按文件名顺序合并）"""
+    all_files = list_exam_files(data_folder)
+    frames = dict(iter_exam_frames(all_files, cache, workers, sheets=sheets))
+    valid_dfs = [frames[file] for file in all_files if not frames[file].empty]
+    
+    if cache is not None:
+        print(f"[CACHE] {cache.summary()}")
+    
+    if not valid_dfs:
+        raise ValueError("没有找到有效考试文件")
+    
+    combined = combine_exam_frames(valid_dfs)
+    compact = compact_exam_data(combined)
+    print(f"[MEMORY] 考试数据 {memory_mb(combined):.1f} MB -> {memory_mb(compact):.1f} MB")
+    return compact
+
+def build_student_reports(exam_data):
+    """一次分组计算全部学生每次考试的成绩、排名及变化，返回 (明细表, 汇总表)
+
+    学生按 (姓名, 学生标识) 区分（见 student_keys），转班学生的全部考试归于同一行；
+    汇总表的现班为最近一次考试所在班级。
+    """
+    report_cols = []
+    for score_col, rank_col in SUBJECTS + [('总分', '班序'), (None, '级序')]:
+        report_cols += [col for col in (score_col, rank_col) if col in exam_data.columns]
+    
+    student = ['姓名', STUDENT_KEY]
+    keyed = exam_data.assign(**{STUDENT_KEY: student_keys(exam_data)})
+    detail = (sort_by_session(keyed, by=student)[student + ['现班', '考试场次'] + report_cols]
+              .reset_index(drop=True))
+    grouped = detail.groupby(student, sort=False, observed=True)
+    detail.insert(4, '考试序号', grouped.cumcount() + 1)
+    
+    aggregations = {
+        '现班': ('现班', 'last'),
+        '考试次数': ('考试场次', 'count')
+    }
+    if '总分' in detail.columns:
+        detail['总分变化'] = grouped['总分'].diff().fillna(0)
+        aggregations.update({
+            '平均总分': ('总分', 'mean'),
+            '最高总分': ('总分', 'max'),
+            '最低总分': ('总分', 'min'),
+            '首次总分': ('总分', 'first'),
+            '最新总分': ('总分', 'last')
+        })
+    for col in ('班序', '级序'):
+        if col in detail.columns:
+            # 名次数值变小即为进步
+            detail[f'{col}进步'] = (-grouped[col].diff()).fillna(0).astype(int)
+            aggregations[f'最新{col}'] = (col, 'last')
+    
+    summary = grouped.agg(**aggregations).reset_index()
+    if '总分' in detail.columns:
+        summary['平均总分'] = summary['平均总分'].round(1)
+        summary['总分趋势'] = summary['最新总分'] - summary['首次总分']
+    metrics = compute_student_metrics(exam_data).reset_index()[student + METRIC_COLS]
+    summary = summary.merge(metrics, on=student, how='left')
+    return detail, summary
+
+METRIC_COLS = ['总分斜率', '总分波动', '最近级序变化', '累计级序进步', '最大级序进步', '优势学科', '薄弱学科']
+
+def compute_student_metrics(exam_data):
+    """一次分组计算全部学生的成长指标，返回以 (姓名, 学生标识) 为索引的DataFrame
+
+    现班：最近一次考试所在班级；考试次数：参加的考试场次数；总分斜率：总分对考试序号的最小二乘斜率（分/次）；
+    总分波动：总分标准差；级序变化：相邻两次考试的年级名次差（正数为进步）；
+    优势/薄弱学科：各科在每场考试年级内的标准分，取平均后最高/最低的科目。
+    成绩为0或缺失、名次为0视为缺考，不参与计算；没有姓名的行不计入任何学生。
+    """
+    exam_data = exam_data[exam_data['姓名'].notna()]
+    data = sort_by_session(exam_data.assign(**{STUDENT_KEY: student_keys(exam_data)}), by=('姓名', STUDENT_KEY))
+    name_codes, names = pd.factorize(data['姓名'], use_na_sentinel=False)
+    key_codes, keys = pd.factorize(data[STUDENT_KEY], use_na_sentinel=False)
+    codes, pairs = pd.factorize(name_codes.astype(np.int64) * len(keys) + key_codes)
+    index = pd.MultiIndex.from_arrays([names[pairs // len(keys)], keys[pairs % len(keys)]],
+                                      names=['姓名', STUDENT_KEY])
+    same_student = np.r_[False, codes[1:] == codes[:-1]]
+    latest_class = data['现班'].astype(object).groupby(codes, sort=False).last().to_numpy()
+    
+    # 总分趋势：按组累加 n、Σx、Σy、Σxx、Σxy、Σyy 后直接求斜率与方差
+    x = data.groupby(codes, sort=False).cumcount().to_numpy(dtype=float)
+    y = data['总分'].to_numpy(dtype=float) if '总分' in data.columns else np.full(len(data), np.nan)
+    valid = ~np.isnan(y) & (y > 0)
+    x, y = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+    
+    rank = data['级序'].to_numpy(dtype=float) if '级序' in data.columns else np.full(len(data), np.nan)
+    rank[rank <= 0] = np.nan
+    delta = np.where(same_student, np.r_[np.nan, rank[:-1]] - rank, np.nan)
+    
+    grouped = pd.DataFrame({
+        'n': valid.astype(float), 'x': x, 'y': y, 'xx': x*x, 'xy': x*y, 'yy': y*y, 'delta': delta
+    }).groupby(codes, sort=False)
+    sums = grouped[['n', 'x', 'y', 'xx', 'xy', 'yy']].sum().to_numpy().T
+    deltas = grouped['delta'].agg(['last', 'sum', 'max', 'count']).to_numpy().T
+    
+    # 学科优劣：每场考试内标准化后按学生取平均
+    subjects = [score for score, _ in SUBJECTS if score in data.columns]
+    strength = np.empty((len(index), 0))
+    if subjects:
+        scores = data[subjects].astype(float)
+        scores = scores.where(scores > 0)
+        by_session = scores.groupby(data['考试场次'].to_numpy(), sort=False)
+        zscores = (scores - by_session.transform('mean')) / by_session.transform('std')
+        strength = zscores.groupby(codes, sort=False).mean().to_numpy()
+    exams = data['考试场次'].groupby(codes, sort=False, observed=True).nunique().to_numpy()
+    return assemble_student_metrics(index, latest_class, exams, sums, deltas, subjects, strength)
+
+def assemble_student_metrics(index, classes, exams, sums, deltas, subjects, strength):
+    """由按学生汇总的中间量计算成长指标（内存数据与数据库查询共用）
+
+    classes 为各学生最近所在班级；sums 为 n、Σx、Σy、Σxx、Σxy、Σyy（只含有效总分）；deltas 为最近一次、累计、最大级序变化
+    及有效变化次数；strength 为各科平均标准分（学生 × 科目）。
+    """
+    n, sx, sy, sxx, sxy, syy = sums
+    last, total, best, count = deltas
+    with np.errstate(invalid='ignore', divide='ignore'):
+        denom = n*sxx - sx*sx
+        slope = np.where(denom > 0, (n*sxy - sx*sy) / denom, np.nan)
+        variance = np.where(n > 1, (syy - sy*sy/n) / (n - 1), np.nan)
+    
+    metrics = pd.DataFrame({
+        '现班': np.asarray(classes, dtype=object),
+        '考试次数': np.asarray(exams, dtype=int),
+        '总分斜率': np.round(slope, 2),
+        '总分波动': np.round(np.sqrt(np.clip(variance, 0, None)), 2),
+        '最近级序变化': last,
+        '累计级序进步': np.where(count > 0, total, np.nan),
+        '最大级序进步': best
+    }, index=index)
+    
+    if subjects:
+        has_score = ~np.isnan(strength).all(axis=1)
+        labels = np.array(subjects, dtype=object)
+        best_subject = np.argmax(np.where(np.isnan(strength), -np.inf, strength), axis=1)
+        worst_subject = np.argmin(np.where(np.isnan(strength), np.inf, strength), axis=1)
+        metrics['优势学科'] = np.where(has_score, labels[best_subject], None)
+        metrics['薄弱学科'] = np.where(has_score, labels[worst_subject], None)
+    else:
+        metrics['优势学科'] = metrics['薄弱学科'] = None
+    return metrics
+
+def empty_student_metrics():
+    """没有数据时的成长指标表"""
+    return pd.DataFrame(columns=['现班', '考试次数'] + METRIC_COLS,
+                        index=pd.MultiIndex.from_tuples([], names=['姓名', STUDENT_KEY]))
+
+def most_improved(metrics, by='累计级序进步'):
+    """按进步幅度从大到小排列全年级学生（缺少数据的排在最后）"""
+    secondary = '总分斜率' if by != '总分斜率' else '累计级序进步'
+    return metrics.sort_values([by, secondary], ascending=False, na_position='last', kind='stable')
+
+def describe_metrics(row):
+    """将一名学生的成长指标格式化为一行文字"""
+    parts = []
+    if pd.notna(row['总分斜率']):
+        parts.append(f"总分趋势 {row['总分斜率']:+.1f} 分/次")
+    if pd.notna(row['总分波动']):
+        parts.append(f"波动 ±{row['总分波动']:.1f}")
+    if pd.notna(row['累计级序进步']):
+        recent = row['最近级序变化']
+        parts.append(f"级序累计 {row['累计级序进步']:+.0f}，最近 {'—' if pd.isna(recent) else f'{recent:+.0f}'}")
+    if row['优势学科']:
+        parts.append(f"优势 {row['优势学科']} · 薄弱 {row['薄弱学科']}")
+    return "　".join(parts)
+
+REPORT_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: '微软雅黑', sans-serif; color: #2C3E50; background: #F4F7F7; margin: 20px; }}
+table {{ border-collapse: collapse; background: white; margin-bottom: 30px; }}
+th, td {{ border: 1px solid #D6DBDF; padding: 4px 8px; text-align: center; }}
+th {{ background: #3498DB; color: white; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<h2>学生汇总</h2>
+{summary}
+<h2>考试明细</h2>
+{detail}
+</body>
+</html>
+"""
+
+def safe_filename(name):
+    """将班级名称转换为合法文件名"""
+    return re.sub(r'[\\/:*?"<>|\s]+', '_', str(name)).strip('_') or '未分班'
+
+def write_reports(detail, summary, out_dir, formats=REPORT_FORMATS):
+    """按班级批量写出报告，返回写出的文件数"""
+    os.makedirs(out_dir, exist_ok=True)
+    written = 0
+    
+    # 学生归入最近一次考试所在班级的报告，转班学生的明细包含转班前的考试；没有班级的学生归入“未分班”
+    student = ['姓名', STUDENT_KEY]
+    classes = summary['现班'].astype(object).fillna('未分班').to_numpy()
+    archive = detail[student].merge(summary[student].assign(归档班级=classes), on=student, how='left')['归档班级']
+    details_by_class = dict(tuple(detail.groupby(archive.to_numpy(), sort=False)))
+    
+    for class_name, class_summary in summary.groupby(classes, sort=True):
+        class_detail = details_by_class[class_name]
+        base = os.path.join(out_dir, safe_filename(class_name))
+        if 'csv' in formats:
+            class_summary.to_csv(base + '_汇总.csv', index=False, encoding='utf-8-sig')
+            class_detail.to_csv(base + '_明细.csv', index=False, encoding='utf-8-sig')
+            written += 2
+        if 'json' in formats:
+            with open(base + '.json', 'w', encoding='utf-8') as f:
+                json.dump({
+                    '班级': class_name,
+                    '汇总': class_summary.to_dict('records'),
+                    '明细': class_detail.to_dict('records')
+                }, f, ensure_ascii=False, default=str)
+            written += 1
+        if 'html' in formats:
+            with open(base + '.html', 'w', encoding='utf-8') as f:
+                f.write(REPORT_HTML.format(
+                    title=f"{class_name} 成绩报告",
+                    summary=class_summary.to_html(index=False, float_format='{:.1f}'.format),
+                    detail=class_detail.to_html(index=False, float_format='{:.1f}'.format)))
+            written += 1
+    
+    if 'csv' in formats:
+        summary.to_csv(os.path.join(out_dir, '年级汇总.csv'), index=False, encoding='utf-8-sig')
+        written += 1
+    return written
+
+def generate_reports(data_folder, out_dir, formats=REPORT_FORMATS, workers=LOAD_WORKERS, sheets=None):
+    """命令行批量报告：读取考试数据并为全部学生生成报告"""
+    started = time.perf_counter()
+    cache = ExamCache(os.path.join(data_folder, CACHE_DIR_NAME), sheets=sheets)
+    exam_data = process_data(data_folder, cache, workers, sheets)
+    detail, summary = build_student_reports(exam_data)
+    written = write_reports(detail, summary, out_dir, formats)
+    print(f"[REPORT] 学生 {len(summary)} 人，班级 {summary['现班'].nunique()} 个，"
+          f"写出 {written} 个文件到 {out_dir}，用时 {time.perf_counter() - started:.1f} 秒")
+
+def format_score(value):
+    """格式化分数，缺失值显示为破折号"""
+    return "—" if pd.isna(value) else f"{value:.1f}"
+
+def rank_value(value):
+    """名次转为整数，缺失时按0处理"""
+    return int(value) if pd.notna(value) else 0
+
+def format_diff(value):
+    """格式化带符号的分差"""
+    return "—" if pd.isna(value) else f"{value:+.1f}"
+
+def student_label(name, class_name=None, student_id=None):
+    """学生的显示名称：附带班级（及学号）以区分同名学生"""
+    details = [str(value) for value in (class_name,) if value is not None and pd.notna(value) and value != '']
+    if student_id is not None and pd.notna(student_id) and student_id != '':
+        details.append(f"学号 {student_id}")
+    return f"{name}（{'，'.join(details)}）" if details else str(name)
+
+def bin_width(col):
+    """分数段宽度"""
+    return HIST_BIN_WIDTH.get(col, DEFAULT_BIN_WIDTH)
+
+def natural_key(text):
+    """自然排序键：高一(2)班 排在 高一(10)班 之前"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', str(text))]
+
+class ExamAggregates:
+    """考试统计量查找表
+
+    按 (考试场次, 现班) 和 考试场次 预先计算各科及总分的平均分、中位数、
+    最高分、最低分、分位数和人数，界面显示时只做字典查找。
+    另外记录实际参考人数 ('size', '人数') 及固定宽度分数段的人数分布
+    ('bin{i}', 科目)，第i段为 [i*宽度, (i+1)*宽度)；年级统计中另存该场考试的
+    场次序 ('order', '场次序')，用于按时间先后排列考试场次。
+    """
+
+    def __init__(self, data=None):
+        self.by_class = {}
+        self.by_session = {}
+        if data is not None and not data.empty:
+            self.update(data)
+
+    def update(self, data, sessions=None):
+        """重新计算指定考试场次（默认全部）的统计量（没有姓名的行不计入）"""
+        data = data[data['姓名'].notna()]
+        if sessions is not None:
+            data = data[data['考试场次'].isin(sessions)]
+        cols = [col for col in NUMERIC_COLS if col in data.columns]
+        # 0分表示缺考或未选该科，不计入统计
+        scores = data[['考试场次', '现班']].join(data[cols].where(data[cols] > 0))
+        for keys, target in ((['考试场次', '现班'], self.by_class), ('考试场次', self.by_session)):
+            grouped = scores.groupby(keys, observed=True)
+            summary = self._summarize(grouped[cols])
+            for key, size in grouped.size().items():
+                summary[key][('size', '人数')] = size
+            key_cols = [scores[col] for col in (keys if isinstance(keys, list) else [keys])]
+            for col in cols:
+                bins = scores[col] // bin_width(col)
+                for (*key, idx), count in scores.groupby(key_cols + [bins], observed=True).size().items():
+                    summary[tuple(key) if len(key) > 1 else key[0]][(f'bin{int(idx)}', col)] = count
+            if target is self.by_session and SESSION_ORDER_COL in data.columns:
+                orders = data.groupby('考试场次', observed=True)[SESSION_ORDER_COL].min()
+                for key, order in orders.items():
+                    summary[key][('order', SESSION_ORDER_COL)] = order
+            target.update(summary)
+
+    def copy(self):
+        """复制查找表（各统计量字典共用，update 只替换整项）"""
+        aggregates = ExamAggregates()
+        aggregates.by_class, aggregates.by_session = dict(self.by_class), dict(self.by_session)
+        return aggregates
+
+    def discard(self, sessions):
+        """删除指定考试场次的统计量"""
+        sessions = set(sessions)
+        self.by_session = {key: value for key, value in self.by_session.items() if key not in sessions}
+        self.by_class = {key: value for key, value in self.by_class.items() if key[0] not in sessions}
+
+    @staticmethod
+    def _summarize(grouped):
+        stats = {
+            'mean': grouped.mean(),
+            'median': grouped.median(),
+            'max': grouped.max(),
+            'min': grouped.min(),
+            'count': grouped.count()
+        }
+        for q in AGGREGATE_PERCENTILES:
+            stats[f'p{round(q * 100)}'] = grouped.quantile(q)
+        return pd.concat(stats, axis=1).to_dict('index')
+
+    def value(self, stat, col, session, class_name=None):
+        """查询统计量，class_name为None时返回年级统计"""
+        if class_name is None:
+            table = self.by_session.get(session)
+        else:
+            table = self.by_class.get((session, class_name))
+        if not table:
+            return np.nan
+        return table.get((stat, col), np.nan)
+
+    def rows(self):
+        """展开为 (考试场次, 班级或None, 统计量, 列, 值) 行，用于持久化"""
+        rows = [(session, class_name, stat, col, float(value))
+                for (session, class_name), table in self.by_class.items()
+                for (stat, col), value in table.items() if pd.notna(value)]
+        rows += [(session, None, stat, col, float(value))
+                 for session, table in self.by_session.items()
+                 for (stat, col), value in table.items() if pd.notna(value)]
+        return rows
+
+    @classmethod
+    def from_rows(cls, rows):
+        """由 rows() 的结果还原查找表"""
+        aggregates = cls()
+        for session, class_name, stat, col, value in rows:
+            if class_name is None:
+                table = aggregates.by_session.setdefault(session, {})
+            else:
+                table = aggregates.by_class.setdefault((session, class_name), {})
+            table[(stat, col)] = value
+        return aggregates
+
+    def cohort_size(self, session, class_name=None):
+        """实际参考人数（班级或年级），未知时返回None"""
+        size = self.value('size', '人数', session, class_name)
+        return None if pd.isna(size) else int(size)
+
+    def histogram(self, col, session, class_name=None):
+        """分数段分布，返回 [(段下限, 段上限, 人数)]（只含有人的分数段）"""
+        table = (self.by_session.get(session) if class_name is None
+                 else self.by_class.get((session, class_name))) or {}
+        width = bin_width(col)
+        bins = sorted(int(stat[3:]) for stat, c in table if c == col and stat.startswith('bin'))
+        return [(idx * width, (idx + 1) * width, int(table[(f'bin{idx}', col)])) for idx in bins]
+
+    def sessions(self):
+        """全部考试场次（按时间先后）：使用读取时记录的场次序，旧数据没有时由标题解析"""
+        def order(session):
+            value = self.value('order', SESSION_ORDER_COL, session)
+            return (session_sort_key(session) if pd.isna(value) else int(value), session)
+        return sorted(self.by_session, key=order)
+
+    def classes(self, session):
+        """某场考试的全部班级（按班号自然排序）"""
+        return sorted((class_name for s, class_name in self.by_class if s == session), key=natural_key)
+
+class SQLiteExamStore:
+    """SQLite考试记录存储
+
+    可选的存储后端：解析结果写入本地数据库，按姓名、考试场次、班级建立索引，
+    查询学生记录时只读取该姓名的行；统计量也预先写入数据库。
+    冷启动只需打开数据库文件，内存占用不随历史数据增长。
+    """
+    TEXT_COLS = ['姓名', '现班', '学号', '考试场次', '来源文件']
+
+    def __init__(self, db_path, sheets=None):
+        self.db_path = db_path
+        self.sheets = sheets
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.create_schema()
+
+    def create_schema(self):
+        """建表、补齐科目配置中新增的列并建立索引；数据库版本变化时重新计算统计量"""
+        typed = ([(col, 'TEXT') for col in self.TEXT_COLS] + [(col, 'REAL') for col in NUMERIC_COLS]
+                 + [(col, 'INTEGER') for col in RANK_COLS + [SESSION_ORDER_COL]])
+        columns = [f'"{col}" {sql_type}' for col, sql_type in typed]
+        with self.lock, self.conn:
+            self.conn.execute(f'CREATE TABLE IF NOT EXISTS records ({", ".join(columns)})')
+            existing = {row[1] for row in self.conn.execute('PRAGMA table_info(records)')}
+            added = [(col, sql_type) for col, sql_type in typed if col not in existing]
+            for col, sql_type in added:
+                self.conn.execute(f'ALTER TABLE records ADD COLUMN "{col}" {sql_type}')
+            self.conn.executescript('''
+                CREATE INDEX IF NOT EXISTS idx_records_order ON records("姓名", "场次序");
+                CREATE INDEX IF NOT EXISTS idx_records_session ON records("考试场次");
+                CREATE INDEX IF NOT EXISTS idx_records_class ON records("现班", "考试场次");
+                CREATE INDEX IF NOT EXISTS idx_records_source ON records("来源文件");
+                CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, size INTEGER, mtime INTEGER);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+                CREATE TABLE IF NOT EXISTS aggregates (
+                    session TEXT, class_name TEXT, stat TEXT, col TEXT, value REAL);
+                CREATE INDEX IF NOT EXISTS idx_aggregates_session ON aggregates(session);
+            ''')
+            sheet_key = ','.join(self.sheets) if self.sheets else '*'
+            stored = self.conn.execute("SELECT value FROM meta WHERE key = 'sheets'").fetchone()
+            if added or (stored is not None and stored[0] != sheet_key):
+                # 表结构或工作表选择变化后旧记录不再可靠，清空文件记录使下次同步重新写入
+                self.conn.execute('DELETE FROM files')
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('sheets', ?)", (sheet_key,))
+            version = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        
+        if version is None or version[0] != str(STORE_VERSION):
+            # 统计量的内容随版本增加（人数、分数段、场次序），旧数据库由已有记录重新计算
+            self.refresh_aggregates(self.sessions())
+            with self.lock, self.conn:
+                self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(STORE_VERSION),))
+
+    def sync(self, data_folder, workers=1, progress=None):
+        """将新增或修改的文件写入数据库，删除已移除文件的记录
+
+        返回 (写入文件数, 删除文件数, 失败文件列表)。
+        """
+        files = list_exam_files(data_folder)
+        stats = {}
+        for file in files:
+            st = os.stat(file)
+            stats[file] = (st.st_size, st.st_mtime_ns)
+        with self.lock:
+            known = {name: (size, mtime) for name, size, mtime
+                     in self.conn.execute('SELECT name, size, mtime FROM files')}
+        
+        changed = [file for file in files if known.get(os.path.basename(file)) != stats[file]]
+        current = {os.path.basename(file) for file in files}
+        removed = [name for name in known if name not in current]
+        
+        sessions = set()
+        for name in removed:
+            sessions |= self.remove_source(name)
+        
+        failed = []
+        for done, (file, df) in enumerate(iter_exam_frames(changed, None, workers, prune=False,
+                                                           sheets=self.sheets), 1):
+            if df.empty:
+                # 解析失败时保留原有记录
+                failed.append(os.path.basename(file))
+            else:
+                sessions |= self.replace_source(file, combine_exam_frames([df]), stats[file])
+            if progress is not None:
+                progress(done, len(changed), file)
+        
+        self.refresh_aggregates(sessions)
+        return len(changed) - len(failed), len(removed), failed
+
+    def _sessions_of(self, name):
+        return {row[0] for row in self.conn.execute(
+            'SELECT DISTINCT "考试场次" FROM records WHERE "来源文件" = ?', (name,))}
+
+    def remove_source(self, name):
+        """删除某个文件的全部记录，返回受影响的考试场次"""
+        with self.lock, self.conn:
+            sessions = self._sessions_of(name)
+            self.conn.execute('DELETE FROM records WHERE "来源文件" = ?', (name,))
+            self.conn.execute('DELETE FROM files WHERE name = ?', (name,))
+        return sessions
+
+    def replace_source(self, file, df, stat):
+        """用新解析的数据替换某个文件的记录，返回受影响的考试场次"""
+        name = os.path.basename(file)
+        cols = [col for col in self.TEXT_COLS + [SESSION_ORDER_COL] + NUMERIC_COLS + RANK_COLS if col in df.columns]
+        values = df[cols].astype(object).where(df[cols].notna(), None)
+        placeholders = ', '.join('?' * len(cols))
+        col_sql = ', '.join(f'"{col}"' for col in cols)
+        
+        with self.lock, self.conn:
+            sessions = self._sessions_of(name) | set(df['考试场次'].unique())
+            self.conn.execute('DELETE FROM records WHERE "来源文件" = ?', (name,))
+            self.conn.executemany(f'INSERT INTO records ({col_sql}) VALUES ({placeholders})',
+                                  values.itertuples(index=False, name=None))
+            self.conn.execute('INSERT OR REPLACE INTO files (name, size, mtime) VALUES (?, ?, ?)',
+                              (name,) + tuple(stat))
+        return sessions
+
+    def query(self, sql, params=()):
+        """执行查询并返回DataFrame，成绩列转为数值、缺失排名按0处理"""
+        with self.lock:
+            df = pd.read_sql_query(sql, self.conn, params=params)
+        for col in NUMERIC_COLS:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce')
+        for col in RANK_COLS + [SESSION_ORDER_COL]:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+        return df
+
+    def student_records(self, name, key=None):
+        """查询一名学生的全部记录（按考试时间先后排序），key 为学生标识，用于区分同名学生"""
+        records = self.query('SELECT * FROM records WHERE "姓名" = ? ORDER BY "场次序", "考试场次", rowid',
+                             (name,))
+        if key is None or records.empty:
+            return records
+        return records[student_keys(records) == key].reset_index(drop=True)
+
+    def keys_of(self, name):
+        """姓名对应的全部学生标识（多于一个即为同名学生）"""
+        records = self.query('SELECT "姓名", "现班", "学号", "考试场次" FROM records WHERE "姓名" = ?', (name,))
+        return sorted(set(student_keys(records)), key=natural_key)
+
+    def all_records(self):
+        """读取全部记录（计算全年级指标时使用）"""
+        return self.query('SELECT * FROM records ORDER BY "姓名", "场次序", "考试场次", rowid')
+
+    def student_metrics(self):
+        """在数据库中汇总全部学生的成长指标（与 compute_student_metrics 结果一致）
+
+        学生标识按 student_keys 的规则在SQL中求出；按学生累加斜率、波动、级序变化和
+        学科标准分所需的中间量，只读出每名学生一行，不把全部记录载入内存。
+        """
+        subjects = [score for score, _ in SUBJECTS]
+        valid = {col: f'CASE WHEN r."{col}" > 0 THEN r."{col}" END' for col in subjects}
+        session_sql = ', '.join(f'COUNT({valid[col]}), TOTAL({valid[col]}), TOTAL({valid[col]} * {valid[col]})'
+                                for col in subjects)
+        z_cols = ', '.join(f'({valid[col]} - s."{col}_mean") / s."{col}_std" AS "z_{col}"' for col in subjects)
+        z_means = ', '.join(f'AVG("z_{col}")' for col in subjects)
+        sql = f'''
+            WITH single_ids AS (
+                SELECT "姓名" AS name, MIN("学号") AS sid FROM records WHERE "学号" <> ''
+                GROUP BY "姓名" HAVING COUNT(DISTINCT "学号") = 1
+            ), filled AS (
+                SELECT r.rowid AS rid, COALESCE(NULLIF(r."学号", ''), i.sid) AS sid
+                FROM records r LEFT JOIN single_ids i ON i.name = r."姓名"
+            ), homonyms AS (
+                SELECT DISTINCT r."姓名" AS name FROM records r JOIN filled f ON f.rid = r.rowid
+                WHERE f.sid IS NULL GROUP BY r."姓名", r."考试场次" HAVING COUNT(*) > 1
+            ), keyed AS (
+                SELECT r.rowid AS rid, r.*, COALESCE(f.sid, CASE WHEN h.name IS NULL THEN ''
+                                                             ELSE COALESCE(r."现班", '') END) AS student_key
+                FROM records r JOIN filled f ON f.rid = r.rowid LEFT JOIN homonyms h ON h.name = r."姓名"
+                WHERE r."姓名" IS NOT NULL
+            ), ordered AS (
+                SELECT r."姓名" AS name, r.student_key, r."现班" AS class_name, r."考试场次" AS session,
+                       ROW_NUMBER() OVER student - 1 AS x,
+                       CASE WHEN r."总分" > 0 THEN r."总分" END AS y,
+                       CASE WHEN r."级序" > 0 THEN r."级序" END AS rank, {z_cols}
+                FROM keyed r LEFT JOIN temp.session_stats s ON s.session = r."考试场次"
+                WINDOW student AS (PARTITION BY r."姓名", r.student_key ORDER BY r."场次序", r."考试场次", r.rid)
+            ), changes AS (
+                SELECT *, LAG(rank) OVER (PARTITION BY name, student_key ORDER BY x) - rank AS delta
+                FROM ordered
+            ), recent AS (
+                SELECT name, student_key, delta AS last_delta, MAX(x) FROM changes
+                WHERE delta IS NOT NULL GROUP BY name, student_key
+            ), latest AS (
+                SELECT name, student_key, class_name, MAX(CASE WHEN class_name IS NOT NULL THEN x END) FROM ordered
+                GROUP BY name, student_key
+            )
+            SELECT c.name, c.student_key, latest.class_name, COUNT(DISTINCT c.session),
+                   COUNT(y), TOTAL(CASE WHEN y IS NOT NULL THEN x END), TOTAL(y),
+                   TOTAL(CASE WHEN y IS NOT NULL THEN x * x END), TOTAL(x * y), TOTAL(y * y),
+                   MAX(recent.last_delta), TOTAL(delta), MAX(delta), COUNT(delta), {z_means}
+            FROM changes c
+            LEFT JOIN recent ON recent.name IS c.name AND recent.student_key IS c.student_key
+            LEFT JOIN latest ON latest.name IS c.name AND latest.student_key IS c.student_key
+            GROUP BY c.name, c.student_key ORDER BY c.name, c.student_key
+        '''
+        with self.lock:
+            # 每场考试各科的平均分与标准差（样本标准差）写入临时表
+            stats = self.conn.execute(
+                f'SELECT r."考试场次", {session_sql} FROM records r WHERE r."姓名" IS NOT NULL '
+                f'GROUP BY r."考试场次"').fetchall()
+            columns = ', '.join(f'"{col}_mean" REAL, "{col}_std" REAL' for col in subjects)
+            self.conn.execute(f'CREATE TEMP TABLE IF NOT EXISTS session_stats (session TEXT PRIMARY KEY, {columns})')
+            self.conn.execute('DELETE FROM temp.session_stats')
+            self.conn.executemany(
+                f'INSERT INTO temp.session_stats VALUES ({", ".join("?" * (1 + 2*len(subjects)))})',
+                [self._session_stat_row(row, len(subjects)) for row in stats])
+            rows = self.conn.execute(sql).fetchall()
+        
+        if not rows:
+            return empty_student_metrics()
+        values = np.array([row[3:] for row in rows], dtype=float)
+        index = pd.MultiIndex.from_tuples([row[:2] for row in rows], names=['姓名', STUDENT_KEY])
+        return assemble_student_metrics(index, [row[2] for row in rows], values[:, 0], values[:, 1:7].T,
+                                        values[:, 7:11].T, subjects, values[:, 11:])
+
+    @staticmethod
+    def _session_stat_row(row, count):
+        """由 (考试场次, 各科 人数/总和/平方和) 计算各科平均分与标准差"""
+        result = [row[0]]
+        for idx in range(count):
+            n, total, squares = row[1 + 3*idx: 4 + 3*idx]
+            mean = total / n if n else None
+            variance = (squares - total*total/n) / (n - 1) if n > 1 else None
+            result += [mean, float(np.sqrt(max(variance, 0))) if variance is not None else None]
+        return result
+
+    def session_records(self, session):
+        """查询一场考试的全部记录"""
+        return self.query('SELECT * FROM records WHERE "考试场次" = ?', (session,))
+
+    def sessions(self):
+        """全部考试场次"""
+        with self.lock:
+            return [row[0] for row in self.conn.execute('SELECT DISTINCT "考试场次" FROM records')]
+
+    def names(self):
+        """全部学生姓名"""
+        with self.lock:
+            return [row[0] for row in self.conn.execute('SELECT DISTINCT "姓名" FROM records')]
+
+    def summary(self):
+        """返回 (记录数, 考试次数, 学生人数)"""
+        with self.lock:
+            return self.conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT "考试场次"), COUNT(DISTINCT "姓名") FROM records').fetchone()
+
+    def refresh_aggregates(self, sessions):
+        """逐场考试重新计算统计量并写入数据库（每次只读取一场考试的数据）"""
+        for session in sessions:
+            rows = ExamAggregates(self.session_records(session)).rows()
+            with self.lock, self.conn:
+                self.conn.execute('DELETE FROM aggregates WHERE session = ?', (session,))
+                self.conn.executemany('INSERT INTO aggregates VALUES (?, ?, ?, ?, ?)', rows)
+
+    def load_aggregates(self):
+        """从数据库读取统计量查找表"""
+        with self.lock:
+            rows = self.conn.execute('SELECT session, class_name, stat, col, value FROM aggregates').fetchall()
+        return ExamAggregates.from_rows(rows)
+
+class StudentIndex:
+    """学生索引：姓名 及 (姓名, 学生标识) -> 按考试时间先后排好序的行号
+
+    学生标识见 student_keys，转班学生的全部记录归于同一标识；
+    name_keys 记录每个姓名对应的标识（多于一个即为同名学生）。
+    """
+
+    def __init__(self, data=None):
+        self.by_name = {}
+        self.by_key = {}
+        self.name_keys = {}
+        if data is not None:
+            self.extend(data)
+
+    def extend(self, data, start=0):
+        """为data中从第start行开始的新增记录更新索引"""
+        new = data.iloc[start:]
+        if new.empty:
+            return
+        
+        sessions = chronological_order(data)
+        order = np.argsort(sessions[start:], kind='stable')
+        positions = order + start
+        sorted_new = new.iloc[order]
+        
+        groups = sorted_new.groupby('姓名', sort=False, observed=True).indices
+        for key, idx in groups.items():
+            self._merge(self.by_name, key, positions[idx], sessions)
+        self._rekey(data, list(groups))
+
+    def copy(self):
+        """复制索引（行号数组共用，extend/remove 只替换不修改）"""
+        index = StudentIndex()
+        index.by_name, index.by_key, index.name_keys = dict(self.by_name), dict(self.by_key), dict(self.name_keys)
+        return index
+
+    def _rekey(self, data, names, order=None):
+        """重新划分这些姓名下的学生（学生标识取决于该姓名的全部记录）
+
+        order 不为None时索引中的行号指删除后的新位置，对应 data 中的第 order[行号] 行。
+        """
+        for name in names:
+            for key in self.name_keys.pop(name, ()):
+                del self.by_key[(name, key)]
+        names = [name for name in names if name in self.by_name]
+        if not names:
+            return
+        rows = np.concatenate([self.by_name[name] for name in names])
+        subset = data.iloc[rows if order is None else order[rows]]
+        keys = student_keys(subset)
+        groups = pd.DataFrame({'姓名': subset['姓名'].astype(object).to_numpy(), 'key': keys}
+                              ).groupby(['姓名', 'key'], sort=False).indices
+        for (name, key), idx in groups.items():
+            self.by_key[(name, key)] = rows[idx]
+            self.name_keys.setdefault(name, []).append(key)
+        for name in names:
+            self.name_keys[name].sort(key=natural_key)
+
+    def remove(self, data, mask):
+        """删除mask标记的行并增量修正索引，返回新数据应依次取的行号
+
+        被删除的位置由末尾保留下来的行填补，只有被删除或被移动的行所属的学生需要更新，
+        其余学生的行号不变。调用方以 data.take(返回值) 得到删除后的数据。
+        """
+        removed = np.flatnonzero(mask)
+        keep = len(data) - len(removed)
+        holes = removed[removed < keep]
+        moved = np.flatnonzero(~mask[keep:]) + keep
+        
+        affected = data.iloc[np.concatenate([removed, moved])]
+        names = [name for name in affected['姓名'].unique() if pd.notna(name)]
+        for name in names:
+            self._remap(self.by_name, name, removed, moved, holes)
+        
+        order = np.arange(keep)
+        order[holes] = moved
+        self._rekey(data, names, order)
+        return order
+
+    @staticmethod
+    def _remap(index, key, removed, moved, holes):
+        """去掉已删除的行号，被移动的行改为新位置；该键已无记录时删除并返回True"""
+        rows = index[key]
+        rows = rows[~np.isin(rows, removed)]
+        if not len(rows):
+            del index[key]
+            return True
+        idx = np.minimum(np.searchsorted(moved, rows), max(len(moved) - 1, 0))
+        hit = moved[idx] == rows if len(moved) else np.zeros(len(rows), dtype=bool)
+        rows[hit] = holes[idx[hit]]
+        index[key] = rows
+        return False
+
+    @staticmethod
+    def _merge(index, key, rows, sessions):
+        existing = index.get(key)
+        if existing is not None:
+            rows = np.concatenate([existing, rows])
+            rows = rows[np.argsort(sessions[rows], kind='stable')]
+        index[key] = rows
+
+    def packed(self):
+        """打包为两组 (键列表, 各键行数, 拼接的行号)，用于写入快照"""
+        def pack(index):
+            keys = list(index)
+            rows = np.concatenate([index[key] for key in keys]) if keys else np.empty(0, dtype=np.intp)
+            return keys, [len(index[key]) for key in keys], rows
+        return pack(self.by_name), pack(self.by_key)
+
+    @classmethod
+    def unpack(cls, by_name, by_key):
+        """由 packed() 的结果还原索引（各学生的行号为拼接数组的切片，不复制）"""
+        index = cls()
+        for target, (keys, counts, rows) in ((index.by_name, by_name), (index.by_key, by_key)):
+            bounds = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+            for key, low, high in zip(keys, bounds[:-1], bounds[1:]):
+                target[key] = rows[low:high]
+        for name, key in index.by_key:
+            index.name_keys.setdefault(name, []).append(key)
+        for keys in index.name_keys.values():
+            keys.sort(key=natural_key)
+        return index
+
+    def lookup(self, name, key=None):
+        """返回学生记录的行号（已按考试时间先后排序），key 为学生标识"""
+        if key is None:
+            rows = self.by_name.get(name)
+        else:
+            rows = self.by_key.get((name, key))
+        return rows if rows is not None else np.empty(0, dtype=np.intp)
+
+    def keys(self, name):
+        """姓名对应的全部学生标识（多于一个即为同名学生）"""
+        return self.name_keys.get(name, [])
+
+def _pad_rows(rows, length):
+    """行号数组补齐到数据行数（未建索引的行以-1填充），以便作为列保存"""
+    padded = np.full(length, -1, dtype=np.int32)
+    padded[:len(rows)] = rows
+    return padded
+
+def require_pyarrow():
+    """数据快照只使用 Arrow 格式（不反序列化任意对象），未安装 pyarrow 时报错"""
+    if feather is None:
+        raise ValueError("数据快照需要安装 pyarrow（pip install pyarrow）")
+
+def export_snapshot(path, exam_data, student_index=None, aggregates=None, compression='zstd'):
+    """导出快照：考试数据连同学生索引、统计量写入单个压缩的 Arrow IPC 文件
+
+    compression='uncompressed' 时读取可直接内存映射。返回写出的文件大小（字节）。
+    """
+    require_pyarrow()
+    student_index = student_index if student_index is not None else StudentIndex(exam_data)
+    aggregates = aggregates if aggregates is not None else ExamAggregates(exam_data)
+    (names, name_counts, name_rows), (pairs, pair_counts, pair_rows) = student_index.packed()
+    meta = {
+        'version': SNAPSHOT_VERSION,
+        'schema': SCHEMA_FINGERPRINT,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'rows': len(exam_data),
+        'names': [str(name) for name in names],
+        'name_counts': name_counts,
+        'student_keys': [[str(name), str(key)] for name, key in pairs],
+        'student_key_counts': pair_counts,
+        'aggregates': aggregates.rows()
+    }
+    frame = exam_data.reset_index(drop=True).assign(**{
+        SNAPSHOT_NAME_ROWS: _pad_rows(name_rows, len(exam_data)),
+        SNAPSHOT_KEY_ROWS: _pad_rows(pair_rows, len(exam_data))
+    })
+    
+    tmp_path = path + '.tmp'
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    packed_meta = base64.b64encode(zlib.compress(json.dumps(meta, ensure_ascii=False).encode('utf-8')))
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), SNAPSHOT_META_KEY: packed_meta})
+    feather.write_feather(table, tmp_path, compression=compression)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+def import_snapshot(path):
+    """读取快照，返回 (考试数据, 学生索引, 统计量, 快照信息)，不解析任何Excel文件
+
+    科目配置（SUBJECT_SCHEMA 及表头别名）与导出时不同的快照拒绝载入。
+    """
+    require_pyarrow()
+    with open(path, 'rb') as f:
+        magic = f.read(len(ARROW_MAGIC))
+    if magic != ARROW_MAGIC:
+        raise ValueError("不是有效的成绩快照文件")
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    packed_meta = (table.schema.metadata or {}).get(SNAPSHOT_META_KEY)
+    if packed_meta is None:
+        raise ValueError("不是有效的成绩快照文件")
+    meta = json.loads(zlib.decompress(base64.b64decode(packed_meta)).decode('utf-8'))
+    
+    if meta.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"快照版本 {meta.get('version')} 不受支持（当前版本 {SNAPSHOT_VERSION}）")
+    if meta.get('schema') != SCHEMA_FINGERPRINT:
+        raise ValueError(f"快照的科目配置（{meta.get('schema')}）与当前程序（{SCHEMA_FINGERPRINT}）不一致，"
+                         f"请用当前程序重新导出快照")
+    
+    frame = table.to_pandas()
+    rows = len(frame)
+    name_rows = frame.pop(SNAPSHOT_NAME_ROWS).to_numpy(dtype=np.intp)
+    key_rows = frame.pop(SNAPSHOT_KEY_ROWS).to_numpy(dtype=np.intp)
+    student_index = StudentIndex.unpack(
+        (meta['names'], meta['name_counts'], name_rows[:sum(meta['name_counts'])]),
+        ([tuple(pair) for pair in meta['student_keys']], meta['student_key_counts'],
+         key_rows[:sum(meta['student_key_counts'])]))
+    aggregates = ExamAggregates.from_rows(meta['aggregates'])
+    if rows != meta['rows']:
+        raise ValueError("快照数据不完整")
+    return frame, student_index, aggregates, meta
+
+class NameSearchIndex:
+    """姓名模糊搜索索引
+
+    按单字建立倒排表，用共有字数（即SequenceMatcher.quick_ratio）剪枝后
+    再计算精确相似度，返回结果与difflib.get_close_matches一致；
+    同时维护有序姓名表用于前缀匹配。
+    """
+
+    def __init__(self, names=()):
+        self.names = []
+        self.postings = {}
+        self.add(names)
+
+    def add(self, names):
+        """加入新姓名（重复和空值自动忽略）"""
+        new_names = [name for name in dict.fromkeys(names)
+                     if isinstance(name, str) and name and name not in self.postings.get(name[0], ())]
+        if not new_names:
+            return
+        
+        # 联想线程可能同时读取索引，先构建新表再整体替换
+        postings = dict(self.postings)
+        touched = set()
+        for name in new_names:
+            for char, count in Counter(name).items():
+                if char not in touched:
+                    postings[char] = dict(postings.get(char, {}))
+                    touched.add(char)
+                postings[char][name] = count
+        self.postings = postings
+        self.names = sorted(set(self.names).union(new_names))
+
+    def copy(self):
+        """复制索引（add/remove 整体替换各表，副本可共用现有的表）"""
+        index = NameSearchIndex()
+        index.names, index.postings = self.names, self.postings
+        return index
+
+    def remove(self, names):
+        """移除已不存在的姓名"""
+        names = {name for name in names if isinstance(name, str)}
+        if not names:
+            return
+        
+        postings = dict(self.postings)
+        touched = set()
+        for name in names:
+            for char in set(name):
+                if char not in postings:
+                    continue
+                if char not in touched:
+                    postings[char] = dict(postings[char])
+                    touched.add(char)
+                postings[char].pop(name, None)
+        self.postings = postings
+        self.names = [name for name in self.names if name not in names]
+
+    def search(self, query, n=3, cutoff=0.6):
+        """返回最相似的n个姓名"""
+        if not query:
+            return []
+        
+        postings = self.postings
+        common = defaultdict(int)
+        for char, count in Counter(query).items():
+            for name, name_count in postings.get(char, {}).items():
+                common[name] += min(count, name_count)
+        
+        matcher = SequenceMatcher()
+        matcher.set_seq2(query)
+        results = []
+        for name, matches in common.items():
+            if 2.0 * matches / (len(name) + len(query)) < cutoff:
+                continue
+            matcher.set_seq1(name)
+            score = matcher.ratio()
+            if score >= cutoff:
+                results.append((score, name))
+        return [name for score, name in heapq.nlargest(n, results)]
+
+    def prefix(self, query, limit=10):
+        """返回以query开头的姓名"""
+        if not query:
+            return []
+        start = bisect.bisect_left(self.names, query)
+        results = []
+        for name in self.names[start:start + limit]:
+            if not name.startswith(query):
+                break
+            results.append(name)
+        return results
+
+    def suggest(self, query, limit=SUGGEST_LIMIT, cutoff=0.6):
+        """输入联想：优先前缀匹配，不足时补充模糊匹配"""
+        results = self.prefix(query, limit)
+        if len(results) < limit:
+            results += [name for name in self.search(query, limit, cutoff) if name not in results]
+        return results[:limit]
+
+class ExamDataset:
+    """界面使用的考试数据及其索引（学生索引、姓名搜索索引、统计量）
+
+    后台线程在副本上合并新文件或删除旧记录（copy 只复制索引的字典，不复制数据），
+    完成后整体交给界面线程替换，界面线程正在读取的对象不会被修改。
+    """
+
+    def __init__(self, exam_data=None, student_index=None, name_index=None, aggregates=None):
+        self.exam_data = exam_data if exam_data is not None else pd.DataFrame()
+        self.student_index = student_index if student_index is not None else StudentIndex()
+        self.name_index = name_index if name_index is not None else NameSearchIndex()
+        self.aggregates = aggregates if aggregates is not None else ExamAggregates()
+
+    def copy(self):
+        return ExamDataset(self.exam_data, self.student_index.copy(), self.name_index.copy(),
+                           self.aggregates.copy())
+
+    def append(self, new_data):
+        """追加已压缩的考试数据并增量更新索引"""
+        start = len(self.exam_data)
+        if self.exam_data.empty:
+            self.exam_data = new_data
+        else:
+            self.exam_data = concat_compact(self.exam_data, new_data)
+        self.student_index.extend(self.exam_data, start)
+        self.name_index.add(new_data['姓名'].unique())
+        self.aggregates.update(self.exam_data, new_data['考试场次'].unique())
+
+    def remove_sources(self, sources):
+        """删除来自指定文件的记录并修正各索引"""
+        if self.exam_data.empty or not sources:
+            return
+        mask = self.exam_data['来源文件'].isin(sources).to_numpy()
+        if not mask.any():
+            return
+        
+        removed = self.exam_data[mask]
+        # 只修正被删除和被移动的行所属学生的索引
+        order = self.student_index.remove(self.exam_data, mask)
+        self.exam_data = self.exam_data.take(order).reset_index(drop=True)
+        self.name_index.remove({name for name in removed['姓名'].unique()
+                                if name not in self.student_index.by_name})
+        sessions = removed['考试场次'].unique()
+        self.aggregates.discard(sessions)
+        self.aggregates.update(self.exam_data, sessions)
+
+    def with_frames(self, frames):
+        """返回合并了新读取文件的副本，以及这些文件压缩前占用的内存（MB）"""
+        combined = combine_exam_frames(frames)
+        updated = self.copy()
+        updated.append(compact_exam_data(combined))
+        return updated, memory_mb(combined)
+
+    def with_changes(self, frames, removed):
+        """返回合并了文件夹变化的副本，以及解析失败的文件名
+
+        frames 为新增或修改的 (文件, DataFrame)，removed 为已删除的文件；
+        先删除已删除和已修改文件的旧记录，再追加新数据。解析失败的修改文件保留原有记录。
+        """
+        parsed = [(file, df) for file, df in frames if not df.empty]
+        failed = [os.path.basename(file) for file, df in frames if df.empty]
+        stale = {os.path.basename(file) for file in removed}
+        stale.update(os.path.basename(file) for file, df in parsed)
+        updated = self.copy()
+        updated.remove_sources(stale)
+        if parsed:
+            updated.append(compact_exam_data(combine_exam_frames([df for file, df in parsed])))
+        return updated, failed
+
+class SuggestionWorker:
+    """后台联想线程：只处理最新一次查询，过期查询直接丢弃"""
+
+    def __init__(self, lookup):
+        self.lookup = lookup
+        self.generation = 0
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, query, callback):
+        """提交查询，完成后以 (查询, 结果, 耗时秒) 调用callback"""
+        self.generation += 1
+        self.requests.put((self.generation, query, time.perf_counter(), callback))
+
+    def cancel(self):
+        """作废所有尚未返回的查询"""
+        self.generation += 1
+
+    def _run(self):
+        while True:
+            generation, query, submitted, callback = self.requests.get()
+            if generation != self.generation:
+                continue
+            try:
+                results = self.lookup(query)
+            except Exception as e:
+                print(f"[ERROR] 联想查询失败: {str(e)}")
+                continue
+            if generation == self.generation:
+                callback(query, results, time.perf_counter() - submitted)
+
+class ExamCardList:
+    """考试记录卡片的虚拟化列表
+
+    只为可见区域内的考试创建卡片控件，滚动时循环复用；
+    切换学生时控件池保持不变，只重新填充可见卡片的内容。
+    """
+    CARD_GAP = 16
+
+    def __init__(self, parent, app):
+        self.app = app
+        self.records = None
+        self.cards = []
+        self.card_height = None
+        
+        self.canvas = tk.Canvas(parent, bg='white', highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(parent, command=self.yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.bind("<Configure>", self.refresh)
+        
+        # 学生基本信息卡
+        self.info_card = ttk.Frame(self.canvas, style='Info.TFrame')
+        self.title_label = ttk.Label(self.info_card,
+            font=('微软雅黑', 14, 'bold'),
+            foreground=app.colors['primary']
+        )
+        self.title_label.pack(anchor=tk.W, padx=10)
+        self.metrics_label = ttk.Label(self.info_card,
+            font=('微软雅黑', 9),
+            foreground='#7F8C8D'
+        )
+        self.metrics_label.pack(anchor=tk.W, padx=10)
+        self.info_window = self.canvas.create_window(5, 10, window=self.info_card,
+                                                     anchor=tk.NW, state='hidden')
+
+    def yview(self, *args):
+        """滚动条回调：滚动后重新排布可见卡片"""
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def show(self, title, records, subtitle=""):
+        """显示一名学生的考试记录（每场考试一行）"""
+        self.records = records
+        self.title_label.configure(text=title)
+        self.metrics_label.configure(text=subtitle)
+        self.canvas.itemconfigure(self.info_window, state='normal')
+        for card in self.cards:
+            card['bound'] = None
+        self.canvas.yview_moveto(0)
+        self.refresh()
+
+    def clear(self):
+        """隐藏全部卡片（控件保留以便复用）"""
+        self.records = None
+        self.canvas.itemconfigure(self.info_window, state='hidden')
+        self.refresh()
+
+    def refresh(self, event=None):
+        """只排布落在可见区域内的卡片"""
+        count = 0 if self.records is None else len(self.records)
+        if count and self.card_height is None:
+            self.card_height = self._measure_card()
+        
+        width = max(self.canvas.winfo_width() - 10, 100)
+        self.canvas.itemconfigure(self.info_window, width=width)
+        top_offset = self.info_card.winfo_reqheight() + 20
+        step = (self.card_height or 0) + self.CARD_GAP
+        self.canvas.configure(scrollregion=(0, 0, width, top_offset + count * step))
+        
+        first = last = 0
+        if count:
+            view_top = self.canvas.canvasy(0)
+            view_bottom = view_top + self.canvas.winfo_height()
+            first = max(0, int((view_top - top_offset) // step))
+            last = min(count, int((view_bottom - top_offset) // step) + 1)
+        while len(self.cards) < last - first:
+            self._new_card()
+        
+        visible = set()
+        for idx in range(first, last):
+            card = self.cards[idx % len(self.cards)]
+            visible.add(id(card))
+            if card['bound'] != idx:
+                self._bind(card, idx)
+            self.canvas.coords(card['window'], 5, top_offset + idx * step)
+            self.canvas.itemconfigure(card['window'], width=width, height=self.card_height, state='normal')
+        for card in self.cards:
+            if id(card) not in visible:
+                self.canvas.itemconfigure(card['window'], state='hidden')
+
+    def _new_card(self):
+        """创建一张空白考试卡片并加入控件池"""
+        colors = self.app.colors
+        frame = ttk.Frame(self.canvas, style='Info.TFrame', padding=15)
+        
+        # 考试场次标题
+        header_frame = ttk.Frame(frame)
+        header_frame.pack(fill=tk.X)
+        session_label = ttk.Label(header_frame,
+            font=('微软雅黑', 12, 'bold'),
+            foreground=colors['secondary']
+        )
+        session_label.pack(side=tk.LEFT)
+        
+        # 成绩表格布局
+        table_frame = ttk.Frame(frame)
+        table_frame.pack(fill=tk.X, pady=10)
+        slots = []
+        for idx in range(len(SUBJECTS)):
+            row_frame = ttk.Frame(table_frame)
+            row_frame.grid(row=idx//2, column=idx%2, sticky=tk.W, padx=10, pady=5)
+            labels = (
+                ttk.Label(row_frame, font=('微软雅黑', 10), foreground='#7F8C8D'),
+                ttk.Label(row_frame, font=('微软雅黑', 10, 'bold'), foreground=colors['dark']),
+                ttk.Label(row_frame, font=('微软雅黑', 9), foreground='#95A5A6')
+            )
+            for label in labels:
+                label.pack(side=tk.LEFT)
+            slots.append(labels)
+        
+        # 总分显示
+        total_frame = ttk.Frame(frame)
+        total_frame.pack(fill=tk.X, pady=10)
+        ttk.Label(total_frame,
+            text="🏆 总分：",
+            font=('微软雅黑', 12, 'bold'),
+            foreground=colors['danger']
+        ).pack(side=tk.LEFT, padx=10)
+        total_label = ttk.Label(total_frame, font=('微软雅黑', 12, 'bold'), foreground=colors['danger'])
+        total_label.pack(side=tk.LEFT)
+        rank_label = ttk.Label(total_frame, font=('微软雅黑', 10), foreground='#95A5A6')
+        rank_label.pack(side=tk.LEFT)
+        
+        # 班级/年级对比
+        compare_label = ttk.Label(frame, font=('微软雅黑', 9), foreground='#7F8C8D')
+        compare_label.pack(anchor=tk.W, padx=10)
+        
+        card = {
+            'frame': frame,
+            'session': session_label,
+            'slots': slots,
+            'total': total_label,
+            'rank': rank_label,
+            'compare': compare_label,
+            'window': self.canvas.create_window(5, 0, window=frame, anchor=tk.NW, state='hidden'),
+            'bound': None
+        }
+        self.cards.append(card)
+        return card
+
+    def _measure_card(self):
+        """以所有科目都有成绩的卡片高度作为统一卡片高度"""
+        card = self.cards[0] if self.cards else self._new_card()
+        card['session'].configure(text="📅 考试场次")
+        for labels in card['slots']:
+            for label, text in zip(labels, ("语文：", "100.0 分", "（排名 1000）")):
+                label.configure(text=text)
+        card['total'].configure(text="100.0 分")
+        card['rank'].configure(text="（班级第 1 名，年级第 1 名）")
+        card['compare'].configure(text="📊 班级平均")
+        card['bound'] = None
+        self.canvas.update_idletasks()
+        return card['frame'].winfo_reqheight()
+
+    def _bind(self, card, idx):
+        """用第idx场考试的数据填充卡片"""
+        record = self.records.iloc[idx]
+        aggregates = self.app.aggregates
+        session = record['考试场次']
+        card['session'].configure(text="📅 " + session)
+        
+        subjects = [(score_col, rank_col) for score_col, rank_col in SUBJECTS
+                    if record.get(score_col, 0) > 0]
+        for slot, labels in enumerate(card['slots']):
+            if slot < len(subjects):
+                score_col, rank_col = subjects[slot]
+                texts = (f"{score_col}：",
+                         f"{float(record[score_col]):.1f} 分",
+                         f"（排名 {rank_value(record.get(rank_col, 0))}）")
+            else:
+                texts = ("", "", "")
+            for label, text in zip(labels, texts):
+                label.configure(text=text)
+        
+        card['total'].configure(text=f"{format_score(record.get('总分', 0))} 分")
+        card['rank'].configure(
+            text=f"（班级第 {rank_value(record.get('班序', 0))} 名，年级第 {rank_value(record.get('级序', 0))} 名）")
+        card['compare'].configure(
+            text=f"📊 班级平均 {format_score(aggregates.value('mean', '总分', session, record['现班']))}"
+                 f"｜年级平均 {format_score(aggregates.value('mean', '总分', session))}"
+                 f"｜年级最高 {format_score(aggregates.value('max', '总分', session))}")
+        card['bound'] = idx
+
+ChartData = namedtuple('ChartData', ['labels', 'scores', 'class_ranks', 'grade_ranks',
+                                     'max_score', 'min_score', 'avg_score', 'class_sizes', 'grade_sizes'])
+
+def prepare_chart_data(records, aggregates=None):
+    """整理绘制柱状图所需的数据（与界面无关）
+
+    aggregates 用于查询每场考试实际的班级与年级人数，缺失时为None。
+    """
+    scores = records['总分'].tolist()
+    sessions, classes = records['考试场次'].tolist(), records['现班'].tolist()
+    if aggregates is None:
+        class_sizes = grade_sizes = [None] * len(scores)
+    else:
+        class_sizes = [aggregates.cohort_size(s, c) for s, c in zip(sessions, classes)]
+        grade_sizes = [aggregates.cohort_size(s) for s in sessions]
+    return ChartData(
+        labels=[f"第{idx+1}次\n{session[:10]}" for idx, session in enumerate(records['考试场次'])],
+        scores=scores,
+        class_ranks=records['班序'].tolist(),
+        grade_ranks=records['级序'].tolist(),
+        max_score=max(scores) * 1.1,
+        min_score=min(scores) * 0.9,
+        avg_score=sum(scores)/len(scores),
+        class_sizes=class_sizes,
+        grade_sizes=grade_sizes
+    )
+
+class ScoreChart:
+    """常驻的成绩对比柱状图
 
-        if df_raw.shape[0] < 3:
-            raise ValueError("文件行数不足3行")
-        if df_raw.shape[1] < 5:
-            raise ValueError("列数不足")
+    坐标轴、刻度等图元只创建一次；切换学生时只通过 coords/itemconfigure
+    更新柱子、标签和刻度文字，多余的考试图元隐藏留待复用。
+    """
+    MARGIN = 100
+    CHART_HEIGHT = 800
+    BAR_WIDTH = 60
+    SPACING = 40
+    RANK_BAR_HEIGHT = 20
+    DEFAULT_CLASS_SIZE = 50
+    DEFAULT_GRADE_SIZE = 200
+
+    def __init__(self, parent, app):
+        self.app = app
+        self.exam_items = []
+        
+        chart_container = ttk.Frame(parent)
+        chart_container.pack(fill=tk.BOTH, expand=True)
+        
+        self.canvas = canvas = tk.Canvas(chart_container, bg='white', bd=0, highlightthickness=0,
+                                         scrollregion=(0, 0, 1000, self.CHART_HEIGHT))
+        h_scroll = ttk.Scrollbar(chart_container, orient=tk.HORIZONTAL, command=canvas.xview)
+        v_scroll = ttk.Scrollbar(chart_container, orient=tk.VERTICAL, command=canvas.yview)
+        canvas.configure(xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set)
+        
+        h_scroll.pack(side=tk.BOTTOM, fill=tk.X)
+        v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        self.draw_coordinate_system()
+        
+        # 平均参考线与标题
+        self.avg_line = canvas.create_line(0, 0, 0, 0, fill='#e74c3c', width=2, dash=(4,2), tags="static")
+        self.avg_text = canvas.create_text(0, 0,
+                                           font=('微软雅黑', 10, 'bold'),
+                                           fill='#e74c3c', tags="static")
+        self.title_text = canvas.create_text(0, 30,
+                                             font=('微软雅黑', 16, 'bold'),
+                                             fill='#2C3E50', tags="static")
+        
+        canvas.tag_bind("main_bar", "<Enter>", lambda e: app.on_bar_hover(e, canvas))
+        canvas.tag_bind("main_bar", "<Leave>", lambda e: canvas.delete("hover_info"))
 
-        exam_session = str(df_raw.iloc[0, 0]).strip()
-        columns = [str(col).strip() for col in df_raw.iloc[1].tolist()]
+    def draw_coordinate_system(self):
+        """绘制坐标轴系统（刻度文字随学生更新）"""
+        canvas = self.canvas
+        margin = self.MARGIN
+        chart_height = self.CHART_HEIGHT
+        plot_height = chart_height - 2*margin
         
-        required_columns = ['姓名', '现班']
-        missing_cols = [col for col in required_columns if col not in columns]
-        if missing_cols:
-            raise ValueError(f"缺少必要列: {', '.join(missing_cols)}")
+        # X轴
+        self.x_axis = canvas.create_line(margin, chart_height - margin,
+                                         1000 - margin, chart_height - margin,
+                                         width=2, fill='#2c3e50', tags="static")
+        
+        # Y轴
+        canvas.create_line(margin, margin,
+                          margin, chart_height - margin,
+                          width=2, fill='#2c3e50', tags="static")
+        
+        # Y轴刻度
+        self.tick_texts = []
+        for i in range(0, 11):
+            y_base = chart_height - margin - (i/10)*plot_height
+            canvas.create_line(margin-5, y_base, margin, y_base, width=1, fill='#95a5a6', tags="static")
+            self.tick_texts.append(canvas.create_text(margin-10, y_base,
+                                                      anchor=tk.E,
+                                                      font=('微软雅黑', 8),
+                                                      fill='#7f8c8d',
+                                                      tags="static"))
 
-        data_df = df_raw.iloc[2:].copy()
-        data_df.columns = columns
-        data_df['考试场次'] = exam_session
+    def _new_exam_items(self, idx):
+        """为第idx场考试创建一组图元"""
+        canvas = self.canvas
+        items = {
+            # 主柱状图
+            'bar': canvas.create_rectangle(0, 0, 0, 0, outline='', tags=("main_bar", f"exam_{idx}")),
+            # 数据标签
+            'score': canvas.create_text(0, 0, font=('微软雅黑', 10, 'bold'), fill='#2c3e50'),
+            'ranks': canvas.create_text(0, 0, font=('微软雅黑', 8), fill='#e74c3c'),
+            # 考试标签
+            'session': canvas.create_text(0, 0, angle=45, anchor=tk.NW,
+                                          font=('微软雅黑', 9), fill='#666666'),
+            # 排名条及图例
+            'class_bar': canvas.create_rectangle(0, 0, 0, 0, fill='#3498db', outline=''),
+            'grade_bar': canvas.create_rectangle(0, 0, 0, 0, fill='#2ecc71', outline=''),
+            'class_legend': canvas.create_text(0, 0, text="班级排名", anchor=tk.W,
+                                               font=('微软雅黑', 7), fill='#3498db'),
+            'grade_legend': canvas.create_text(0, 0, text="年级排名", anchor=tk.W,
+                                               font=('微软雅黑', 7), fill='#2ecc71')
+        }
+        self.exam_items.append(items)
 
-        numeric_cols = ['语文', '数学', '英语', '生物', '政治', '历史', '地理', '日语', '总分']
-        for col in numeric_cols:
-            if col in data_df.columns:
-                data_df[col] = pd.to_numeric(data_df[col], errors='coerce').fillna(0)
+    @PERF.timed('chart_render')
+    def update(self, records, student):
+        """切换到新学生：只更新已有图元的位置与文字"""
+        canvas = self.canvas
+        canvas.delete("hover_info")
         
-        rank_cols = ['语序', '数序', '英序', '生序', '政序', '历序', '地序', '日序', '班序', '级序']
-        for col in rank_cols:
-            if col in data_df.columns:
-                data_df[col] = pd.to_numeric(data_df[col], errors='coerce').fillna(0).astype(int)
+        data = prepare_chart_data(records, self.app.aggregates)
+        exam_sessions, scores = data.labels, data.scores
+        class_ranks, grade_ranks = data.class_ranks, data.grade_ranks
+        max_score, min_score, avg_score = data.max_score, data.min_score, data.avg_score
+        num_exams = len(exam_sessions)
         
-        return data_df
-    
-    except Exception as e:
-        print(f"[ERROR] 文件加载失败: {os.path.basename(file_path)} - {str(e)}")
-        return pd.DataFrame()
+        margin = self.MARGIN
+        chart_width = max(1000, num_exams * 200)
+        chart_height = self.CHART_HEIGHT
+        plot_height = chart_height - 2*margin
+        y_base = chart_height - margin
+        
+        canvas.configure(scrollregion=(0, 0, chart_width, chart_height))
+        canvas.itemconfigure("static", state='normal')
+        canvas.coords(self.x_axis, margin, y_base, chart_width - margin, y_base)
+        for i, text_item in enumerate(self.tick_texts):
+            value = min_score + (max_score - min_score)*(i/10)
+            canvas.itemconfigure(text_item, text=f"{value:.0f}")
+        
+        while len(self.exam_items) < num_exams:
+            self._new_exam_items(len(self.exam_items))
+        
+        bar_width = self.BAR_WIDTH
+        for idx, items in enumerate(self.exam_items):
+            if idx >= num_exams:
+                for item in items.values():
+                    canvas.itemconfigure(item, state='hidden')
+                continue
+            
+            score, c_rank, g_rank = scores[idx], class_ranks[idx], grade_ranks[idx]
+            x0 = margin + idx*(bar_width + self.SPACING) + self.SPACING
+            factor = (score - min_score)/(max_score - min_score)
+            y1 = y_base - factor * plot_height
+            
+            canvas.coords(items['bar'], x0, y1, x0+bar_width, y_base)
+            canvas.itemconfigure(items['bar'], fill=self.get_color_gradient(factor))
+            canvas.coords(items['score'], x0 + bar_width/2, y1 - 25)
+            canvas.itemconfigure(items['score'], text=f"{score:.1f}")
+            canvas.coords(items['ranks'], x0 + bar_width/2, y1 - 45)
+            canvas.itemconfigure(items['ranks'], text=f"班: {c_rank} | 级: {g_rank}")
+            canvas.coords(items['session'], x0 + bar_width/2, y_base + 20)
+            canvas.itemconfigure(items['session'], text=exam_sessions[idx])
+            self.place_rank_bars(items, x0 + bar_width + 10, y_base, c_rank, g_rank,
+                                 data.class_sizes[idx], data.grade_sizes[idx])
+            for item in items.values():
+                canvas.itemconfigure(item, state='normal')
+        
+        # 平均参考线
+        avg_y = y_base - (avg_score - min_score)/(max_score - min_score)*plot_height
+        canvas.coords(self.avg_line, margin, avg_y, chart_width - margin, avg_y)
+        canvas.coords(self.avg_text, chart_width - margin - 100, avg_y - 15)
+        canvas.itemconfigure(self.avg_text, text=f"平均分 {avg_score:.1f}")
+        
+        canvas.coords(self.title_text, chart_width/2, 30)
+        canvas.itemconfigure(self.title_text, text=f"{student} 考试成绩横向对比")
 
-def process_data(data_folder):
-    """处理考试数据文件夹"""
-    all_files = glob(os.path.join(data_folder, "*.xlsx"))
-    valid_dfs = []
-    
-    for file in all_files:
-        df = read_exam_file(file)
-        if not df.empty:
-            valid_dfs.append(df)
-    
-    if not valid_dfs:
-        raise ValueError("没有找到有效考试文件")
-    
-    combined = pd.concat(valid_dfs, ignore_index=True)
-    
-    combined['姓名'] = combined['姓名'].str.strip()
-    combined['考试场次'] = combined['考试场次'].str.replace('\n', ' ')
-    
-    return combined
+    def place_rank_bars(self, items, x, y_base, c_rank, g_rank, class_size=None, grade_size=None):
+        """放置排名对比条（按该场考试实际的班级/年级人数缩放）"""
+        canvas = self.canvas
+        class_size = class_size or self.DEFAULT_CLASS_SIZE
+        grade_size = grade_size or self.DEFAULT_GRADE_SIZE
+        
+        # 班级排名条
+        c_rank_width = 100 * (1 - c_rank/class_size if c_rank <= class_size else 0.1)
+        canvas.coords(items['class_bar'], x, y_base - 40, x + c_rank_width, y_base - 40 + self.RANK_BAR_HEIGHT)
+        
+        # 年级排名条
+        g_rank_width = 100 * (1 - g_rank/grade_size if g_rank <= grade_size else 0.1)
+        canvas.coords(items['grade_bar'], x, y_base - 20, x + g_rank_width, y_base - 20 + self.RANK_BAR_HEIGHT)
+        
+        # 图例
+        canvas.coords(items['class_legend'], x + 110, y_base - 35)
+        canvas.itemconfigure(items['class_legend'], text=f"班级排名 {c_rank}/{class_size}")
+        canvas.coords(items['grade_legend'], x + 110, y_base - 15)
+        canvas.itemconfigure(items['grade_legend'], text=f"年级排名 {g_rank}/{grade_size}")
+
+    def get_color_gradient(self, factor):
+        """生成渐变色"""
+        r = int(84 + (241-84)*(1 - factor))
+        g = int(153 + (238-153)*factor)
+        b = 255 if factor < 0.5 else 238
+        return f"#{r:02x}{g:02x}{b:02x}"
+
+    def clear(self):
+        """隐藏全部图元（保留以便复用）"""
+        self.canvas.delete("hover_info")
+        self.canvas.itemconfigure("all", state='hidden')
+
+class ClassDashboard:
+    """班级对比面板
+
+    选择考试场次和科目后，以箱线图对比各班成绩分布，并显示所选班级与全年级的
+    分数段分布。数据全部来自预先计算的 ExamAggregates，切换时只做字典查找和重绘。
+    """
+    WIDTH = 960
+    BOX_TOP = 60
+    BOX_BOTTOM = 320
+    HIST_TOP = 380
+    HIST_BOTTOM = 600
+    MARGIN = 70
+    GRADE = "全年级"
+
+    def __init__(self, app):
+        self.app = app
+        self.window = tk.Toplevel(app.root)
+        self.window.title("班级对比")
+        self.window.geometry(f"{self.WIDTH + 20}x720")
+        self.window.configure(bg=app.colors['background'])
+        
+        controls = ttk.Frame(self.window)
+        controls.pack(fill=tk.X, padx=10, pady=8)
+        self.session_var = tk.StringVar()
+        self.subject_var = tk.StringVar(value='总分')
+        self.class_var = tk.StringVar(value=self.GRADE)
+        self.combos = {}
+        for label, var, width in (("考试场次", self.session_var, 32),
+                                  ("科目", self.subject_var, 8),
+                                  ("班级", self.class_var, 14)):
+            ttk.Label(controls, text=label).pack(side=tk.LEFT, padx=(10, 4))
+            combo = ttk.Combobox(controls, textvariable=var, state='readonly', width=width)
+            combo.pack(side=tk.LEFT)
+            combo.bind('<<ComboboxSelected>>', self.on_select)
+            self.combos[label] = combo
+        
+        self.canvas = tk.Canvas(self.window, bg='white', width=self.WIDTH,
+                                height=self.HIST_BOTTOM + 60, highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        self.canvas.tag_bind("class_box", "<Button-1>", self.on_box_click)
+        self.reload()
+
+    def exists(self):
+        """面板窗口是否仍然打开"""
+        return bool(self.window.winfo_exists())
+
+    def reload(self):
+        """数据变化后刷新可选项并重绘"""
+        aggregates = self.app.aggregates
+        sessions = aggregates.sessions()
+        self.combos["考试场次"].configure(values=sessions)
+        if sessions and self.session_var.get() not in sessions:
+            self.session_var.set(sessions[-1])
+        subjects = [col for col in NUMERIC_COLS[-1:] + NUMERIC_COLS[:-1]
+                    if any(col == c for _, c in aggregates.by_session.get(self.session_var.get(), {}))]
+        self.combos["科目"].configure(values=subjects)
+        if subjects and self.subject_var.get() not in subjects:
+            self.subject_var.set(subjects[0])
+        classes = [self.GRADE] + aggregates.classes(self.session_var.get())
+        self.combos["班级"].configure(values=classes)
+        if self.class_var.get() not in classes:
+            self.class_var.set(self.GRADE)
+        self.draw()
+
+    def on_select(self, event=None):
+        """切换考试场次时刷新班级列表，其余选项直接重绘"""
+        if event is not None and event.widget is self.combos["考试场次"]:
+            self.reload()
+        else:
+            self.draw()
+
+    def on_box_click(self, event):
+        """点击箱线图选中对应班级"""
+        item = self.canvas.find_withtag(tk.CURRENT)
+        tags = self.canvas.gettags(item[0]) if item else ()
+        for tag in tags:
+            if tag.startswith("class="):
+                self.class_var.set(tag[len("class="):])
+                self.draw()
+                return
+
+    def draw(self):
+        """重绘箱线图与分数段分布"""
+        canvas = self.canvas
+        canvas.delete("all")
+        session, col = self.session_var.get(), self.subject_var.get()
+        if not session:
+            canvas.create_text(self.WIDTH/2, 200, text="暂无数据", font=('微软雅黑', 14), fill='#95A5A6')
+            return
+        canvas.create_text(self.WIDTH/2, 25, text=f"{session}　{col} 各班分布",
+                           font=('微软雅黑', 14, 'bold'), fill='#2C3E50')
+        self.draw_boxes(session, col)
+        self.draw_histogram(session, col, None if self.class_var.get() == self.GRADE else self.class_var.get())
+
+    def draw_boxes(self, session, col):
+        """各班及全年级的箱线图（最小值、四分位、中位数、最大值，圆点为平均分）"""
+        canvas, aggregates = self.canvas, self.app.aggregates
+        groups = [(name, name) for name in aggregates.classes(session)] + [(self.GRADE, None)]
+        top = max((aggregates.value('max', col, session, key) for _, key in groups), default=np.nan)
+        if pd.isna(top):
+            return
+        top = max(top, 1)
+        height = self.BOX_BOTTOM - self.BOX_TOP
+        to_y = lambda value: self.BOX_BOTTOM - value / top * height
+        
+        for i in range(5):
+            y = self.BOX_BOTTOM - i/4 * height
+            canvas.create_line(self.MARGIN, y, self.WIDTH - 20, y, fill='#ECF0F1')
+            canvas.create_text(self.MARGIN - 8, y, text=f"{top*i/4:.0f}", anchor=tk.E,
+                               font=('微软雅黑', 8), fill='#7F8C8D')
+        
+        step = (self.WIDTH - self.MARGIN - 20) / len(groups)
+        selected = self.class_var.get()
+        for idx, (label, key) in enumerate(groups):
+            stats = {stat: aggregates.value(stat, col, session, key)
+                     for stat in ('min', 'p25', 'median', 'p75', 'max', 'mean')}
+            x = self.MARGIN + step * (idx + 0.5)
+            size = aggregates.cohort_size(session, key)
+            canvas.create_text(x, self.BOX_BOTTOM + 15, text=label, font=('微软雅黑', 8), fill='#2C3E50')
+            canvas.create_text(x, self.BOX_BOTTOM + 30, text=f"{size or 0}人", font=('微软雅黑', 8), fill='#95A5A6')
+            if any(pd.isna(value) for value in stats.values()):
+                continue
+            half = min(step * 0.3, 25)
+            fill = '#F5B041' if label == selected else ('#2ECC71' if key is None else '#85C1E9')
+            tags = ("class_box", f"class={label}")
+            canvas.create_line(x, to_y(stats['min']), x, to_y(stats['max']), fill='#2C3E50', tags=tags)
+            for stat in ('min', 'max'):
+                canvas.create_line(x - half/2, to_y(stats[stat]), x + half/2, to_y(stats[stat]),
+                                   fill='#2C3E50', tags=tags)
+            canvas.create_rectangle(x - half, to_y(stats['p75']), x + half, to_y(stats['p25']),
+                                    fill=fill, outline='#2C3E50', tags=tags)
+            canvas.create_line(x - half, to_y(stats['median']), x + half, to_y(stats['median']),
+                               fill='#2C3E50', width=2, tags=tags)
+            canvas.create_oval(x - 3, to_y(stats['mean']) - 3, x + 3, to_y(stats['mean']) + 3,
+                               fill='#E74C3C', outline='', tags=tags)
+
+    def draw_histogram(self, session, col, class_name):
+        """所选班级（柱）与全年级（折线）的分数段人数占比"""
+        canvas, aggregates = self.canvas, self.app.aggregates
+        selected = aggregates.histogram(col, session, class_name)
+        grade = aggregates.histogram(col, session)
+        if not grade:
+            return
+        low = min(bin_low for bin_low, _, _ in grade)
+        high = max(bin_high for _, bin_high, _ in grade)
+        width = bin_width(col)
+        bins = list(range(low, high, width))
+        total = sum(count for *_, count in selected) or 1
+        grade_total = sum(count for *_, count in grade) or 1
+        share = {bin_low: count/total for bin_low, _, count in selected}
+        grade_share = {bin_low: count/grade_total for bin_low, _, count in grade}
+        peak = max(list(share.values()) + list(grade_share.values()))
+        
+        height = self.HIST_BOTTOM - self.HIST_TOP
+        step = (self.WIDTH - self.MARGIN - 20) / len(bins)
+        name = class_name or self.GRADE
+        canvas.create_text(self.MARGIN, self.HIST_TOP - 20, anchor=tk.W,
+                           text=f"分数段分布：{name}（柱）与全年级（折线），人数占比",
+                           font=('微软雅黑', 10, 'bold'), fill='#2C3E50')
+        canvas.create_line(self.MARGIN, self.HIST_BOTTOM, self.WIDTH - 20, self.HIST_BOTTOM, fill='#2C3E50')
+        points = []
+        for idx, bin_low in enumerate(bins):
+            x0 = self.MARGIN + idx * step
+            value = share.get(bin_low, 0)
+            if value:
+                y = self.HIST_BOTTOM - value / peak * height
+                canvas.create_rectangle(x0 + 2, y, x0 + step - 2, self.HIST_BOTTOM, fill='#85C1E9', outline='')
+                canvas.create_text(x0 + step/2, y - 8, text=f"{value:.0%}", font=('微软雅黑', 7), fill='#2C3E50')
+            points += [x0 + step/2, self.HIST_BOTTOM - grade_share.get(bin_low, 0) / peak * height]
+            canvas.create_text(x0 + step/2, self.HIST_BOTTOM + 12, text=str(bin_low),
+                               font=('微软雅黑', 7), fill='#7F8C8D')
+        if len(points) >= 4:
+            canvas.create_line(*points, fill='#2ECC71', width=2)
 
 class ScoreAnalysisApp:
-    def __init__(self, root):
+    def __init__(self, root, data_folder="exams", db_path=None, sheets=None, snapshot=None, workers=LOAD_WORKERS):
         self.root = root
+        self.data_folder = data_folder
+        self.workers = workers
+        self.db_path = db_path
+        self.sheets = sheets
+        self.snapshot_path = snapshot
+        self.store = None
         self.root.title("学生成绩分析系统 v4.2")
         self.root.geometry("1400x900")
         self.style = ttk.Style()
@@ -87,6 +2568,34 @@ class ScoreAnalysisApp:
             'background': '#F4F7F7'
         }
         
+        self.suggest_job = None
+        self.suppress_suggest = False
+        self.suggest_worker = SuggestionWorker(lambda query: self.name_index.suggest(query))
+        
+        self.exam_data = pd.DataFrame()
+        self.student_index = StudentIndex()
+        self.name_index = NameSearchIndex()
+        self.aggregates = ExamAggregates()
+        self.metrics = None
+        self.metrics_version = 0
+        self.dashboard = None
+        self.chart_records = None
+        self.card_list = None
+        self.chart = None
+        self.current_student = None
+        self.current_key = None
+        self.current_label = None
+        self.suggest_items = []
+        self.watcher = None
+        self.watching = False
+        self.reloading = False
+        self.title_job = None
+        self.title_strip = None
+        self.title_image = None
+        self.title_items = None
+        self.load_generation = 0
+        self.raw_memory = 0.0
+        
         self.configure_styles()
         self.create_widgets()
         self.load_data()
@@ -161,7 +2670,7 @@ class ScoreAnalysisApp:
             highlightthickness=0
         )
         self.title_label.pack(fill=tk.BOTH, expand=True)  # 修改pack参数
-        self.title_label.bind("<Configure>", self.draw_gradient_title)  # 添加尺寸变化监听
+        self.title_label.bind("<Configure>", self.on_title_configure)  # 添加尺寸变化监听
         # self.title_label.pack(fill=tk.X)
         self.draw_gradient_title()
         
@@ -180,6 +2689,9 @@ class ScoreAnalysisApp:
         )
         self.search_entry.pack(side=tk.LEFT, ipady=4)
         self.search_entry.bind('<Return>', self.on_search)
+        self.search_entry.bind('<Down>', self.focus_suggestions)
+        self.search_entry.bind('<Escape>', self.hide_suggestions)
+        self.search_var.trace_add('write', self.on_search_changed)
         
         # 搜索按钮
         self.search_btn = ttk.Button(
@@ -190,6 +2702,71 @@ class ScoreAnalysisApp:
         )
         self.search_btn.pack(side=tk.LEFT, padx=10)
         
+        # 进步排行
+        ttk.Button(
+            search_frame,
+            text="📈 进步排行",
+            style='Search.TButton',
+            command=self.show_improvement_ranking
+        ).pack(side=tk.LEFT, padx=10)
+        
+        # 班级对比
+        ttk.Button(
+            search_frame,
+            text="🏫 班级对比",
+            style='Search.TButton',
+            command=self.show_class_dashboard
+        ).pack(side=tk.LEFT, padx=10)
+        
+        # 自动刷新开关
+        self.watch_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            search_frame,
+            text="自动刷新考试文件",
+            variable=self.watch_var
+        ).pack(side=tk.LEFT, padx=10)
+        
+        # 联想下拉列表（输入时浮动显示在搜索框下方）
+        self.suggest_list = tk.Listbox(
+            self.root,
+            font=('微软雅黑', 11),
+            bg='white',
+            fg=self.colors['dark'],
+            selectbackground=self.colors['secondary'],
+            highlightthickness=1,
+            highlightcolor=self.colors['secondary'],
+            relief=tk.FLAT,
+            activestyle='none'
+        )
+        self.suggest_list.bind('<ButtonRelease-1>', self.on_suggestion_chosen)
+        self.suggest_list.bind('<Return>', self.on_suggestion_chosen)
+        self.suggest_list.bind('<Escape>', self.hide_suggestions)
+        
+        # F12 打开性能调试面板
+        self.root.bind('<F12>', self.show_perf_panel)
+        
+        # 数据菜单
+        menubar = tk.Menu(self.root)
+        data_menu = tk.Menu(menubar, tearoff=0)
+        data_menu.add_command(label="导出数据快照…", command=self.export_snapshot_dialog)
+        data_menu.add_command(label="导入数据快照…", command=self.import_snapshot_dialog)
+        data_menu.add_separator()
+        data_menu.add_command(label="性能统计", accelerator="F12", command=self.show_perf_panel)
+        menubar.add_cascade(label="数据", menu=data_menu)
+        self.root.configure(menu=menubar)
+        
+        # 底部加载状态栏
+        status_frame = ttk.Frame(self.root)
+        status_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=20, pady=(0, 10))
+        self.progress = ttk.Progressbar(status_frame, mode='determinate', length=240)
+        self.progress.pack(side=tk.LEFT)
+        self.status_var = tk.StringVar(value="正在准备加载数据…")
+        ttk.Label(status_frame,
+            textvariable=self.status_var,
+            font=('微软雅黑', 9),
+            foreground='#7F8C8D'
+        ).pack(side=tk.LEFT, padx=10)
+        
         # 主内容区
         self.main_paned = ttk.PanedWindow(self.root, orient=tk.HORIZONTAL)
         self.main_paned.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
@@ -202,10 +2779,15 @@ class ScoreAnalysisApp:
         self.chart_panel = ttk.Frame(self.main_paned, style='Info.TFrame')
         self.main_paned.add(self.chart_panel, weight=2)
 
+    def on_title_configure(self, event=None):
+        """合并连续的尺寸变化事件，停止变化后再重绘标题"""
+        if self.title_job is not None:
+            self.root.after_cancel(self.title_job)
+        self.title_job = self.root.after(50, self.draw_gradient_title)
+
     def draw_gradient_title(self, event=None):
-        """绘制渐变标题"""
-        self.title_label.delete("all")  # 清空画布
-        
+        """绘制渐变标题（渐变背景缓存为单张图片）"""
+        self.title_job = None
         width = self.title_label.winfo_width()
         height = self.title_label.winfo_height()
         
@@ -213,47 +2795,420 @@ class ScoreAnalysisApp:
         if width < 10 or height < 10:
             return
         
-        # 绘制渐变背景
-        for i in range(height):
-            r = int(44 + (i/height)*100)
-            g = int(62 + (i/height)*100)
-            b = int(80 + (i/height)*100)
-            color = f'#{r:02x}{g:02x}{b:02x}'
-            self.title_label.create_line(0, i, width, i, fill=color)
-        
-        # 绘制标题文字
-        self.title_label.create_text(
-            width//2, height//2,
-            text="学生成绩智能分析平台",
-            font=('微软雅黑', 24, 'bold'),
-            fill='white',
-            anchor=tk.CENTER
-        )
+        # 生成1像素宽的渐变条，宽度变化时只需横向拉伸
+        if self.title_strip is None or self.title_strip.height() != height:
+            colors = []
+            for i in range(height):
+                r = int(44 + (i/height)*100)
+                g = int(62 + (i/height)*100)
+                b = int(80 + (i/height)*100)
+                colors.append(f'{{#{r:02x}{g:02x}{b:02x}}}')
+            self.title_strip = tk.PhotoImage(width=1, height=height)
+            self.title_strip.put(' '.join(colors))
+            self.title_image = None
+        if self.title_image is None or self.title_image.width() != width:
+            self.title_image = self.title_strip.zoom(width, 1)
+        
+        if self.title_items is None:
+            self.title_items = (
+                self.title_label.create_image(0, 0, image=self.title_image, anchor=tk.NW),
+                self.title_label.create_text(
+                    width//2, height//2,
+                    text="学生成绩智能分析平台",
+                    font=('微软雅黑', 24, 'bold'),
+                    fill='white',
+                    anchor=tk.CENTER
+                )
+            )
+        else:
+            image_item, text_item = self.title_items
+            self.title_label.itemconfigure(image_item, image=self.title_image)
+            self.title_label.coords(text_item, width//2, height//2)
 
     def load_data(self):
-        """加载数据"""
+        """在后台线程加载数据，界面立即可用"""
         try:
-            data_folder = "exams"
+            if self.snapshot_path:
+                # 快照模式：直接载入已处理好的数据，不读取考试文件夹
+                self.load_snapshot(self.snapshot_path)
+                return
+            
+            data_folder = self.data_folder
+            self.load_started = time.perf_counter()
+            self.failed_files = []
+            if self.db_path:
+                # 数据库模式：直接使用已有数据，考试文件夹存在时后台同步变化的文件
+                self.store = SQLiteExamStore(self.db_path, self.sheets)
+                self.refresh_from_store()
+                if os.path.exists(data_folder):
+                    self.watcher = FolderWatcher(data_folder)
+                    threading.Thread(target=self.sync_store_in_background,
+                                     args=(self.store, self.load_generation), daemon=True).start()
+                    return
+                records, sessions, students = self.store.summary()
+                if not records:
+                    raise FileNotFoundError(f"数据库为空且找不到数据文件夹：{data_folder}")
+                self.status_var.set(f"已打开数据库　考试次数：{sessions}　学生人数：{students}　记录 {records} 条　"
+                                    f"（找不到数据文件夹 {data_folder}，不自动同步）")
+                return
+            
             if not os.path.exists(data_folder):
                 raise FileNotFoundError(f"找不到数据文件夹：{data_folder}")
-            
-            self.exam_data = process_data(data_folder)
-            messagebox.showinfo("系统提示", 
-                f"数据加载完成\n"
-                f"考试次数：{len(self.exam_data['考试场次'].unique())}\n"
-                f"学生人数：{len(self.exam_data['姓名'].unique())}")
+            self.watcher = FolderWatcher(data_folder)
+            self.cache = ExamCache(os.path.join(data_folder, CACHE_DIR_NAME), sheets=self.sheets)
+            threading.Thread(target=self.load_in_background,
+                             args=(data_folder, self.load_generation), daemon=True).start()
         except Exception as e:
             messagebox.showerror("初始化错误", f"数据加载失败：{str(e)}")
             self.root.destroy()
 
+    def load_in_background(self, data_folder, generation):
+        """后台线程：逐个读取考试文件，分批合并后把新的数据集交回界面线程
+
+        合并与建立索引都在本线程完成。每次合并都会复制已有数据，因此待合并的行数
+        达到已有行数时才合并（批量按几何级数增长），整个加载过程的复制量与数据量成正比。
+        """
+        started = time.perf_counter()
+        try:
+            files = list_exam_files(data_folder)
+            frames = iter_exam_frames(files, self.cache, self.workers, sheets=self.sheets)
+            dataset, pending, raw_memory = ExamDataset(), [], 0.0
+            for done, (file, df) in enumerate(frames, 1):
+                if generation != self.load_generation:
+                    return
+                if not df.empty:
+                    pending.append(df)
+                if pending and (done == len(files) or sum(map(len, pending)) >= len(dataset.exam_data)):
+                    dataset, memory = dataset.with_frames(pending)
+                    pending, raw_memory = [], raw_memory + memory
+                    self.post_load_result(generation, self.use_dataset, dataset, raw_memory)
+                self.post_load_result(generation, self.on_file_loaded, file, not df.empty, done, len(files))
+            if PERF.enabled:
+                # 整个后台加载（读取、合并、建索引）的耗时
+                PERF.record('gui_load', time.perf_counter() - started, files=len(files), rows=len(dataset.exam_data))
+            self.post_load_result(generation, self.on_load_finished, None)
+        except Exception as e:
+            self.post_load_result(generation, self.on_load_finished, e)
+
+    def post_to_ui(self, callback, *args):
+        """从后台线程投递回调到界面线程（窗口已关闭时忽略）"""
+        try:
+            self.root.after(0, callback, *args)
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def post_load_result(self, generation, callback, *args):
+        """投递后台加载的结果；期间导入快照替换了数据时（代数已变）结果作废"""
+        self.post_to_ui(self.run_if_current, generation, callback, *args)
+
+    def run_if_current(self, generation, callback, *args):
+        """界面线程：只处理当前这一代加载的结果"""
+        if generation == self.load_generation:
+            callback(*args)
+
+    def cancel_loading(self):
+        """作废进行中的加载、同步与自动刷新"""
+        self.load_generation += 1
+        self.reloading = False
+        self.watcher = None
+
+    def sync_store_in_background(self, store, generation):
+        """后台线程：把变化的文件同步进数据库"""
+        started = time.perf_counter()
+        try:
+            result = store.sync(self.data_folder, self.workers,
+                lambda done, total, file: self.post_load_result(generation, self.show_load_progress,
+                                                                file, done, total))
+            if PERF.enabled:
+                PERF.record('gui_store_sync', time.perf_counter() - started, files=result[0])
+            self.post_load_result(generation, self.on_store_synced, result)
+        except Exception as e:
+            self.post_load_result(generation, self.on_store_synced, None, e)
+
+    def refresh_from_store(self):
+        """从数据库重建姓名索引和统计量"""
+        self.name_index = NameSearchIndex(self.store.names())
+        self.aggregates = self.store.load_aggregates()
+        self.refresh_metrics()
+
+    def on_store_synced(self, result, error=None):
+        """数据库同步完成"""
+        self.reloading = False
+        records, sessions, students = self.store.summary()
+        if error is None and not records:
+            error = ValueError("没有找到有效考试文件")
+        if error is not None:
+            if records:
+                self.status_var.set(f"数据库同步失败：{str(error)}")
+                return
+            messagebox.showerror("初始化错误", f"数据加载失败：{str(error)}")
+            self.root.destroy()
+            return
+        
+        written, removed, failed = result
+        self.refresh_from_store()
+        status = (f"数据库已同步　考试次数：{sessions}　学生人数：{students}　记录 {records} 条　"
+                  f"写入 {written} 个文件，移除 {removed} 个文件　"
+                  f"用时 {time.perf_counter() - self.load_started:.1f} 秒")
+        if failed:
+            status += f"　失败文件：{'、'.join(failed)}"
+        self.status_var.set(status)
+        self.start_watching()
+        self.refresh_dashboard()
+        self.refresh_current_student()
+
+    @PERF.timed('lookup_records')
+    def lookup_records(self, name, key=None):
+        """查询学生的全部考试记录（按考试时间先后排序），key 为学生标识，用于区分同名学生"""
+        if self.store is not None:
+            return self.store.student_records(name, key)
+        return self.exam_data.iloc[self.student_index.lookup(name, key)]
+
+    def student_keys_of(self, name):
+        """姓名对应的全部学生标识"""
+        if self.store is not None:
+            return self.store.keys_of(name)
+        return self.student_index.keys(name)
+
+    def expand_homonyms(self, names):
+        """把姓名展开为 (姓名, 学生标识) 候选，同名学生分别列出"""
+        candidates = []
+        for name in names:
+            keys = self.student_keys_of(name)
+            candidates += [(name, key) for key in keys] if len(keys) > 1 else [(name, None)]
+        return candidates
+
+    def candidate_label(self, name, key=None, records=None):
+        """候选学生的显示名称：指定学生标识时附带最近所在班级（有学号时附带学号）"""
+        if key is None:
+            return student_label(name)
+        records = self.lookup_records(name, key) if records is None else records
+        if records.empty:
+            return student_label(name)
+        latest = records.iloc[-1]
+        return student_label(name, latest['现班'], latest.get('学号'))
+
+    def show_load_progress(self, file, done, total):
+        """更新加载进度"""
+        elapsed = time.perf_counter() - self.load_started
+        self.progress.configure(maximum=total, value=done)
+        self.status_var.set(f"正在加载 {done}/{total}：{os.path.basename(file)}　已用时 {elapsed:.1f} 秒")
+
+    def on_file_loaded(self, file, parsed, done, total):
+        """单个文件读取完成，更新进度"""
+        if not parsed:
+            self.failed_files.append(os.path.basename(file))
+        self.show_load_progress(file, done, total)
+
+    def current_dataset(self):
+        """界面当前使用的数据集（后台线程以它为基础生成新的数据集）"""
+        return ExamDataset(self.exam_data, self.student_index, self.name_index, self.aggregates)
+
+    def use_dataset(self, dataset, raw_memory=None):
+        """界面线程：整体换用后台线程生成的数据集"""
+        self.exam_data = dataset.exam_data
+        self.student_index = dataset.student_index
+        self.name_index = dataset.name_index
+        self.aggregates = dataset.aggregates
+        self.discard_metrics()
+        if raw_memory is not None:
+            self.raw_memory = raw_memory
+
+    def discard_metrics(self):
+        """数据已变化：丢弃缓存的成长指标，进行中的计算结果也作废"""
+        self.metrics = None
+        self.metrics_version += 1
+
+    def refresh_metrics(self):
+        """加载、同步或增量合并完成后在后台线程重新计算成长指标，完成后再换入"""
+        self.discard_metrics()
+        threading.Thread(target=self.metrics_in_background,
+                         args=(self.metrics_version, self.store, self.exam_data), daemon=True).start()
+
+    def metrics_in_background(self, version, store, exam_data):
+        """后台线程：计算全年级成长指标（数据库模式在SQL中汇总，不读出全部记录）"""
+        try:
+            if store is not None:
+                metrics = store.student_metrics()
+            elif exam_data.empty:
+                metrics = empty_student_metrics()
+            else:
+                metrics = compute_student_metrics(exam_data)
+        except Exception as e:
+            print(f"[ERROR] 成长指标计算失败: {str(e)}")
+            return
+        self.post_to_ui(self.on_metrics_ready, version, metrics)
+
+    def on_metrics_ready(self, version, metrics):
+        """界面线程：换入计算好的成长指标（期间数据又有变化时丢弃），并补上当前学生的指标"""
+        if version != self.metrics_version:
+            return
+        self.metrics = metrics
+        if self.current_student is not None and self.card_list is not None:
+            self.card_list.metrics_label.configure(text=self.metrics_subtitle())
+
+    def on_load_finished(self, error):
+        """全部文件读取完成"""
+        if error is None and self.exam_data.empty:
+            error = ValueError("没有找到有效考试文件")
+        if error is not None:
+            messagebox.showerror("初始化错误", f"数据加载失败：{str(error)}")
+            self.root.destroy()
+            return
+        
+        elapsed = time.perf_counter() - self.load_started
+        status = (f"数据加载完成　考试次数：{len(self.exam_data['考试场次'].unique())}　"
+                  f"学生人数：{len(self.exam_data['姓名'].unique())}　"
+                  f"内存 {self.raw_memory:.1f} MB -> {memory_mb(self.exam_data):.1f} MB　"
+                  f"{self.cache.summary()}　用时 {elapsed:.1f} 秒")
+        if self.failed_files:
+            status += f"　失败文件：{'、'.join(self.failed_files)}"
+        self.status_var.set(status)
+        self.refresh_metrics()
+        self.start_watching()
+        self.refresh_dashboard()
+
+    def start_watching(self):
+        """开始定时检查考试文件夹（只启动一次）"""
+        if not self.watching:
+            self.watching = True
+            self.root.after(WATCH_INTERVAL_MS, self.poll_folder)
+
+    def poll_folder(self):
+        """定时检查考试文件夹，只重新读取变化的文件"""
+        self.root.after(WATCH_INTERVAL_MS, self.poll_folder)
+        if not self.watch_var.get() or self.reloading or self.watcher is None:
+            return
+        
+        added, modified, removed = self.watcher.poll()
+        if not (added or modified or removed):
+            return
+        self.reloading = True
+        self.status_var.set(f"检测到文件变化：新增 {len(added)} 个，修改 {len(modified)} 个，"
+                            f"删除 {len(removed)} 个，正在更新…")
+        if self.store is not None:
+            self.load_started = time.perf_counter()
+            threading.Thread(target=self.sync_store_in_background,
+                             args=(self.store, self.load_generation), daemon=True).start()
+            return
+        threading.Thread(target=self.reload_in_background,
+                         args=(added + modified, removed, self.current_dataset(), self.load_generation),
+                         daemon=True).start()
+
+    def reload_in_background(self, changed, removed, dataset, generation):
+        """后台线程：读取变化的文件，在数据集副本上增量合并后交回界面线程"""
+        try:
+            started = time.perf_counter()
+            self.cache.discard(removed)
+            frames = list(iter_exam_frames(changed, self.cache, self.workers, prune=False, sheets=self.sheets))
+            dataset, failed = dataset.with_changes(frames, removed)
+            self.post_load_result(generation, self.apply_folder_changes, dataset,
+                                  len(frames) - len(failed), failed, removed, time.perf_counter() - started)
+        except Exception as e:
+            self.post_load_result(generation, self.apply_folder_changes, None, 0, [], [], 0, e)
+
+    def apply_folder_changes(self, dataset, updated, failed, removed, elapsed, error=None):
+        """换用已合并文件夹变化的数据集"""
+        self.reloading = False
+        if error is not None:
+            self.status_var.set(f"自动刷新失败：{str(error)}")
+            return
+        
+        self.use_dataset(dataset)
+        self.refresh_metrics()
+        status = f"已更新 {updated} 个文件，移除 {len(removed)} 个文件，用时 {elapsed:.2f} 秒"
+        if failed:
+            status += f"　失败文件：{'、'.join(failed)}"
+        self.status_var.set(status)
+        self.refresh_dashboard()
+        self.refresh_current_student()
+
+    def refresh_current_student(self):
+        """数据变化后重新显示当前学生，该学生已不存在时清空显示"""
+        if self.current_student is None:
+            return
+        if self.lookup_records(self.current_student, self.current_key).empty:
+            self.clear_display()
+            self.current_student = self.current_key = None
+            return
+        self.display_student_info(self.current_student, self.current_key)
+
+    def on_search_changed(self, *args):
+        """输入变化时延迟发起联想查询"""
+        if self.suppress_suggest:
+            return
+        if self.suggest_job is not None:
+            self.root.after_cancel(self.suggest_job)
+        self.suggest_job = self.root.after(SUGGEST_DELAY_MS, self.request_suggestions)
+
+    def request_suggestions(self):
+        """向后台线程提交联想查询"""
+        self.suggest_job = None
+        query = self.search_var.get().strip()
+        if not query:
+            self.suggest_worker.cancel()
+            self.hide_suggestions()
+            return
+        self.suggest_worker.submit(query,
+            lambda q, results, elapsed: self.root.after(0, self.show_suggestions, q, results, elapsed))
+
+    def show_suggestions(self, query, results, elapsed):
+        """在搜索框下方显示联想结果"""
+        if query != self.search_var.get().strip():
+            return
+        if PERF.enabled:
+            # 从提交查询到结果送回界面线程的延迟，在F12面板中查看分布
+            PERF.record('suggest_latency', elapsed)
+        if not results:
+            self.hide_suggestions()
+            return
+        
+        self.suggest_items = self.expand_homonyms(results)[:SUGGEST_LIMIT]
+        self.suggest_list.delete(0, tk.END)
+        for name, key in self.suggest_items:
+            self.suggest_list.insert(tk.END, self.candidate_label(name, key))
+        self.suggest_list.configure(height=len(self.suggest_items))
+        self.suggest_list.place(in_=self.search_entry, x=0, rely=1.0, relwidth=1.0)
+        self.suggest_list.lift()
+
+    def hide_suggestions(self, event=None):
+        """隐藏联想列表"""
+        self.suggest_list.place_forget()
+
+    def focus_suggestions(self, event=None):
+        """方向键进入联想列表"""
+        if self.suggest_list.winfo_ismapped():
+            self.suggest_list.focus_set()
+            self.suggest_list.selection_clear(0, tk.END)
+            self.suggest_list.selection_set(0)
+            self.suggest_list.activate(0)
+        return "break"
+
+    def on_suggestion_chosen(self, event=None):
+        """选中联想结果"""
+        selection = self.suggest_list.curselection()
+        if not selection:
+            return
+        name, key = self.suggest_items[selection[0]]
+        self.hide_suggestions()
+        
+        self.suppress_suggest = True
+        self.search_var.set(name)
+        self.suppress_suggest = False
+        
+        self.search_entry.focus_set()
+        self.display_student_info(name, key)
+
+    @PERF.timed('on_search')
     def on_search(self, event=None):
         """处理搜索事件"""
+        self.suggest_worker.cancel()
+        self.hide_suggestions()
         name = self.search_var.get().strip()
         if not name:
             return
         
-        all_names = self.exam_data['姓名'].unique()
-        matches = get_close_matches(name, all_names, n=3, cutoff=0.6)
+        matches = self.expand_homonyms(self.name_index.search(name, n=3, cutoff=0.6))
         
         if not matches:
             messagebox.showwarning("搜索提示", "未找到匹配的学生")
@@ -262,10 +3217,10 @@ class ScoreAnalysisApp:
         if len(matches) > 1:
             self.show_selection_dialog(matches)
         else:
-            self.display_student_info(matches[0])
+            self.display_student_info(*matches[0])
 
     def show_selection_dialog(self, matches):
-        """显示选择对话框"""
+        """显示选择对话框，matches 为 (姓名, 学生标识) 列表"""
         dialog = tk.Toplevel(self.root)
         dialog.title("学生选择")
         dialog.geometry("300x150+500+300")
@@ -277,24 +3232,34 @@ class ScoreAnalysisApp:
             background=self.colors['background']
         ).pack(pady=5)
         
-        for name in matches:
+        for name, key in matches:
             btn = ttk.Button(
                 dialog,
-                text=name,
+                text=self.candidate_label(name, key),
                 style='Search.TButton',
-                command=lambda n=name: (dialog.destroy(), self.display_student_info(n))
+                command=lambda n=name, k=key: (dialog.destroy(), self.display_student_info(n, k))
             )
             btn.pack(fill=tk.X, padx=20, pady=2)
             
-    def display_student_info(self, name):
-        """显示学生信息"""
+    @PERF.timed('display_student_info')
+    def display_student_info(self, name, key=None):
+        """显示学生信息（同名学生未指定学生标识时先让用户选择）"""
+        if key is None:
+            keys = self.student_keys_of(name)
+            if len(keys) > 1:
+                self.show_selection_dialog([(name, k) for k in keys])
+                return
+            # 记下学生标识，数据变化后重新显示时不会与新出现的同名学生混淆
+            key = keys[0] if keys else None
         self.clear_display()
         self.current_student = name
+        self.current_key = key
         
-        records = self.exam_data[self.exam_data['姓名'] == name].sort_values('考试场次')
+        records = self.lookup_records(name, key)
         if records.empty:
             messagebox.showwarning("提示", "未找到该学生的记录")
             return
+        self.current_label = self.candidate_label(name, key, records)
         
         # 左侧信息面板
         self.create_info_section(self.info_panel, records)
@@ -302,254 +3267,157 @@ class ScoreAnalysisApp:
         # 右侧图表面板
         self.create_score_trend_chart(records)
 
+    @PERF.timed('create_info_section')
     def create_info_section(self, parent, records):
-        """创建学生信息区块"""
-        canvas = tk.Canvas(parent, bg='white', highlightthickness=0)
-        scrollbar = ttk.Scrollbar(parent, command=canvas.yview)
-        scroll_frame = ttk.Frame(canvas)
+        """创建学生信息区块（卡片控件跨学生复用）"""
+        if self.card_list is None:
+            self.card_list = ExamCardList(parent, self)
+        self.card_list.show(f"👤 学生档案：{self.current_label}",
+                            records.drop_duplicates('考试场次'), self.metrics_subtitle())
+
+    def metrics_subtitle(self):
+        """当前学生的成长指标摘要（只读取后台算好的结果）"""
+        if self.metrics is None:
+            return "成长指标计算中…"
+        key = (self.current_student, self.current_key)
+        return describe_metrics(self.metrics.loc[key]) if key in self.metrics.index else ""
+
+    def load_snapshot(self, path):
+        """载入数据快照，替换当前数据及全部索引"""
+        started = time.perf_counter()
+        exam_data, student_index, aggregates, meta = import_snapshot(path)
+        if exam_data.empty:
+            raise ValueError("快照中没有考试数据")
         
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        # 进行中的文件加载或数据库同步的结果不能再合并进快照数据
+        self.cancel_loading()
+        self.store = None
+        self.use_dataset(ExamDataset(exam_data, student_index, NameSearchIndex(exam_data['姓名'].unique()),
+                                     aggregates))
+        self.refresh_metrics()
+        # 快照数据与本机考试文件夹无关，不再自动合并文件变化
+        self.watch_var.set(False)
+        
+        self.status_var.set(f"已载入数据快照 {os.path.basename(path)}（{meta['created']}）　"
+                            f"考试次数：{exam_data['考试场次'].nunique()}　"
+                            f"学生人数：{len(student_index.by_name)}　"
+                            f"用时 {time.perf_counter() - started:.2f} 秒")
+        self.refresh_dashboard()
+        self.refresh_current_student()
+
+    def snapshot_source(self):
+        """导出快照所用的数据与索引（数据库模式下从数据库读取全部记录）"""
+        if self.store is not None:
+            data = compact_exam_data(self.store.all_records())
+            return data, StudentIndex(data), self.aggregates
+        return self.exam_data, self.student_index, self.aggregates
+
+    def export_snapshot_dialog(self):
+        """导出数据快照"""
+        if self.exam_data.empty and self.store is None:
+            messagebox.showwarning("提示", "数据尚未加载完成")
+            return
+        path = filedialog.asksaveasfilename(parent=self.root, title="导出数据快照",
+            defaultextension='.arrow', filetypes=[("成绩快照", "*.arrow"), ("所有文件", "*.*")])
+        if not path:
+            return
+        try:
+            started = time.perf_counter()
+            size = export_snapshot(path, *self.snapshot_source())
+            self.status_var.set(f"快照已导出：{os.path.basename(path)}　{size / 1024 / 1024:.1f} MB　"
+                                f"用时 {time.perf_counter() - started:.2f} 秒")
+        except Exception as e:
+            messagebox.showerror("导出失败", f"快照导出失败：{str(e)}")
+
+    def import_snapshot_dialog(self):
+        """导入数据快照"""
+        path = filedialog.askopenfilename(parent=self.root, title="导入数据快照",
+            filetypes=[("成绩快照", "*.arrow"), ("所有文件", "*.*")])
+        if not path:
+            return
+        try:
+            self.load_snapshot(path)
+        except Exception as e:
+            messagebox.showerror("导入失败", f"快照导入失败：{str(e)}")
+
+    def show_class_dashboard(self):
+        """打开班级对比面板（已打开时置于前台）"""
+        if self.dashboard is not None and self.dashboard.exists():
+            self.dashboard.window.lift()
+            return
+        if not self.aggregates.by_session:
+            messagebox.showwarning("提示", "数据尚未加载完成")
+            return
+        self.dashboard = ClassDashboard(self)
+
+    def refresh_dashboard(self):
+        """数据变化后刷新已打开的班级对比面板"""
+        if self.dashboard is not None and self.dashboard.exists():
+            self.dashboard.reload()
+
+    def show_improvement_ranking(self):
+        """进步排行：全年级按进步幅度排序，点击列标题切换排序，双击查看学生"""
+        metrics = self.metrics
+        if metrics is None:
+            messagebox.showinfo("提示", "成长指标正在计算，请稍后再试")
+            return
+        if metrics.empty:
+            messagebox.showwarning("提示", "数据尚未加载完成")
+            return
         
-        canvas.create_window((0,0), window=scroll_frame, anchor=tk.NW)
-        scroll_frame.bind("<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all")))
+        dialog = tk.Toplevel(self.root)
+        dialog.title("进步排行")
+        dialog.geometry("900x600")
+        columns = ['姓名', '现班', '考试次数'] + METRIC_COLS
+        tree = ttk.Treeview(dialog, columns=columns, show='headings')
+        scrollbar = ttk.Scrollbar(dialog, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        students = {}
         
-        # 学生基本信息卡
-        info_card = ttk.Frame(scroll_frame, style='Info.TFrame')
-        info_card.pack(fill=tk.X, pady=10, padx=5)
+        def fill(by):
+            tree.delete(*tree.get_children())
+            if by == '姓名':
+                ranked = metrics.sort_index(level=by, sort_remaining=True)
+            elif by == '现班':
+                ranked = metrics.sort_values(by, key=lambda s: s.map(natural_key), kind='stable')
+            elif by in ('总分斜率', '累计级序进步', '最近级序变化', '最大级序进步'):
+                ranked = most_improved(metrics, by)
+            else:
+                ranked = metrics.sort_values(by, na_position='last', kind='stable')
+            students.clear()
+            for key, row in ranked.iterrows():
+                item = tree.insert('', tk.END, values=[key[0]] + ['' if pd.isna(row[col]) else row[col]
+                                                                  for col in columns[1:]])
+                students[item] = key
         
-        ttk.Label(info_card, 
-            text=f"👤 学生档案：{self.current_student}",
-            font=('微软雅黑', 14, 'bold'),
-            foreground=self.colors['primary']
-        ).pack(side=tk.LEFT, padx=10)
+        for col in columns:
+            tree.heading(col, text=col, command=lambda c=col: fill(c))
+            tree.column(col, width=80, anchor=tk.CENTER)
         
-        # 考试记录卡片
-        for exam_session, group in records.groupby('考试场次'):
-            exam_card = ttk.Frame(scroll_frame, 
-                style='Info.TFrame',
-                padding=15
-            )
-            exam_card.pack(fill=tk.X, pady=8, padx=5)
-            
-            # 考试场次标题
-            header_frame = ttk.Frame(exam_card)
-            header_frame.pack(fill=tk.X)
-            ttk.Label(header_frame, 
-                text="📅 " + exam_session,
-                font=('微软雅黑', 12, 'bold'),
-                foreground=self.colors['secondary']
-            ).pack(side=tk.LEFT)
-            
-            # 成绩表格布局
-            table_frame = ttk.Frame(exam_card)
-            table_frame.pack(fill=tk.X, pady=10)
-            
-            # 创建科目成绩行
-            subjects = [
-                ('语文', '语序'), ('数学', '数序'),
-                ('英语', '英序'), ('日语', '日序'),
-                ('生物', '生序'), ('政治', '政序'),
-                ('历史', '历序'), ('地理', '地序')
-            ]
-            
-            for idx, (score_col, rank_col) in enumerate(subjects):
-                score = group.iloc[0].get(score_col, 0)
-                if score > 0:
-                    row_frame = ttk.Frame(table_frame)
-                    row_frame.grid(row=idx//2, column=idx%2, sticky=tk.W, padx=10, pady=5)
-                    
-                    ttk.Label(row_frame, 
-                        text=f"{score_col}：",
-                        font=('微软雅黑', 10),
-                        foreground='#7F8C8D'
-                    ).pack(side=tk.LEFT)
-                    
-                    ttk.Label(row_frame, 
-                        text=f"{float(score):.1f} 分",
-                        font=('微软雅黑', 10, 'bold'),
-                        foreground=self.colors['dark']
-                    ).pack(side=tk.LEFT)
-                    
-                    ttk.Label(row_frame, 
-                        text=f"（排名 {int(group.iloc[0].get(rank_col, 0))}）",
-                        font=('微软雅黑', 9),
-                        foreground='#95A5A6'
-                    ).pack(side=tk.LEFT)
-            
-            # 总分显示
-            total_frame = ttk.Frame(exam_card)
-            total_frame.pack(fill=tk.X, pady=10)
-            total_score = group.iloc[0].get('总分', 0)
-            
-            ttk.Label(total_frame,
-                text="🏆 总分：",
-                font=('微软雅黑', 12, 'bold'),
-                foreground=self.colors['danger']
-            ).pack(side=tk.LEFT, padx=10)
-            
-            ttk.Label(total_frame,
-                text=f"{float(total_score):.1f} 分",
-                font=('微软雅黑', 12, 'bold'),
-                foreground=self.colors['danger']
-            ).pack(side=tk.LEFT)
-            
-            ttk.Label(total_frame,
-                text=f"（班级第 {int(group.iloc[0].get('班序', 0))} 名，年级第 {int(group.iloc[0].get('级序', 0))} 名）",
-                font=('微软雅黑', 10),
-                foreground='#95A5A6'
-            ).pack(side=tk.LEFT)
+        def on_open(event):
+            selection = tree.selection()
+            if selection:
+                self.display_student_info(*students[selection[0]])
+        tree.bind('<Double-1>', on_open)
+        
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(fill=tk.BOTH, expand=True)
+        fill('累计级序进步')
 
+    @PERF.timed('create_score_trend_chart')
     def create_score_trend_chart(self, records):
-        """创建横向对比柱状图"""
+        """创建横向对比柱状图（图表对象常驻，切换学生时只更新图元）"""
         if records.empty:
             return
         
+        self.chart_records = records
         try:
-            exam_sessions = [f"第{idx+1}次\n{session[:10]}" for idx, session in enumerate(records['考试场次'])]
-            scores = records['总分'].tolist()
-            class_ranks = records['班序'].tolist()
-            grade_ranks = records['级序'].tolist()
-            
-            max_score = max(scores) * 1.1
-            min_score = min(scores) * 0.9
-            num_exams = len(exam_sessions)
-            avg_score = sum(scores)/len(scores)
-
-            chart_container = ttk.Frame(self.chart_panel)
-            chart_container.pack(fill=tk.BOTH, expand=True)
-            
-            canvas = tk.Canvas(chart_container, bg='white', bd=0, highlightthickness=0, 
-                             scrollregion=(0, 0, max(1000, num_exams * 200), 800))
-            h_scroll = ttk.Scrollbar(chart_container, orient=tk.HORIZONTAL, command=canvas.xview)
-            v_scroll = ttk.Scrollbar(chart_container, orient=tk.VERTICAL, command=canvas.yview)
-            canvas.configure(xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set)
-            
-            h_scroll.pack(side=tk.BOTTOM, fill=tk.X)
-            v_scroll.pack(side=tk.RIGHT, fill=tk.Y)
-            canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-            margin = 100
-            chart_width = max(1000, num_exams * 200)
-            chart_height = 800
-            plot_width = chart_width - 2*margin
-            plot_height = chart_height - 2*margin
-
-            # 绘制坐标系统
-            self.draw_coordinate_system(canvas, margin, chart_width, chart_height, plot_height, max_score, min_score)
-
-            bar_width = 60
-            spacing = 40
-            rank_bar_height = 20
-
-            for idx, (session, score, c_rank, g_rank) in enumerate(zip(exam_sessions, scores, class_ranks, grade_ranks)):
-                x0 = margin + idx*(bar_width + spacing) + spacing
-                y_base = chart_height - margin
-                bar_height = (score - min_score)/(max_score - min_score) * plot_height
-                y1 = y_base - bar_height
-                color = self.get_color_gradient((score - min_score)/(max_score - min_score))
-                
-                                # 主柱状图
-                canvas.create_rectangle(x0, y1, x0+bar_width, y_base, 
-                                      fill=color, outline='', tags=("main_bar", f"exam_{idx}"))
-                
-                # 数据标签
-                canvas.create_text(x0 + bar_width/2, y1 - 25, 
-                                 text=f"{score:.1f}",
-                                 font=('微软雅黑', 10, 'bold'),
-                                 fill='#2c3e50')
-                canvas.create_text(x0 + bar_width/2, y1 - 45, 
-                                 text=f"班: {c_rank} | 级: {g_rank}",
-                                 font=('微软雅黑', 8),
-                                 fill='#e74c3c')
-                
-                # 考试标签
-                canvas.create_text(x0 + bar_width/2, y_base + 20, 
-                                 text=session, 
-                                 angle=45,
-                                 anchor=tk.NW,
-                                 font=('微软雅黑', 9),
-                                 fill='#666666')
-
-                # 排名条
-                self.draw_rank_bars(canvas, x0 + bar_width + 10, y_base, c_rank, g_rank, rank_bar_height)
-
-            # 平均参考线
-            avg_y = y_base - (avg_score - min_score)/(max_score - min_score)*plot_height
-            canvas.create_line(margin, avg_y, chart_width - margin, avg_y,
-                              fill='#e74c3c', width=2, dash=(4,2))
-            canvas.create_text(chart_width - margin - 100, avg_y - 15,
-                             text=f"平均分 {avg_score:.1f}",
-                             font=('微软雅黑', 10, 'bold'),
-                             fill='#e74c3c')
-
-            canvas.create_text(chart_width/2, 30,
-                             text=f"{self.current_student} 考试成绩横向对比",
-                             font=('微软雅黑', 16, 'bold'),
-                             fill='#2C3E50')
-
-            canvas.tag_bind("main_bar", "<Enter>", lambda e, c=canvas: self.on_bar_hover(e, c))
-            canvas.tag_bind("main_bar", "<Leave>", lambda e, c=canvas: c.delete("hover_info"))
-
+            if self.chart is None:
+                self.chart = ScoreChart(self.chart_panel, self)
+            self.chart.update(records, self.current_label)
         except Exception as e:
             print(f"图表绘制错误: {str(e)}")
 
-    def draw_coordinate_system(self, canvas, margin, chart_width, chart_height, plot_height, max_score, min_score):
-        """绘制坐标轴系统"""
-        # X轴
-        canvas.create_line(margin, chart_height - margin, 
-                          chart_width - margin, chart_height - margin, 
-                          width=2, fill='#2c3e50')
-        
-        # Y轴
-        canvas.create_line(margin, margin, 
-                          margin, chart_height - margin, 
-                          width=2, fill='#2c3e50')
-        
-        # Y轴刻度
-        for i in range(0, 11):
-            y = chart_height - margin - (i/10) * plot_height
-            y_base = chart_height - margin - (i/10)*plot_height
-            value = min_score + (max_score - min_score)*(i/10)
-            canvas.create_line(margin-5, y_base, margin, y_base, width=1, fill='#95a5a6')
-            canvas.create_text(margin-10, y_base, 
-                             text=f"{value:.0f}", 
-                             anchor=tk.E, 
-                             font=('微软雅黑', 8),
-                             fill='#7f8c8d')
-
-    def get_color_gradient(self, factor):
-        """生成渐变色"""
-        r = int(84 + (241-84)*(1 - factor))
-        g = int(153 + (238-153)*factor)
-        b = 255 if factor < 0.5 else 238
-        return f"#{r:02x}{g:02x}{b:02x}"
-
-    def draw_rank_bars(self, canvas, x, y_base, c_rank, g_rank, rank_bar_height):
-        """绘制排名对比条"""
-        # 班级排名条
-        c_rank_width = 100 * (1 - c_rank/50 if c_rank <=50 else 0.1)
-        canvas.create_rectangle(x, y_base - 40, x + c_rank_width, y_base - 40 + rank_bar_height,
-                              fill='#3498db', outline='')
-        
-        # 年级排名条
-        g_rank_width = 100 * (1 - g_rank/200 if g_rank <=200 else 0.1)
-        canvas.create_rectangle(x, y_base - 20, x + g_rank_width, y_base - 20 + rank_bar_height,
-                              fill='#2ecc71', outline='')
-        
-        # 图例
-        canvas.create_text(x + 110, y_base - 35, 
-                         text="班级排名", 
-                         anchor=tk.W,
-                         font=('微软雅黑', 7),
-                         fill='#3498db')
-        canvas.create_text(x + 110, y_base - 15, 
-                         text="年级排名", 
-                         anchor=tk.W,
-                         font=('微软雅黑', 7),
-                         fill='#2ecc71')
-
     def on_bar_hover(self, event, canvas):
         """处理柱状图悬停事件"""
         canvas.delete("hover_info")
@@ -560,6 +3428,12 @@ class ScoreAnalysisApp:
             exam_idx = int(tags[1].split("_")[1])
             x, y = event.x + 20, event.y - 20
             
+            record = self.chart_records.iloc[exam_idx]
+            session, total = record['考试场次'], record['总分']
+            class_diff = total - self.aggregates.value('mean', '总分', session, record['现班'])
+            grade_diff = total - self.aggregates.value('mean', '总分', session)
+            best_diff = total - self.chart_records['总分'].max()
+            
             # 绘制悬浮框
             canvas.create_rectangle(x, y, x+180, y+80, 
                                   fill='white', outline='#bdc3c7', 
@@ -568,9 +3442,9 @@ class ScoreAnalysisApp:
             # 添加对比信息
             canvas.create_text(x+10, y+10, 
                              text=f"考试次数: 第{exam_idx+1}次\n"
-                                  f"班级平均分对比: +15.6\n"
-                                  f"年级平均分对比: +23.4\n"
-                                  f"历史最高分差距: -8.2",
+                                  f"班级平均分对比: {format_diff(class_diff)}\n"
+                                  f"年级平均分对比: {format_diff(grade_diff)}\n"
+                                  f"历史最高分差距: {format_diff(best_diff)}",
                              anchor=tk.NW,
                              font=('微软雅黑', 9),
                              fill='#2c3e50',
@@ -578,12 +3452,97 @@ class ScoreAnalysisApp:
 
     def clear_display(self):
         """清空显示内容"""
-        for widget in self.info_panel.winfo_children():
-            widget.destroy()
-        for widget in self.chart_panel.winfo_children():
-            widget.destroy()
+        if self.card_list is not None:
+            self.card_list.clear()
+        if self.chart is not None:
+            self.chart.clear()
+
+    def show_perf_panel(self, event=None):
+        """性能调试面板：查看计数与耗时直方图，可开关采集并保存"""
+        panel = tk.Toplevel(self.root)
+        panel.title("性能统计")
+        panel.geometry("760x520")
+        
+        text = tk.Text(panel, font=('Consolas', 9), wrap=tk.NONE)
+        enabled_var = tk.BooleanVar(value=PERF.enabled)
+        
+        def refresh():
+            text.delete('1.0', tk.END)
+            text.insert(tk.END, PERF.report() if PERF.timings or PERF.counters
+                        else "暂无记录（勾选“采集性能数据”后操作界面）")
+        
+        def toggle():
+            # 启动时开启过 cProfile 的，重新勾选后继续采集
+            PERF.enable(profile=PERF.profiler is not None) if enabled_var.get() else PERF.disable()
+        
+        def reset():
+            PERF.reset()
+            refresh()
+        
+        def save():
+            path = filedialog.asksaveasfilename(parent=panel, defaultextension='.json',
+                filetypes=[("JSON", "*.json"), ("文本报告", "*.txt"), ("cProfile 数据", "*.prof")])
+            if not path:
+                return
+            try:
+                PERF.dump(path)
+            except Exception as e:
+                messagebox.showerror("保存失败", str(e), parent=panel)
+        
+        buttons = ttk.Frame(panel)
+        buttons.pack(fill=tk.X, padx=10, pady=5)
+        ttk.Checkbutton(buttons, text="采集性能数据", variable=enabled_var, command=toggle).pack(side=tk.LEFT)
+        for label, command in (("刷新", refresh), ("清空", reset), ("保存…", save)):
+            ttk.Button(buttons, text=label, command=command).pack(side=tk.LEFT, padx=5)
+        text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+        refresh()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="学生成绩分析系统")
+    parser.add_argument('--data', default='exams', help="考试数据文件夹（默认 exams）")
+    parser.add_argument('--report', metavar='DIR', help="不启动界面，为全部学生生成报告到指定目录")
+    parser.add_argument('--formats', default=','.join(REPORT_FORMATS), help="报告格式，逗号分隔：csv,json,html")
+    parser.add_argument('--workers', type=int, default=LOAD_WORKERS, help="并行解析进程数")
+    parser.add_argument('--sheets', help="读取的工作表，逗号分隔的序号或名称（支持*通配符），默认全部")
+    parser.add_argument('--db', metavar='PATH', help="使用SQLite数据库存储考试记录（冷启动只打开数据库）")
+    parser.add_argument('--snapshot', metavar='FILE', help="从数据快照启动，跳过Excel解析")
+    parser.add_argument('--export-snapshot', metavar='FILE', help="不启动界面，读取考试文件夹并导出数据快照")
+    parser.add_argument('--snapshot-compression', default=SNAPSHOT_COMPRESSIONS[0], choices=SNAPSHOT_COMPRESSIONS,
+                        help="快照压缩方式（uncompressed 可直接内存映射读取）")
+    parser.add_argument('--perf', action='store_true', help="采集热点函数的耗时与计数（F12 查看）")
+    parser.add_argument('--profile', action='store_true', help="同时使用 cProfile 采集调用栈")
+    parser.add_argument('--perf-out', metavar='FILE', help="退出时写出性能统计（.json/.txt/.prof）")
+    args = parser.parse_args(argv)
+    sheets = parse_sheet_spec(args.sheets)
+    
+    if args.perf or args.profile or args.perf_out:
+        # 写出 .prof 文件需要 cProfile 数据
+        PERF.enable(profile=args.profile or (args.perf_out or '').endswith('.prof'))
+    
+    try:
+        if args.report:
+            formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()]
+            generate_reports(args.data, args.report, formats, args.workers, sheets)
+            return
+        
+        if args.export_snapshot:
+            require_pyarrow()
+            cache = ExamCache(os.path.join(args.data, CACHE_DIR_NAME), sheets=sheets)
+            exam_data = process_data(args.data, cache, args.workers, sheets)
+            size = export_snapshot(args.export_snapshot, exam_data, compression=args.snapshot_compression)
+            print(f"[SNAPSHOT] {args.export_snapshot}　{len(exam_data)} 条记录　{size / 1024 / 1024:.1f} MB")
+            return
+        
+        root = tk.Tk()
+        app = ScoreAnalysisApp(root, args.data, args.db, sheets, args.snapshot, args.workers)
+        root.mainloop()
+    finally:
+        if args.perf_out:
+            # 写出失败只记录错误，不掩盖运行中抛出的异常
+            try:
+                PERF.dump(args.perf_out)
+            except Exception as e:
+                print(f"[ERROR] 性能统计写出失败: {args.perf_out} - {str(e)}")
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = ScoreAnalysisApp(root)
-    root.mainloop()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,83 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import query_score as qs
+
+HEADER = ['姓名', '现班', '语文', '数学', '总分', '语序', '数序', '班序', '级序']
+
+# 张伟 在 高一(1)班 和 高一(2)班 各有一人
+STUDENTS = [('张伟', '高一(1)班'), ('张伟', '高一(2)班'), ('李娜', '高一(1)班'), ('王芳', '高一(2)班')]
+SESSIONS = ['2023学年第一学期期中考试', '2023学年第一学期期末考试', '2023学年第二学期期中考试']
+
+
+def write_exam(path, title, rows, header=HEADER):
+    """写出一个考试文件：A1为考试场次，第2行为表头"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append([title])
+    ws.append(header)
+    for row in rows:
+        ws.append(list(row))
+    wb.save(path)
+    return str(path)
+
+
+def exam_rows(session_idx):
+    """每场考试各学生的成绩：张伟(1班)逐次进步，张伟(2班)逐次退步"""
+    rows = []
+    for idx, (name, class_name) in enumerate(STUDENTS):
+        trend = {0: 20, 1: -20}.get(idx, 0)
+        chinese, math = 90 + idx*5 + trend*session_idx, 100 - idx*5 + trend*session_idx
+        rows.append([name, class_name, chinese, math, chinese + math])
+    totals = sorted((row[4] for row in rows), reverse=True)
+    for row in rows:
+        class_totals = sorted((r[4] for r in rows if r[1] == row[1]), reverse=True)
+        row += [1, 1, class_totals.index(row[4]) + 1, totals.index(row[4]) + 1]
+    return rows
+
+
+def assert_same_index(index, expected):
+    assert index.by_name.keys() == expected.by_name.keys()
+    assert index.by_key.keys() == expected.by_key.keys()
+    assert index.name_keys == expected.name_keys
+    for key in expected.by_key:
+        assert np.array_equal(index.lookup(*key), expected.lookup(*key))
+    for name in expected.by_name:
+        assert np.array_equal(index.lookup(name), expected.lookup(name))
+
+
+@pytest.fixture
+def exam_folder(tmp_path):
+    """按考试先后的逆序命名的三个考试文件（文件名顺序与时间顺序不同）"""
+    folder = tmp_path / 'exams'
+    folder.mkdir()
+    for idx, title in enumerate(SESSIONS):
+        write_exam(folder / f'exam_{len(SESSIONS) - idx}.xlsx', title, exam_rows(idx))
+    return str(folder)
+
+
+@pytest.fixture
+def exam_data(exam_folder):
+    return qs.process_data(exam_folder)
+
+
+@pytest.fixture
+def transfer_folder(tmp_path):
+    """带学号的考试文件：两名张伟同在高一(1)班，王芳（无学号）最后一场转入高一(1)班，
+    李娜第一场缺少学号"""
+    folder = tmp_path / 'transfer'
+    folder.mkdir()
+    header = ['姓名', '现班', '学号', '总分', '级序']
+    for idx, title in enumerate(SESSIONS):
+        rows = [['张伟', '高一(1)班', '1001', 300 + idx*10, 2],
+                ['张伟', '高一(1)班', '1002', 280 - idx*10, 3],
+                ['李娜', '高一(1)班', None if idx == 0 else 1003, 320, 1],
+                ['王芳', '高一(2)班' if idx < 2 else '高一(1)班', None, 200 + idx*20, 4]]
+        write_exam(folder / f'exam_{len(SESSIONS) - idx}.xlsx', title, rows, header)
+    return str(folder)
@@ -0,0 +1,69 @@
+import sqlite3
+
+import query_score as qs
+from conftest import exam_rows, write_exam
+
+
+def test_session_values_match_data(exam_data):
+    aggregates = qs.ExamAggregates(exam_data)
+    for session, rows in exam_data.groupby('考试场次', observed=True):
+        assert aggregates.value('mean', '总分', session) == rows['总分'].mean()
+        assert aggregates.value('max', '语文', session) == rows['语文'].max()
+        for class_name, class_rows in rows.groupby('现班', observed=True):
+            assert aggregates.value('mean', '总分', session, class_name) == class_rows['总分'].mean()
+
+
+def test_sessions_follow_stored_order(tmp_path):
+    # 标题中没有年份，时间先后只能由文件名得出；按标题字典序则顺序相反
+    folder = tmp_path / 'exams'
+    folder.mkdir()
+    write_exam(folder / '2023.11.xlsx', 'A 月考', exam_rows(1))
+    write_exam(folder / '2023.09.xlsx', 'B 月考', exam_rows(0))
+    data = qs.process_data(str(folder))
+    aggregates = qs.ExamAggregates(data)
+    assert aggregates.sessions() == ['B 月考', 'A 月考']
+
+    restored = qs.ExamAggregates.from_rows(aggregates.rows())
+    assert restored.sessions() == ['B 月考', 'A 月考']
+
+
+def test_sessions_without_stored_order_parse_titles(exam_data):
+    aggregates = qs.ExamAggregates(exam_data.drop(columns=qs.SESSION_ORDER_COL))
+    assert aggregates.sessions() == sorted(aggregates.by_session, key=qs.session_sort_key)
+
+
+def test_cohort_size_and_histogram(exam_data):
+    aggregates = qs.ExamAggregates(exam_data)
+    session = aggregates.sessions()[0]
+    assert aggregates.cohort_size(session) == 4
+    assert aggregates.cohort_size(session, '高一(1)班') == 2
+    assert sum(count for *_, count in aggregates.histogram('总分', session)) == 4
+
+
+def test_rows_without_name_are_not_counted(tmp_path):
+    folder = tmp_path / 'exams'
+    folder.mkdir()
+    rows = exam_rows(0) + [[None, '高一(1)班', 0, 0, 0, 0, 0, 0, 0]]
+    write_exam(folder / 'exam.xlsx', '2023学年第一学期期中考试', rows)
+    aggregates = qs.ExamAggregates(qs.process_data(str(folder)))
+    assert aggregates.cohort_size('2023学年第一学期期中考试') == 4
+    assert aggregates.cohort_size('2023学年第一学期期中考试', '高一(1)班') == 2
+
+
+def test_old_store_rebuilds_aggregates(exam_folder, tmp_path):
+    path = str(tmp_path / 'exams.db')
+    qs.SQLiteExamStore(path).sync(exam_folder)
+    # 模拟旧版本数据库：没有人数、分数段和场次序统计
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute("DELETE FROM aggregates WHERE stat = 'size' OR stat LIKE 'bin%' OR stat = 'order'")
+        conn.execute("DELETE FROM meta WHERE key = 'version'")
+    conn.close()
+
+    store = qs.SQLiteExamStore(path)
+    aggregates = store.load_aggregates()
+    expected = qs.ExamAggregates(qs.process_data(exam_folder))
+    assert aggregates.sessions() == expected.sessions()
+    for session in expected.sessions():
+        assert aggregates.cohort_size(session) == expected.cohort_size(session)
+        assert aggregates.histogram('总分', session) == expected.histogram('总分', session)
@@ -0,0 +1,29 @@
+import benchmark
+import query_score as qs
+
+
+def test_generated_workbooks_parse(tmp_path):
+    files = benchmark.generate_workbooks(str(tmp_path / 'exams'), students=30, exams=3, classes=3)
+    assert len(files) == 3
+    data = qs.process_data(str(tmp_path / 'exams'))
+    assert len(data) == 90
+    assert data['现班'].nunique() == 3
+    assert (data['总分'] == data[[s.score for s in qs.SUBJECT_SCHEMA[:6]]].sum(axis=1)).all()
+
+
+def test_chart_data(exam_data):
+    records = exam_data[exam_data['姓名'] == '李娜']
+    chart = qs.prepare_chart_data(records)
+    assert chart.scores == records['总分'].tolist()
+    assert chart.grade_ranks == records['级序'].tolist()
+    assert chart.avg_score == records['总分'].mean()
+    assert len(chart.labels) == len(records)
+
+
+def test_run_benchmarks(tmp_path):
+    folder = str(tmp_path / 'exams')
+    benchmark.generate_workbooks(folder, students=20, exams=2, classes=2)
+    results = benchmark.run_benchmarks(folder, repeat=1, queries=5)
+    assert results['dataset']['rows'] == 40
+    assert results['name_search']['queries'] == 5
+    assert results['read_exam_file']['median_ms'] > 0
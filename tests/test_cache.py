@@ -0,0 +1,88 @@
+import json
+import os
+
+import pandas as pd
+
+import query_score as qs
+from conftest import SESSIONS, exam_rows, write_exam
+
+
+def cached_files(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name != qs.ExamCache.MANIFEST)
+
+
+def test_cache_hit_after_save(exam_folder, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    parsed = qs.process_data(exam_folder, qs.ExamCache(cache_dir))
+
+    cache = qs.ExamCache(cache_dir)
+    cached = qs.process_data(exam_folder, cache)
+    assert cache.hits == len(SESSIONS) and cache.misses == 0
+    pd.testing.assert_frame_equal(cached, parsed)
+
+
+def test_modified_file_is_parsed_again(exam_folder, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    qs.process_data(exam_folder, qs.ExamCache(cache_dir))
+    rows = exam_rows(0)
+    rows[0][4] = 1
+    write_exam(os.path.join(exam_folder, 'exam_3.xlsx'), SESSIONS[0], rows)
+    st = os.stat(os.path.join(exam_folder, 'exam_3.xlsx'))
+    os.utime(os.path.join(exam_folder, 'exam_3.xlsx'), ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+    cache = qs.ExamCache(cache_dir)
+    data = qs.process_data(exam_folder, cache)
+    assert cache.hits == len(SESSIONS) - 1 and cache.misses == 1
+    assert 1 in set(data['总分'])
+
+
+def test_schema_change_removes_old_cache_files(exam_folder, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    files = qs.list_exam_files(exam_folder)
+    list(qs.iter_exam_frames(files, qs.ExamCache(cache_dir)))
+    assert len(cached_files(cache_dir)) == len(files)
+
+    manifest_path = os.path.join(cache_dir, qs.ExamCache.MANIFEST)
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest['schema'] = 'outdated'
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    cache = qs.ExamCache(cache_dir)
+    assert cache.manifest == {}
+    assert cached_files(cache_dir) == []
+
+
+def test_sheet_selection_change_removes_old_cache_files(exam_folder, tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    files = qs.list_exam_files(exam_folder)
+    list(qs.iter_exam_frames(files, qs.ExamCache(cache_dir)))
+
+    qs.ExamCache(cache_dir, sheets=('1',))
+    assert cached_files(cache_dir) == []
+
+
+def test_unusable_cache_dir_falls_back_to_parsing(exam_folder, tmp_path, capsys):
+    blocker = tmp_path / 'not_a_dir'
+    blocker.write_text('')
+    cache = qs.ExamCache(str(blocker / 'cache'))
+    data = qs.process_data(exam_folder, cache)
+    assert len(data) == len(SESSIONS) * 4
+    assert not cache.writable and cache.misses == len(SESSIONS)
+    assert '缓存不可写' in capsys.readouterr().out
+
+
+def test_cache_write_failure_falls_back_to_parsing(exam_folder, tmp_path, monkeypatch):
+    def disk_full(df, path_base):
+        with open(path_base + '.feather', 'wb') as f:
+            f.write(b'partial')
+        raise OSError(28, 'No space left on device')
+
+    cache_dir = str(tmp_path / 'cache')
+    monkeypatch.setattr(qs, 'write_frame', disk_full)
+    cache = qs.ExamCache(cache_dir)
+    data = qs.process_data(exam_folder, cache)
+    assert len(data) == len(SESSIONS) * 4
+    assert not cache.writable and cache.manifest == {}
+    assert os.listdir(cache_dir) == []
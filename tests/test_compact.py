@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import query_score as qs
+
+IDS = {'张伟': '1001', '李娜': '1002', '王芳': '1003'}
+
+
+def exam_frame(session, source, rows):
+    df = pd.DataFrame(rows, columns=['姓名', '现班', '语文', '数学', '总分', '班序', '级序'])
+    df['学号'] = df['姓名'].map(IDS)
+    df['考试场次'] = session
+    df['来源文件'] = source
+    return df
+
+
+@pytest.fixture
+def combined():
+    return pd.concat([
+        exam_frame('2023学年第一学期期中考试', 'a.xlsx', [
+            ['张伟', '高一(1)班', 90, 100, 190, 1, 3],
+            ['李娜', '高一(2)班', 85.5, 99, 184.5, 2, None]]),
+        exam_frame('2023学年第一学期期末考试', 'b.xlsx', [
+            ['张伟', '高一(1)班', 92, np.nan, 92, 1, 5],
+            ['王芳', '高一(2)班', 70.25, 80, 150.1, None, 9]])
+    ], ignore_index=True)
+
+
+def test_compact_dtypes(combined):
+    compact = qs.compact_exam_data(combined)
+    for col in qs.CATEGORY_COLS:
+        assert isinstance(compact[col].dtype, pd.CategoricalDtype)
+    assert pd.api.types.is_integer_dtype(compact['班序'])
+    assert pd.api.types.is_integer_dtype(compact['级序'])
+    assert compact['班序'].dtype.itemsize == 1
+    # 含小数或缺考的成绩列为浮点：float32 可精确表示时用 float32，否则保留 float64
+    assert compact['语文'].dtype == np.float32
+    assert compact['数学'].dtype == np.float32
+    assert compact['总分'].dtype == np.float64
+    assert qs.memory_mb(compact) < qs.memory_mb(combined)
+
+
+def test_compact_round_trips_values(combined):
+    compact = qs.compact_exam_data(combined)
+    for col in qs.CATEGORY_COLS:
+        assert list(compact[col].astype(str)) == list(combined[col].astype(str))
+    for col in ('语文', '数学', '总分'):
+        assert np.array_equal(compact[col].to_numpy(dtype=float), combined[col].to_numpy(dtype=float),
+                              equal_nan=True)
+    # 缺失排名按0处理
+    assert list(compact['班序']) == [1, 2, 1, 0]
+    assert list(compact['级序']) == [3, 0, 5, 9]
+
+
+def test_integral_scores_downcast_to_int():
+    compact = qs.compact_exam_data(exam_frame('期中', 'a.xlsx', [['张伟', '高一(1)班', 90, 100, 190, 1, 3]]))
+    assert pd.api.types.is_integer_dtype(compact['总分'])
+    assert compact['总分'].iloc[0] == 190
+
+
+def test_concat_compact_keeps_categories(combined):
+    first = qs.compact_exam_data(combined.iloc[:2])
+    second = qs.compact_exam_data(combined.iloc[2:])
+    merged = qs.concat_compact(first, second)
+    expected = qs.compact_exam_data(combined)
+    for col in qs.CATEGORY_COLS:
+        assert isinstance(merged[col].dtype, pd.CategoricalDtype)
+        assert list(merged[col].astype(str)) == list(expected[col].astype(str))
+    for col in ('语文', '数学', '总分', '班序', '级序'):
+        assert np.array_equal(merged[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float),
+                              equal_nan=True)
+
+
+def test_concat_compact_with_different_columns(combined):
+    # 第二个文件多出物理成绩与排名、缺少学号列
+    first = qs.compact_exam_data(combined.iloc[:2])
+    extra = combined.iloc[2:].drop(columns='学号').assign(物理=[60, 70], 物序=[5, None])
+    merged = qs.concat_compact(first, qs.compact_exam_data(extra))
+    expected = qs.compact_exam_data(pd.concat([combined.iloc[:2], extra], ignore_index=True))
+    assert list(merged['物序']) == [0, 0, 5, 0]
+    for col in ('物序', '班序', '级序'):
+        assert pd.api.types.is_integer_dtype(merged[col]), col
+        assert merged[col].dtype == expected[col].dtype, col
+    assert merged['物理'].dtype == expected['物理'].dtype
+    assert isinstance(merged['学号'].dtype, pd.CategoricalDtype)
+    assert list(merged['学号'].astype(object).fillna('')) == ['1001', '1002', '', '']
+    assert qs.rank_value(np.nan) == 0
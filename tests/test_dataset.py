@@ -0,0 +1,36 @@
+import pandas as pd
+
+import query_score as qs
+from conftest import assert_same_index
+
+
+def file_frames(folder):
+    return list(qs.iter_exam_frames(qs.list_exam_files(folder)))
+
+
+def test_with_frames_matches_full_build(exam_folder):
+    dataset = qs.ExamDataset()
+    for file, df in file_frames(exam_folder):
+        dataset, memory = dataset.with_frames([df])
+        assert memory > 0
+    expected = qs.process_data(exam_folder)
+    pd.testing.assert_frame_equal(dataset.exam_data, expected, check_categorical=False)
+    assert_same_index(dataset.student_index, qs.StudentIndex(expected))
+    assert dataset.name_index.names == sorted(expected['姓名'].unique())
+    assert dataset.aggregates.by_class == qs.ExamAggregates(expected).by_class
+
+
+def test_with_frames_leaves_original_untouched(exam_folder):
+    (first_file, first), *rest = file_frames(exam_folder)
+    base, _ = qs.ExamDataset().with_frames([first])
+    data, names = base.exam_data.copy(), list(base.name_index.names)
+    by_name = dict(base.student_index.by_name)
+    sessions = set(base.aggregates.by_session)
+
+    updated, _ = base.with_frames([df for file, df in rest])
+    assert len(updated.exam_data) > len(base.exam_data)
+    pd.testing.assert_frame_equal(base.exam_data, data)
+    assert base.name_index.names == names
+    assert base.student_index.by_name.keys() == by_name.keys()
+    assert all(base.student_index.by_name[name] is rows for name, rows in by_name.items())
+    assert set(base.aggregates.by_session) == sessions
@@ -0,0 +1,44 @@
+import pandas as pd
+
+import query_score as qs
+from conftest import STUDENTS
+
+
+def test_iter_exam_frames_yields_every_file(exam_folder):
+    files = qs.list_exam_files(exam_folder)
+    frames = list(qs.iter_exam_frames(files))
+    assert sorted(file for file, df in frames) == files
+    assert all(len(df) == len(STUDENTS) for file, df in frames)
+
+
+def test_frames_follow_file_order(exam_folder, tmp_path):
+    files = qs.list_exam_files(exam_folder)
+    cache = qs.ExamCache(str(tmp_path / 'cache'))
+    # 只缓存中间的文件：命中与新解析的文件交错时仍按文件顺序产出
+    list(qs.iter_exam_frames(files[1:2], cache, prune=False))
+
+    for workers in (1, 2):
+        loaded = [file for file, df in qs.iter_exam_frames(files, cache, workers)]
+        assert loaded == files
+
+
+def test_parallel_load_matches_serial(exam_folder):
+    serial = qs.process_data(exam_folder, workers=1)
+    parallel = qs.process_data(exam_folder, workers=2)
+    pd.testing.assert_frame_equal(serial, parallel)
+
+
+def test_main_passes_workers_to_gui(monkeypatch, tmp_path):
+    created = {}
+
+    class Root:
+        def mainloop(self):
+            pass
+
+    def app(root, *args):
+        created['args'] = args
+
+    monkeypatch.setattr(qs.tk, 'Tk', Root)
+    monkeypatch.setattr(qs, 'ScoreAnalysisApp', app)
+    qs.main(['--data', str(tmp_path), '--workers', '3'])
+    assert created['args'][-1] == 3
@@ -0,0 +1,88 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import query_score as qs
+from conftest import SESSIONS, exam_rows, write_exam
+
+
+def test_metrics_follow_total_trend(tmp_path):
+    folder = tmp_path / 'exams'
+    folder.mkdir()
+    for idx, title in enumerate(SESSIONS):
+        write_exam(folder / f'exam_{idx + 1}.xlsx', title,
+                   [row for row in exam_rows(idx) if row[1] == '高一(1)班'])
+    metrics = qs.compute_student_metrics(qs.process_data(str(folder)))
+    assert metrics.loc[('张伟', ''), '总分斜率'] == 40
+    assert metrics.loc[('李娜', ''), '总分斜率'] == 0
+    assert metrics.loc[('李娜', ''), '总分波动'] == 0
+    assert metrics.loc[('李娜', ''), '现班'] == '高一(1)班'
+    assert (metrics['考试次数'] == 3).all()
+
+
+def test_homonyms_get_separate_metrics(exam_data):
+    metrics = qs.compute_student_metrics(exam_data)
+    assert metrics.index.names == ['姓名', qs.STUDENT_KEY]
+    assert len(metrics) == 4
+    rising, falling = metrics.loc[('张伟', '高一(1)班')], metrics.loc[('张伟', '高一(2)班')]
+    assert rising['总分斜率'] == 40
+    assert falling['总分斜率'] == -40
+    assert (metrics['考试次数'] == 3).all()
+
+
+def test_slope_matches_polyfit(exam_data):
+    metrics = qs.compute_student_metrics(exam_data)
+    index = qs.StudentIndex(exam_data)
+    for key, row in metrics.iterrows():
+        totals = exam_data.iloc[index.lookup(*key)]['总分'].to_numpy(dtype=float)
+        slope = np.polyfit(np.arange(len(totals)), totals, 1)[0]
+        assert np.isclose(row['总分斜率'], round(slope, 2))
+        assert np.isclose(row['总分波动'], round(totals.std(ddof=1), 2))
+
+
+def test_exam_count_ignores_missing_totals(exam_data):
+    data = exam_data.copy()
+    data.loc[data.index[data['姓名'] == '李娜'][0], '总分'] = 0
+    row = qs.compute_student_metrics(data).loc[('李娜', '')]
+    # 缺考的一次不参与总分趋势，但仍计入考试次数
+    assert row['考试次数'] == 3
+    assert not pd.isna(row['总分斜率'])
+
+
+@pytest.fixture
+def unnamed_folder(exam_folder):
+    """第一场考试多出一行没有姓名的记录"""
+    write_exam(os.path.join(exam_folder, 'exam_0.xlsx'), SESSIONS[0],
+               [[None, '高一(1)班', 150, 150, 300, 1, 1, 1, 1]])
+    return exam_folder
+
+
+def test_rows_without_name_are_ignored(unnamed_folder):
+    metrics = qs.compute_student_metrics(qs.process_data(unnamed_folder))
+    assert len(metrics) == 4
+    assert metrics.index.get_level_values('姓名').notna().all()
+
+
+@pytest.mark.parametrize('folder', ['exam_folder', 'transfer_folder', 'unnamed_folder'])
+def test_store_metrics_match_memory(folder, request, tmp_path):
+    folder = request.getfixturevalue(folder)
+    store = qs.SQLiteExamStore(str(tmp_path / 'exams.db'))
+    store.sync(folder)
+    from_db = store.student_metrics().sort_index()
+    in_memory = qs.compute_student_metrics(qs.process_data(folder)).sort_index()
+    assert list(from_db.index) == list(in_memory.index)
+    for col in in_memory.columns:
+        if pd.api.types.is_numeric_dtype(in_memory[col]):
+            assert np.allclose(from_db[col].astype(float), in_memory[col].astype(float), equal_nan=True)
+        else:
+            assert list(from_db[col]) == list(in_memory[col])
+
+
+def test_report_summary_uses_class_metrics(exam_data):
+    _, summary = qs.build_student_reports(exam_data)
+    slopes = summary.set_index(['姓名', '现班'])['总分斜率']
+    assert slopes[('张伟', '高一(1)班')] == 40
+    assert slopes[('张伟', '高一(2)班')] == -40
+    assert not pd.isna(slopes).any()
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+import query_score as qs
+
+
+def read_with_pandas(file_path):
+    """改写前的读取方式：pandas.read_excel 整表读入后逐列转换"""
+    raw = pd.read_excel(file_path, header=None, engine='openpyxl')
+    raw = raw.map(lambda x: str(x).replace('\n', ' ').strip() if pd.notnull(x) else x)
+    data = raw.iloc[2:].copy()
+    data.columns = [str(col).strip() for col in raw.iloc[1].tolist()]
+    data['考试场次'] = str(raw.iloc[0, 0]).strip()
+    for col in qs.NUMERIC_COLS:
+        if col in data.columns:
+            data[col] = pd.to_numeric(data[col], errors='coerce').fillna(0)
+    for col in qs.RANK_COLS:
+        if col in data.columns:
+            data[col] = pd.to_numeric(data[col], errors='coerce').fillna(0).astype(int)
+    return data
+
+
+def write_messy_exam(path):
+    """包含字符串数字、换行、缺考、中间空行和末尾空行的考试文件"""
+    wb = Workbook()
+    ws = wb.active
+    ws.append([' 2023学年第一学期期中考试\n'])
+    ws.append(['姓名', '现班', '学号', '语文', '数学', '英语', '总分', '语序', '数序', '英序', '班序', '级序'])
+    ws.append(['张伟 ', '高一(1)班', 1001, 120, ' 98.5 ', 110, 328.5, 3, '12', 5, 1, 8])
+    ws.append(['李\n娜', '高一(2)班', 1002, None, 100, '缺考', 100, None, 10, None, 30, 200])
+    ws.append([None] * 12)
+    ws.append(['王芳', '高一(1)班', '1003', 88, 77, 66, 231, 40, 50, 60, 2, 150])
+    ws.append([None] * 12)
+    wb.save(path)
+    return str(path)
+
+
+def test_streaming_parser_matches_pandas(tmp_path):
+    path = write_messy_exam(tmp_path / 'messy.xlsx')
+    parsed = qs.read_exam_file(path)
+    expected = read_with_pandas(path)
+
+    assert list(parsed.columns) == list(expected.columns)
+    assert list(parsed.index) == list(expected.index)
+    for col in qs.NUMERIC_COLS + qs.RANK_COLS:
+        if col in expected.columns:
+            assert np.array_equal(parsed[col].to_numpy(dtype=float), expected[col].to_numpy(dtype=float)), col
+            assert parsed[col].dtype == expected[col].dtype, col
+    for col in ('姓名', '现班', '考试场次'):
+        assert parsed[col].fillna('').astype(str).tolist() == expected[col].fillna('').astype(str).tolist()
+
+
+def test_header_aliases_and_duplicates():
+    layout = qs.compile_header(('姓名', '现班', '语文成绩', '外语', '总成绩', '年级排名', '语文'))
+    assert layout.columns == ('姓名', '现班', '语文', '英语', '总分', '级序', '语文（重复）')
+    assert layout.kinds == ('text', 'text', 'score', 'score', 'score', 'rank', 'text')
+    assert layout.missing == ()
+    assert qs.compile_header(('学号', '语文', '数学', '英语', '总分')).missing == ('姓名', '现班')
+
+
+def test_invalid_files_return_empty_frame(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['2023学年第一学期期中考试'])
+    ws.append(['学号', '语文', '数学', '英语', '总分'])
+    ws.append([1, 2, 3, 4, 9])
+    path = str(tmp_path / 'no_names.xlsx')
+    wb.save(path)
+    assert qs.read_exam_file(path).empty
+
+    empty = tmp_path / 'empty.xlsx'
+    empty.write_bytes(b'')
+    assert qs.read_exam_file(str(empty)).empty
+    assert qs.read_exam_file(str(tmp_path / 'missing.xlsx')).empty
+
+
+def test_spaced_total_header_still_matches():
+    layout = qs.compile_header(('姓名', '现班', '语文', '总 分', '级序'))
+    assert layout.columns == ('姓名', '现班', '语文', '总分', '级序')
+
+
+def test_integer_scores_keep_int_dtype(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['2023学年第一学期期中考试'])
+    ws.append(['姓名', '现班', '语文', '数学', '总分', '班序'])
+    ws.append(['张伟', '高一(1)班', 120, '98', 218, 1])
+    ws.append(['王芳', '高一(1)班', 88, 77.5, 165.5, 2])
+    path = str(tmp_path / 'ints.xlsx')
+    wb.save(path)
+    parsed = qs.read_exam_file(path)
+    expected = read_with_pandas(path)
+    for col in ('语文', '数学', '总分', '班序'):
+        assert parsed[col].dtype == expected[col].dtype, col
+    assert parsed['语文'].dtype == np.int64
+
+
+def test_column_count_uses_full_sheet_width(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(['2023学年第一学期期中考试'])
+    ws.append(['姓名', '现班', '语文', '总分'])
+    ws.append(['张伟', '高一(1)班', 120, 120, '备注'])
+    wide = str(tmp_path / 'wide.xlsx')
+    wb.save(wide)
+    assert qs.read_exam_file(wide)['总分'].tolist() == [120]
+
+    ws.delete_cols(5)
+    narrow = str(tmp_path / 'narrow.xlsx')
+    wb.save(narrow)
+    assert qs.read_exam_file(narrow).empty
@@ -0,0 +1,57 @@
+import json
+import os
+import pstats
+
+import pytest
+
+import query_score as qs
+
+
+@pytest.fixture
+def perf():
+    yield qs.PERF
+    qs.PERF.disable()
+    qs.PERF.profiler = None
+    qs.PERF.reset()
+
+
+def profiled_calls(profiler, name):
+    stats = pstats.Stats(profiler).stats
+    return sum(calls for (_, _, func), (calls, *_) in stats.items() if func == name)
+
+
+def test_profiler_resumes_after_disable(perf):
+    perf.enable(profile=True)
+    qs.parse_count('3')
+    perf.disable()
+    qs.parse_count('3')
+    assert profiled_calls(perf.profiler, 'parse_count') == 1
+
+    perf.enable(profile=True)
+    qs.parse_count('3')
+    perf.disable()
+    assert profiled_calls(perf.profiler, 'parse_count') == 2
+
+
+def test_perf_out_prof_enables_profiling(perf, exam_folder, tmp_path):
+    path = str(tmp_path / 'run.prof')
+    qs.main(['--data', exam_folder, '--report', str(tmp_path / 'reports'), '--workers', '1', '--perf-out', path])
+    assert pstats.Stats(path).total_calls > 0
+
+
+def test_perf_dump_failure_does_not_mask_errors(perf, tmp_path, capsys):
+    path = str(tmp_path / 'missing' / 'perf.json')
+    with pytest.raises(ValueError, match="没有找到有效考试文件"):
+        qs.main(['--data', str(tmp_path), '--report', str(tmp_path / 'reports'), '--workers', '1',
+                 '--perf-out', path])
+    assert '性能统计写出失败' in capsys.readouterr().out
+    assert not os.path.exists(path)
+
+
+def test_perf_out_json(perf, exam_folder, tmp_path):
+    path = str(tmp_path / 'perf.json')
+    qs.main(['--data', exam_folder, '--report', str(tmp_path / 'reports'), '--workers', '1', '--perf-out', path])
+    with open(path, encoding='utf-8') as f:
+        stats = json.load(f)
+    assert stats['timings']['process_data']['count'] == 1
+    assert len(stats['files']) == 3
@@ -0,0 +1,72 @@
+import json
+import os
+
+import query_score as qs
+from conftest import write_exam
+
+
+def test_homonyms_get_separate_report_rows(exam_data):
+    detail, summary = qs.build_student_reports(exam_data)
+    homonyms = summary[summary['姓名'] == '张伟'].set_index('现班')
+    assert sorted(homonyms.index) == ['高一(1)班', '高一(2)班']
+    assert (homonyms['考试次数'] == 3).all()
+    assert homonyms.loc['高一(1)班', '总分趋势'] > 0
+    assert homonyms.loc['高一(2)班', '总分趋势'] < 0
+
+    rows = detail[(detail['姓名'] == '张伟') & (detail['现班'] == '高一(2)班')]
+    assert list(rows['考试序号']) == [1, 2, 3]
+    assert (rows['总分变化'].iloc[1:] < 0).all()
+
+
+def test_class_reports_only_contain_own_students(exam_data, tmp_path):
+    detail, summary = qs.build_student_reports(exam_data)
+    out_dir = str(tmp_path / 'reports')
+    qs.write_reports(detail, summary, out_dir, formats=('json',))
+
+    assert sorted(os.listdir(out_dir)) == ['高一(1)班.json', '高一(2)班.json']
+    for class_name in ('高一(1)班', '高一(2)班'):
+        with open(os.path.join(out_dir, f'{class_name}.json'), encoding='utf-8') as f:
+            report = json.load(f)
+        assert {row['现班'] for row in report['汇总']} == {class_name}
+        assert {row['现班'] for row in report['明细']} == {class_name}
+        assert sum(row['姓名'] == '张伟' for row in report['汇总']) == 1
+
+
+def test_generate_reports_writes_every_class(exam_folder, tmp_path):
+    out_dir = str(tmp_path / 'reports')
+    qs.generate_reports(exam_folder, out_dir, formats=('csv',), workers=1)
+    assert sorted(os.listdir(out_dir)) == ['年级汇总.csv', '高一(1)班_明细.csv', '高一(1)班_汇总.csv',
+                                           '高一(2)班_明细.csv', '高一(2)班_汇总.csv']
+
+
+def test_transferred_student_is_archived_under_latest_class(transfer_folder, tmp_path):
+    detail, summary = qs.build_student_reports(qs.process_data(transfer_folder))
+    assert sorted(summary.loc[summary['姓名'] == '张伟', qs.STUDENT_KEY]) == ['1001', '1002']
+    moved = summary[summary['姓名'] == '王芳']
+    assert len(moved) == 1
+    assert moved['现班'].iloc[0] == '高一(1)班'
+    assert moved['考试次数'].iloc[0] == 3
+
+    out_dir = str(tmp_path / 'reports')
+    qs.write_reports(detail, summary, out_dir, formats=('json',))
+    assert os.listdir(out_dir) == ['高一(1)班.json']
+    with open(os.path.join(out_dir, '高一(1)班.json'), encoding='utf-8') as f:
+        report = json.load(f)
+    history = [row['现班'] for row in report['明细'] if row['姓名'] == '王芳']
+    assert history == ['高一(2)班', '高一(2)班', '高一(1)班']
+
+
+def test_students_without_class_get_unassigned_report(tmp_path):
+    folder = tmp_path / 'exams'
+    folder.mkdir()
+    write_exam(folder / 'exam.xlsx', '2023学年第一学期期中考试',
+               [['张伟', '高一(1)班', 90, 100, 190, 1, 1, 1, 1], ['李娜', None, 80, 90, 170, 2, 2, 1, 2]])
+    detail, summary = qs.build_student_reports(qs.process_data(str(folder)))
+    assert len(summary) == 2
+    out_dir = str(tmp_path / 'reports')
+    qs.write_reports(detail, summary, out_dir, formats=('json',))
+    assert sorted(os.listdir(out_dir)) == ['未分班.json', '高一(1)班.json']
+    with open(os.path.join(out_dir, '未分班.json'), encoding='utf-8') as f:
+        report = json.load(f)
+    assert [row['姓名'] for row in report['汇总']] == ['李娜']
+    assert [row['姓名'] for row in report['明细']] == ['李娜']
@@ -0,0 +1,45 @@
+import difflib
+import random
+
+import query_score as qs
+
+SURNAMES = '张王李赵刘陈杨黄周吴'
+GIVEN = '伟芳娜敏静丽强磊军洋勇艳杰涛明'
+
+
+def random_names(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.choice(SURNAMES) + ''.join(rng.choice(GIVEN) for _ in range(rng.randint(1, 2)))
+            for _ in range(count)]
+
+
+def test_search_matches_difflib():
+    names = sorted(set(random_names(500)))
+    index = qs.NameSearchIndex(names)
+    for query in random_names(100, seed=1) + ['张', '张伟伟伟', '某某', '']:
+        for n, cutoff in ((3, 0.6), (8, 0.4)):
+            expected = difflib.get_close_matches(query, names, n, cutoff) if query else []
+            assert index.search(query, n, cutoff) == expected, query
+
+
+def test_prefix_and_suggest():
+    index = qs.NameSearchIndex(['张伟', '张伟明', '张三', '李张伟', '王芳'])
+    assert index.prefix('张伟') == ['张伟', '张伟明']
+    assert index.prefix('张', limit=2) == ['张三', '张伟']
+    assert index.prefix('') == []
+    suggestions = index.suggest('张伟', limit=3)
+    assert suggestions[:2] == ['张伟', '张伟明']
+    assert suggestions[2] == '李张伟'
+
+
+def test_add_and_remove_match_rebuild():
+    names = random_names(200)
+    index = qs.NameSearchIndex(names[:100])
+    index.add(names[100:] + [None, '', names[0]])
+    removed = set(names[::3])
+    index.remove(removed)
+    remaining = [name for name in names if name not in removed]
+    expected = qs.NameSearchIndex(remaining)
+    assert index.names == expected.names
+    for query in random_names(50, seed=2):
+        assert index.search(query, 5, 0.5) == expected.search(query, 5, 0.5)
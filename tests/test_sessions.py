@@ -0,0 +1,38 @@
+import pytest
+
+import query_score as qs
+
+
+@pytest.mark.parametrize('earlier, later', [
+    ('2023学年第一学期期中考试', '2023学年第一学期期末考试'),
+    ('2023学年第一学期期末考试', '2023学年第二学期期中考试'),
+    ('2023学年第一学期第一次月考', '2023学年第一学期期中考试'),
+    ('2023学年第一学期期中考试', '2023学年第一学期第二次月考'),
+    ('2023学年第一学期第二次月考', '2023学年第一学期第三次月考'),
+    ('2023学年第一学期期末考试', '2024年春季第二次月考'),
+    ('2024年春季第二次月考', '2024学年第一学期期中考试'),
+    ('2025届一模', '2025届二模'),
+    ('2025届第二次模拟考试', '2025届三模'),
+    ('2023.11.08 联考', '2023年12月月考'),
+    ('2023-12-20 联考', '2024/3/5 联考'),
+])
+def test_session_order(earlier, later):
+    assert qs.parse_session_key(earlier) < qs.parse_session_key(later)
+
+
+def test_session_keys():
+    assert qs.parse_session_key('2023学年第一学期期中考试') // 100 == 20231
+    # 按自然年书写的春季考试属于上一学年
+    assert qs.parse_session_key('2024年春季第二次月考') // 100 == 20232
+    assert qs.parse_session_key('2023-2024学年第二学期期末考试') // 100 == 20232
+    # 届为毕业年份，模拟考试在第二学期
+    assert qs.parse_session_key('2025届一模') // 100 == 20242
+    assert qs.parse_session_key('2024.2.26 开学考') // 100 == 20232
+    assert qs.parse_session_key('第一学期期中考试') is None
+
+
+def test_session_sort_key_falls_back_to_file_name(tmp_path):
+    path = tmp_path / '2023学年第一学期期末考试.xlsx'
+    path.write_bytes(b'')
+    assert qs.session_sort_key('高一期末', str(path)) == qs.parse_session_key('2023学年第一学期期末考试')
+    assert qs.session_sort_key('高一期末') == 0
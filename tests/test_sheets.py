@@ -0,0 +1,79 @@
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.chart import BarChart, Reference
+
+import query_score as qs
+from conftest import HEADER, SESSIONS, exam_rows
+
+
+def fill_sheet(ws, class_name):
+    """写入一个班级的第一场考试成绩"""
+    ws.append([SESSIONS[0]])
+    ws.append(HEADER)
+    for row in exam_rows(0):
+        if row[1] == class_name:
+            ws.append(row)
+
+
+@pytest.fixture
+def class_workbook(tmp_path):
+    """一班、二班 两张工作表"""
+    wb = Workbook()
+    first = wb.active
+    first.title = '一班'
+    fill_sheet(first, '高一(1)班')
+    fill_sheet(wb.create_sheet('二班'), '高一(2)班')
+    path = str(tmp_path / 'classes.xlsx')
+    wb.save(path)
+    return path
+
+
+def test_read_all_or_selected_sheets(class_workbook):
+    df = qs.read_exam_file(class_workbook)
+    assert sorted(df['现班'].unique()) == ['高一(1)班', '高一(2)班']
+    assert len(df) == 4
+    assert list(qs.read_exam_file(class_workbook, ('2',))['现班'].unique()) == ['高一(2)班']
+    assert list(qs.read_exam_file(class_workbook, ('一*',))['现班'].unique()) == ['高一(1)班']
+    assert qs.read_exam_file(class_workbook, ('三班',)).empty
+
+
+@pytest.fixture
+def workbook_with_chart(tmp_path):
+    """一班、图表页、二班 三张表，图表页位于两个工作表之间"""
+    wb = Workbook()
+    first = wb.active
+    first.title = '一班'
+    chart_sheet = wb.create_chartsheet('图表')
+    second = wb.create_sheet('二班')
+    fill_sheet(first, '高一(1)班')
+    fill_sheet(second, '高一(2)班')
+    chart = BarChart()
+    chart.add_data(Reference(first, min_col=5, min_row=3, max_row=4))
+    chart_sheet.add_chart(chart)
+    path = str(tmp_path / 'classes.xlsx')
+    wb.save(path)
+    return path
+
+
+def titles(path, spec):
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return [sheet.title for sheet in qs.select_sheets(workbook, qs.parse_sheet_spec(spec))]
+    finally:
+        workbook.close()
+
+
+def test_select_sheets_skips_chartsheets(workbook_with_chart):
+    assert titles(workbook_with_chart, None) == ['一班', '二班']
+    assert titles(workbook_with_chart, '3') == ['二班']
+    assert titles(workbook_with_chart, '2') == []
+    assert titles(workbook_with_chart, '1,3') == ['一班', '二班']
+    assert titles(workbook_with_chart, '*') == ['一班', '二班']
+    assert titles(workbook_with_chart, '二*') == ['二班']
+
+
+def test_read_exam_file_with_chartsheet(workbook_with_chart):
+    df = qs.read_exam_file(workbook_with_chart)
+    assert sorted(df['现班'].unique()) == ['高一(1)班', '高一(2)班']
+    assert len(df) == 4
+    assert len(qs.read_exam_file(workbook_with_chart, ('3',))) == 2
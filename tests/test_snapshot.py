@@ -0,0 +1,54 @@
+import gzip
+import pickle
+
+import pandas as pd
+import pytest
+
+import query_score as qs
+from conftest import assert_same_index
+
+
+@pytest.mark.parametrize('compression', qs.SNAPSHOT_COMPRESSIONS)
+def test_snapshot_round_trip(exam_data, tmp_path, compression):
+    if qs.feather is None:
+        pytest.skip("需要 pyarrow")
+    path = str(tmp_path / f'snapshot_{compression}.snap')
+    qs.export_snapshot(path, exam_data, compression=compression)
+    data, index, aggregates, meta = qs.import_snapshot(path)
+
+    pd.testing.assert_frame_equal(data, exam_data.reset_index(drop=True), check_dtype=False,
+                                  check_categorical=False)
+    assert_same_index(index, qs.StudentIndex(exam_data))
+    assert aggregates.rows() == qs.ExamAggregates(exam_data).rows()
+    assert meta['rows'] == len(exam_data)
+
+
+def test_snapshot_requires_pyarrow(exam_data, tmp_path, monkeypatch):
+    monkeypatch.setattr(qs, 'feather', None)
+    with pytest.raises(ValueError):
+        qs.export_snapshot(str(tmp_path / 'snapshot.snap'), exam_data)
+
+
+def test_snapshot_rejects_other_schema(exam_data, tmp_path, monkeypatch):
+    if qs.feather is None:
+        pytest.skip("需要 pyarrow")
+    path = str(tmp_path / 'snapshot.snap')
+    qs.export_snapshot(path, exam_data)
+    monkeypatch.setattr(qs, 'SCHEMA_FINGERPRINT', 'other')
+    with pytest.raises(ValueError, match='科目配置'):
+        qs.import_snapshot(path)
+
+
+def test_snapshot_does_not_unpickle(tmp_path):
+    path = tmp_path / 'pickled.snap'
+    with gzip.open(path, 'wb') as f:
+        pickle.dump({'meta': {}, 'data': pd.DataFrame()}, f)
+    with pytest.raises(ValueError):
+        qs.import_snapshot(str(path))
+
+
+def test_snapshot_rejects_other_files(tmp_path):
+    path = tmp_path / 'not_a_snapshot.snap'
+    path.write_bytes(b'plain text')
+    with pytest.raises(ValueError):
+        qs.import_snapshot(str(path))
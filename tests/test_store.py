@@ -0,0 +1,69 @@
+import os
+
+import query_score as qs
+from conftest import SESSIONS, exam_rows, write_exam
+
+
+def test_student_records_by_class(exam_folder, tmp_path):
+    store = qs.SQLiteExamStore(str(tmp_path / 'exams.db'))
+    store.sync(exam_folder)
+    assert store.keys_of('张伟') == ['高一(1)班', '高一(2)班']
+    assert store.keys_of('李娜') == ['']
+
+    records = store.student_records('张伟', '高一(2)班')
+    assert len(records) == 3
+    assert set(records['现班']) == {'高一(2)班'}
+    assert records['总分'].is_monotonic_decreasing
+    assert len(store.student_records('张伟')) == 6
+
+
+def test_sync_is_incremental(exam_folder, tmp_path):
+    store = qs.SQLiteExamStore(str(tmp_path / 'exams.db'))
+    assert store.sync(exam_folder) == (3, 0, [])
+    assert store.summary() == (12, 3, 3)
+    assert store.sync(exam_folder) == (0, 0, [])
+
+    # 修改一个文件：只重新写入该文件，统计量随之更新
+    rows = exam_rows(0)
+    rows[2][4] = 10
+    write_exam(os.path.join(exam_folder, 'exam_3.xlsx'), SESSIONS[0], rows)
+    assert store.sync(exam_folder) == (1, 0, [])
+    assert store.summary() == (12, 3, 3)
+    assert store.student_records('李娜')['总分'].iloc[0] == 10
+    assert store.load_aggregates().value('min', '总分', SESSIONS[0]) == 10
+
+    # 删除一个文件：该场考试的记录和统计量一并删除
+    os.remove(os.path.join(exam_folder, 'exam_1.xlsx'))
+    assert store.sync(exam_folder) == (0, 1, [])
+    assert store.summary() == (8, 2, 3)
+    assert SESSIONS[2] not in store.load_aggregates().by_session
+
+
+def test_sync_keeps_records_of_unreadable_files(exam_folder, tmp_path):
+    store = qs.SQLiteExamStore(str(tmp_path / 'exams.db'))
+    store.sync(exam_folder)
+    with open(os.path.join(exam_folder, 'exam_2.xlsx'), 'wb') as f:
+        f.write(b'not a workbook')
+    assert store.sync(exam_folder) == (0, 0, ['exam_2.xlsx'])
+    assert store.summary() == (12, 3, 3)
+
+
+def test_store_matches_memory(exam_folder, tmp_path):
+    store = qs.SQLiteExamStore(str(tmp_path / 'exams.db'))
+    store.sync(exam_folder)
+    memory = qs.process_data(exam_folder)
+    index = qs.StudentIndex(memory)
+    for name, key in index.by_key:
+        expected = memory.iloc[index.lookup(name, key)]
+        records = store.student_records(name, key)
+        assert list(records['考试场次']) == list(expected['考试场次'])
+        assert list(records['总分']) == list(expected['总分'].astype(float))
+
+
+def test_student_records_by_student_id(transfer_folder, tmp_path):
+    store = qs.SQLiteExamStore(str(tmp_path / 'exams.db'))
+    store.sync(transfer_folder)
+    assert store.keys_of('张伟') == ['1001', '1002']
+    assert list(store.student_records('张伟', '1002')['总分']) == [280, 270, 260]
+    assert store.keys_of('李娜') == ['1003']
+    assert list(store.student_records('王芳', '')['现班']) == ['高一(2)班', '高一(2)班', '高一(1)班']
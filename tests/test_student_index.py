@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+import query_score as qs
+from conftest import assert_same_index
+
+
+def test_homonyms_are_separated_by_class(exam_data):
+    index = qs.StudentIndex(exam_data)
+    assert index.keys('张伟') == ['高一(1)班', '高一(2)班']
+    assert index.keys('李娜') == ['']
+
+    first = exam_data.iloc[index.lookup('张伟', '高一(1)班')]
+    second = exam_data.iloc[index.lookup('张伟', '高一(2)班')]
+    assert set(first['现班']) == {'高一(1)班'}
+    assert set(second['现班']) == {'高一(2)班'}
+    assert first['总分'].is_monotonic_increasing
+    assert second['总分'].is_monotonic_decreasing
+    assert len(index.lookup('张伟')) == len(first) + len(second)
+
+
+def test_lookup_is_chronological(exam_data):
+    index = qs.StudentIndex(exam_data)
+    records = exam_data.iloc[index.lookup('李娜', '')]
+    assert list(records['考试场次']) == [
+        '2023学年第一学期期中考试', '2023学年第一学期期末考试', '2023学年第二学期期中考试']
+
+
+def test_unpack_keeps_keys(exam_data):
+    index = qs.StudentIndex(exam_data)
+    restored = qs.StudentIndex.unpack(*index.packed())
+    assert restored.keys('张伟') == index.keys('张伟')
+    assert np.array_equal(restored.lookup('张伟', '高一(2)班'), index.lookup('张伟', '高一(2)班'))
+
+
+def test_remove_matches_rebuild(exam_data):
+    for source in exam_data['来源文件'].unique():
+        index = qs.StudentIndex(exam_data)
+        mask = (exam_data['来源文件'] == source).to_numpy()
+        order = index.remove(exam_data, mask)
+        remaining = exam_data.take(order).reset_index(drop=True)
+        assert len(remaining) == (~mask).sum()
+        assert_same_index(index, qs.StudentIndex(remaining))
+
+
+def test_remove_drops_students_without_records(exam_data):
+    index = qs.StudentIndex(exam_data)
+    mask = ((exam_data['姓名'] == '张伟') & (exam_data['现班'] == '高一(2)班')).to_numpy()
+    remaining = exam_data.take(index.remove(exam_data, mask)).reset_index(drop=True)
+    # 只剩一名张伟，不再按班级区分
+    assert index.keys('张伟') == ['']
+    assert len(index.lookup('张伟', '高一(2)班')) == 0
+    assert_same_index(index, qs.StudentIndex(remaining))
+
+
+def test_extend_after_remove(exam_data):
+    index = qs.StudentIndex(exam_data)
+    mask = (exam_data['来源文件'] == 'exam_1.xlsx').to_numpy()
+    remaining = exam_data.take(index.remove(exam_data, mask)).reset_index(drop=True)
+    added = qs.concat_compact(remaining, exam_data[mask].reset_index(drop=True))
+    index.extend(added, len(remaining))
+    assert_same_index(index, qs.StudentIndex(added))
+
+
+def test_extend_file_by_file_matches_build(exam_data):
+    index = qs.StudentIndex()
+    data = None
+    # exam_1 为最后一场考试，按文件名顺序加入时需要把新记录插到已有记录之前
+    for source in sorted(exam_data['来源文件'].unique()):
+        frame = exam_data[exam_data['来源文件'] == source].reset_index(drop=True)
+        start = 0 if data is None else len(data)
+        data = frame if data is None else qs.concat_compact(data, frame)
+        index.extend(data, start)
+    assert_same_index(index, qs.StudentIndex(data))
+
+
+def student_frame(rows, columns=('姓名', '现班', '考试场次', '总分')):
+    df = pd.DataFrame(rows, columns=list(columns))
+    df['场次序'] = df['考试场次'].map({'期中': 0, '期末': 1, '次年期中': 2})
+    return df
+
+
+def test_class_change_keeps_one_student():
+    data = student_frame([('李娜', '高一(1)班', '期中', 300), ('李娜', '高一(3)班', '期末', 320),
+                          ('李娜', '高一(3)班', '次年期中', 330)])
+    index = qs.StudentIndex(data)
+    assert index.keys('李娜') == ['']
+    assert list(data.iloc[index.lookup('李娜', '')]['总分']) == [300, 320, 330]
+
+
+def test_student_ids_separate_homonyms_in_one_class():
+    columns = ('姓名', '现班', '学号', '考试场次', '总分')
+    data = student_frame([('张伟', '高一(1)班', '1001', '期中', 300), ('张伟', '高一(1)班', '1002', '期中', 200),
+                          ('张伟', '高一(2)班', '1001', '期末', 310), ('张伟', '高一(1)班', '1002', '期末', 210)],
+                         columns)
+    index = qs.StudentIndex(data)
+    assert index.keys('张伟') == ['1001', '1002']
+    first = data.iloc[index.lookup('张伟', '1001')]
+    assert list(first['现班']) == ['高一(1)班', '高一(2)班']
+    assert list(first['总分']) == [300, 310]
+
+
+def test_single_student_id_fills_blank_ids():
+    columns = ('姓名', '现班', '学号', '考试场次', '总分')
+    data = student_frame([('李娜', '高一(1)班', None, '期中', 300), ('李娜', '高一(3)班', '1002', '期末', 320)],
+                         columns)
+    assert list(qs.student_keys(data)) == ['1002', '1002']
@@ -0,0 +1,91 @@
+import os
+
+import query_score as qs
+from conftest import SESSIONS, exam_rows, write_exam
+
+
+def touch_later(path):
+    """确保修改时间与上次扫描不同"""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_poll_reports_changes(exam_folder):
+    watcher = qs.FolderWatcher(exam_folder)
+    assert watcher.poll() == ([], [], [])
+
+    added = write_exam(os.path.join(exam_folder, 'exam_4.xlsx'), '2023学年第二学期期末考试', exam_rows(3))
+    modified = os.path.join(exam_folder, 'exam_2.xlsx')
+    write_exam(modified, SESSIONS[1], exam_rows(0))
+    touch_later(modified)
+    removed = os.path.join(exam_folder, 'exam_3.xlsx')
+    os.remove(removed)
+    assert watcher.poll() == ([added], [modified], [removed])
+    assert watcher.poll() == ([], [], [])
+
+
+def test_poll_ignores_temporary_and_cache_files(exam_folder):
+    watcher = qs.FolderWatcher(exam_folder)
+    with open(os.path.join(exam_folder, '~$exam_1.xlsx'), 'wb') as f:
+        f.write(b'lock')
+    os.makedirs(os.path.join(exam_folder, qs.CACHE_DIR_NAME), exist_ok=True)
+    assert watcher.poll() == ([], [], [])
+
+
+def load_dataset(folder):
+    dataset, _ = qs.ExamDataset().with_frames(
+        [df for file, df in qs.iter_exam_frames(qs.list_exam_files(folder))])
+    return dataset
+
+
+def assert_same_dataset(dataset, expected):
+    columns = sorted(expected.exam_data.columns)
+    key = ['来源文件', '姓名', '现班']
+    actual = dataset.exam_data[columns].astype(str).sort_values(key).reset_index(drop=True)
+    wanted = expected.exam_data[columns].astype(str).sort_values(key).reset_index(drop=True)
+    assert actual.equals(wanted)
+    assert dataset.student_index.name_keys == expected.student_index.name_keys
+    for student in expected.student_index.by_key:
+        rows = dataset.exam_data.iloc[dataset.student_index.lookup(*student)]
+        wanted_rows = expected.exam_data.iloc[expected.student_index.lookup(*student)]
+        assert list(rows['考试场次']) == list(wanted_rows['考试场次'])
+        assert list(rows['总分']) == list(wanted_rows['总分'])
+    assert dataset.name_index.names == expected.name_index.names
+    assert dataset.aggregates.by_class == expected.aggregates.by_class
+    assert dataset.aggregates.by_session == expected.aggregates.by_session
+
+
+def test_patch_matches_full_reload(exam_folder):
+    watcher = qs.FolderWatcher(exam_folder)
+    dataset = load_dataset(exam_folder)
+    before = dataset.exam_data.copy()
+
+    write_exam(os.path.join(exam_folder, 'exam_4.xlsx'), '2023学年第二学期期末考试', exam_rows(3))
+    modified = os.path.join(exam_folder, 'exam_2.xlsx')
+    rows = exam_rows(1)
+    rows[2][4] = 10
+    write_exam(modified, SESSIONS[1], rows)
+    touch_later(modified)
+    os.remove(os.path.join(exam_folder, 'exam_3.xlsx'))
+
+    added, changed, removed = watcher.poll()
+    frames = list(qs.iter_exam_frames(added + changed))
+    patched, failed = dataset.with_changes(frames, removed)
+    assert failed == []
+    assert_same_dataset(patched, load_dataset(exam_folder))
+    # 原数据集不受影响
+    assert dataset.exam_data.equals(before)
+
+
+def test_patch_keeps_records_of_unreadable_files(exam_folder):
+    watcher = qs.FolderWatcher(exam_folder)
+    dataset = load_dataset(exam_folder)
+    broken = os.path.join(exam_folder, 'exam_2.xlsx')
+    with open(broken, 'wb') as f:
+        f.write(b'not a workbook')
+    touch_later(broken)
+
+    added, changed, removed = watcher.poll()
+    patched, failed = dataset.with_changes(list(qs.iter_exam_frames(added + changed)), removed)
+    assert failed == ['exam_2.xlsx']
+    assert_same_dataset(patched, dataset)